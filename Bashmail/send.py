@@ -11,20 +11,38 @@ Provides same "send()" functionality as that found in Pymail.send
 """
 
 import os
+import sys
 import time
+import random
+import asyncio
 import subprocess
+import Pymail.journal
+
+MIN_TIME_TO_SLEEP = 1   #} Seconds between
+MAX_TIME_TO_SLEEP = 5   #} email postings.
+JOBS = 1  # Number of mutt processes run at once.
+EX_TEMPFAIL = 75  # Exit status (sysexits.h) if worth trying again.
 
 # Note: the 'To' header is NOT included in the following:
 header_keys = ("From", "Sender", "Reply-To",
                  "Cc", "Bcc", "Subject", )
 
-def smtp_send(email, mta):
+
+def recipients(email):
     """
-    WARNING: Can not accommodate attachments!
-    First parameter is a dict with keys and values
-    specifying an email.  If there are attachments
-    a warning is printed and they are NOT sent.
-    <mta> specifies which Mail Transfer Agent to use.
+    Returns a list of <email>'s 'To' addressees (whether given as
+    a comma separated string or a list.)
+    """
+    if isinstance(email['To'], str):
+        return [recipient.strip() for recipient in email['To'].split(',')
+                if recipient.strip()]
+    return list(email['To'])
+
+
+def smtp_command(email, mta):
+    """
+    Returns the msmtp command (a list) and its input (the
+    message) for <email>.  Can not accommodate attachments!
     """
     cmd_args = ["msmtp", "-a", mta, "-t", "--"]
     message = []
@@ -32,48 +50,70 @@ def smtp_send(email, mta):
     for key in header_keys:
         if key in included_keys:
             message.append("{}: {}".format(key, email[key]))
-    if message:
-        message.append('')
-        message = '\n'.join(message)
-        message = message + email['body']
+    if message:  # (A blank line separates headers from body.)
+        message = '\n'.join(message) + '\n\n' + email['body']
     else:
         message = email['body']
+    cmd_args.extend(recipients(email))
+    return cmd_args, message
+
+
+def mutt_command(email, mta):
+    """
+    Returns the mutt command (a list) and its input (the body)
+    for <email>.
+    """
+    cmd_args = [ "mutt", "-F",
+        os.path.expanduser("~/.mutt{}".format(mta)), ]
+    cmd_args.extend(["-s", "{}".format(email["Subject"])])
+    for key, flag in (("Cc", "-c"), ("Bcc", "-b")):
+        for address in email.get(key, '').split(','):
+            if address.strip():
+                cmd_args.extend([flag, address.strip()])
+    if email.get("attachments"):
+        cmd_args.append('-a')
+        cmd_args.extend(email["attachments"])
+        cmd_args.append("--")
+    cmd_args.extend(recipients(email))
+    return cmd_args, email["body"]
+
+
+def command(email, mta):
+    """
+    The command used to send <email>: always mutt (as did send
+    before: msmtp on its own has not been working for the club.)
+    """
+    return mutt_command(email, mta)
+
+
+def smtp_send(email, mta):
+    """
+    WARNING: Can not accommodate attachments!
+    First parameter is a dict with keys and values
+    specifying an email.  If there are attachments
+    a warning is printed and they are NOT sent.
+    <mta> specifies which Mail Transfer Agent to use.
+    """
     if "attachments" in email and email["attachments"]:
         print("Not configured to send attachments:")
-        for attachment in attachments:
+        for attachment in email["attachments"]:
             print ("Attachment '{}' is NOT being included."
                 .format(attachment))
-    for recipient in email['To'].split(','):
-        print("Appending recipient '{}'.".format(recipient))
-        cmd_args.append(recipient)
-    print(cmd_args)
-    print(message)
-    p = subprocess.run(cmd_args, stdout=subprocess.PIPE, 
+    cmd_args, message = smtp_command(email, mta)
+    p = subprocess.run(cmd_args, stdout=subprocess.PIPE,
         input=message, encoding='utf-8')
     if p.returncode:
         print("Error: {} ({})".format(
-            p.stdout, recipient))
+            p.stdout, email['To']))
 
 
 def mutt_send(email, mta):
     """
     Choose mutt to send email if there are attachments.
     """
-    cmd_args = [ "mutt", "-F",
-        os.path.expanduser("~/.mutt{}".format(mta)), ]
-    cmd_args.extend(["-s", "{}".format(email["Subject"])])
-    if email["attachments"]:
-        list2attach = ['-a']
-        for path2attach in email["attachments"]:
-            list2attach.append(path2attach)
-        cmd_args.extend(list2attach)
-        cmd_args.appand("--")
-    if type(email['To'])==str:
-        cmd_args.append(email['To'])
-    else:
-        cmd_args.extend(email['To'])
-    p = subprocess.run(cmd_args, stdout=subprocess.PIPE, 
-        input=email["body"], encoding='utf-8')
+    cmd_args, body = mutt_command(email, mta)
+    p = subprocess.run(cmd_args, stdout=subprocess.PIPE,
+        input=body, encoding='utf-8')
     if p.returncode:
         print("Error: {} ({})".format(
             p.stdout, email['To']))
@@ -88,13 +128,109 @@ def send_email(email, mta):
     and email['attachments']):          # and has a value.
         mutt_send(email, mta)
     else:                         # no attachment to include
-        msmtp_send(email, mta)
+        smtp_send(email, mta)
+
+
+async def run(cmd_args, text):
+    """
+    Runs <cmd_args> with <text> as its input: returns its exit
+    status and what it output (stdout & stderr.)
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *cmd_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT)
+    except OSError as error:  # e.g. mutt isn't installed.
+        return -1, str(error)
+    output, _ = await process.communicate(text.encode('utf-8'))
+    return process.returncode, output.decode('utf-8', 'replace')
+
+
+async def send_async(emails, mta, report_progress=True,
+                     include_wait=True, jobs=JOBS, journal=None):
+    """
+    The coroutine doing the work of send (see below.)
+    """
+    n_emails = len(emails)
+    if journal is None:
+        items = [(n, None, email) for n, email in enumerate(emails, 1)]
+    else:
+        items = journal.pending(emails)
+        if report_progress and len(items) < n_emails:
+            print("Skipping {} email(s) already dealt with (see {})."
+                  .format(n_emails - len(items), journal.journal_file))
+    result = dict(sent=0, failed=[], seconds=0)
+    failed = {}  # n => ('To', error)
+    skipped = n_emails - len(items)
+    limit = asyncio.Semaphore(max(1, jobs))
+
+    def report(n, key, email, returncode, output):
+        if returncode:
+            error = "exit status {}: {}".format(returncode,
+                                                output.strip())
+            failed[n] = (email.get('To'), error)
+            if journal is not None:
+                journal.record(key, 'failed', to=email.get('To'),
+                               error=error,
+                               retry=returncode == EX_TEMPFAIL)
+        else:
+            result['sent'] += 1
+            failed.pop(n, None)
+            if journal is not None:
+                journal.record(key, 'sent')
+        if report_progress:
+            print("\rSent {} of {} ({} failed, {} skipped)"
+                  .format(result['sent'], n_emails, len(failed),
+                          skipped), end='', flush=True)
+
+    async def dispatch(n, key, email):
+        try:
+            returncode, output = await run(*command(email, mta))
+        finally:
+            limit.release()
+        report(n, key, email, returncode, output)
+
+    start = time.perf_counter()
+    while items:
+        tasks = []
+        try:
+            for n, key, email in items:
+                await limit.acquire()  # At most <jobs> at once.
+                tasks.append(asyncio.create_task(dispatch(n, key, email)))
+                if include_wait:
+                    await asyncio.sleep(random.randint(
+                            MIN_TIME_TO_SLEEP, MAX_TIME_TO_SLEEP))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        if journal is None:
+            break
+        items = journal.retries(emails)
+        if items:
+            due = min(journal.due(key) for n, key, email in items)
+            wait = due - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            items = [item for item in items
+                     if journal.due(item[1]) <= due]
+    result['seconds'] = time.perf_counter() - start
+    result['failed'] = [(n, ) + failed[n] for n in sorted(failed)]
+    if report_progress:
+        print()
+        for n, to, error in result['failed']:
+            print("FAILURE sending email #{} to {}: {}"
+                  .format(n, to, error))
+    return result
 
 
 def send(emails, mta, report_progress=True,
-                            include_wait=True):
+                include_wait=True, jobs=JOBS, journal=None,
+                confirm=True):
     """
-    Sends emails using msmtp.
+    Sends emails using mutt.
     <email> is a dict representing an email to be sent.
     Keys, some optional, can be as follows:
     'body': a (possibly empty) string. (optional)
@@ -104,32 +240,23 @@ def send(emails, mta, report_progress=True,
     ...Values are either strings or lists of strings;
     in the latter case the values are converted into a single
     comma separated string.
+    Up to <jobs> mutt processes are run at once.  If a
+    <journal> (see Pymail/journal.py) is provided, emails it shows
+    as already sent are skipped, what becomes of each email is
+    recorded in it and those mutt says are worth trying again
+    (EX_TEMPFAIL) are (once the journal says they're due.)
+    Returns a dict as does Pymail.send.send.
     """
-    counter = 0
-    n_emails = len(emails)
-    ret = []
-    if mta != 'clubg':
+    if confirm and mta != 'clubg':
         response = input(
             "Gmail addressees will get a warning! Continue? ")
         if response and response[0] in 'yY':
             pass
         else:
             sys.exit()
-    for email in emails:
-        counter += 1
-        if report_progress:
-            print("Sending email #{}/{} to {}..."
-                .format(counter, n_emails, ", ".join(email['To'])))
-    #           .format(counter, email['To']))
-        mutt_send(email, mta)  #Using mutt; msmtp not working.
-        if include_wait:
-            time.sleep(random.randint(MIN_TIME_TO_SLEEP,
-                                    MAX_TIME_TO_SLEEP))
-#  Rest redacted because msmtp seems to not be working.        
-#       if 'attachments' in emails:  # use mutt:
-#           mutt_send(email, mta)
-#       else:                        # use msmtp:
-#           smtp_send(email, mta)
+    return asyncio.run(send_async(emails, mta, report_progress,
+                                  include_wait, jobs, journal))
+
 
 redacted_part_of_send = '''
         recipients = [
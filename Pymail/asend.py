@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+
+# File: Pymail/asend.py
+
+"""
+Sends emails (as does send.send: same parameters, same result)
+using asyncio: messages are built (in a thread) while earlier
+ones are being sent, each of the MTA's "connections" is an SMTP
+session (a coroutine) of its own and progress is reported as
+emails go.  At most "connections" emails are in flight (and as
+many again built and waiting) at any time.  An email that can't
+be sent is reported (in the result) rather than stopping the
+rest; an interrupt (^C) closes the sessions cleanly, what's
+been sent having been recorded in the journal (if any.)
+
+(utils.py send_emails uses this when "--emailer async".)
+
+The SMTP client (Session) is only what's needed: EHLO, STARTTLS,
+AUTH PLAIN, MAIL, RCPT, DATA & QUIT.  Errors are reported using
+smtplib's exceptions.  STARTTLS (asyncio's StreamWriter.start_tls)
+needs Python 3.11 or later; with an earlier Python, use send.py
+(or an MTA with "tls_starttls" "off", such as sink.py.)
+"""
+
+import re
+import ssl
+import sys
+import time
+import base64
+import asyncio
+import smtplib
+
+try:
+    import send as sync
+    import config
+except ModuleNotFoundError:
+    try:
+        import Pymail.send as sync
+        import Pymail.config as config
+    except ModuleNotFoundError:
+        from code import send as sync
+        from code import config
+
+LEADING_DOT = re.compile(rb'^\.', re.MULTILINE)
+
+
+class Session(object):
+    """
+    An SMTP session with <server> (an entry of config.config.)
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.reader = None
+        self.writer = None
+
+    async def reply(self):
+        """
+        Returns (code, text) of the server's (possibly multi line)
+        reply.
+        """
+        lines = []
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                raise smtplib.SMTPServerDisconnected(
+                                "Connection unexpectedly closed")
+            lines.append(line[4:].strip())
+            if line[3:4] != b'-':
+                return int(line[:3]), b'\n'.join(lines)
+
+    async def command(self, line, expected=(250, )):
+        """
+        Sends <line>: returns the reply if its code is one of
+        <expected>, otherwise raises SMTPResponseException.
+        """
+        self.writer.write(line.encode('utf-8') + b'\r\n')
+        await self.writer.drain()
+        code, text = await self.reply()
+        if code not in expected:
+            raise smtplib.SMTPResponseException(code, text)
+        return code, text
+
+    async def open(self):
+        """
+        Connects (and logs in): returns the session.
+        """
+        server = self.server
+        try:
+            self.reader, self.writer = await asyncio.open_connection(
+                                        server['host'], server['port'])
+        except OSError as error:
+            raise smtplib.SMTPConnectError(-1, str(error))
+        try:
+            await self.greet()
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def greet(self):
+        """
+        What's said to open a session: EHLO, STARTTLS & AUTH.
+        """
+        server = self.server
+        code, text = await self.reply()
+        if code != 220:
+            raise smtplib.SMTPConnectError(code, text)
+        await self.command("EHLO localhost")
+        if server.get("tls_starttls", "on") != "off":
+            if not hasattr(self.writer, 'start_tls'):
+                raise smtplib.SMTPNotSupportedError(
+                    "STARTTLS needs Python 3.11 or later:"
+                    " use '--emailer python' instead.")
+            await self.command("STARTTLS", (220, ))
+            await self.writer.start_tls(ssl.create_default_context(),
+                                        server_hostname=server['host'])
+            await self.command("EHLO localhost")
+        if server.get("auth", "on") != "off":
+            credentials = base64.b64encode("\0{}\0{}".format(
+                server['user'], server['password']).encode('utf-8'))
+            try:
+                await self.command("AUTH PLAIN " + credentials.decode(),
+                                   (235, ))
+            except smtplib.SMTPResponseException as error:
+                raise smtplib.SMTPAuthenticationError(error.smtp_code,
+                                                      error.smtp_error)
+
+    async def sendmail(self, from_addr, recipients, data):
+        """
+        Sends <data> (bytes: see send.render.)  Raises as does
+        smtplib's sendmail.
+        """
+        try:
+            await self.command("MAIL FROM:<{}>".format(from_addr))
+        except smtplib.SMTPResponseException as error:
+            await self.command("RSET")
+            raise smtplib.SMTPSenderRefused(error.smtp_code,
+                                            error.smtp_error, from_addr)
+        refused = {}
+        for recipient in recipients:
+            try:
+                await self.command("RCPT TO:<{}>".format(recipient),
+                                   (250, 251))
+            except smtplib.SMTPResponseException as error:
+                refused[recipient] = (error.smtp_code, error.smtp_error)
+        if len(refused) == len(recipients):
+            await self.command("RSET")
+            raise smtplib.SMTPRecipientsRefused(refused)
+        try:
+            await self.command("DATA", (354, ))
+        except smtplib.SMTPResponseException as error:
+            await self.command("RSET")
+            raise smtplib.SMTPDataError(error.smtp_code, error.smtp_error)
+        data = LEADING_DOT.sub(b'..', data)
+        if not data.endswith(b'\r\n'):
+            data += b'\r\n'
+        self.writer.write(data + b'.\r\n')
+        await self.writer.drain()
+        code, text = await self.reply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, text)
+        return refused
+
+    async def close(self):
+        """
+        Ends the session (even if it's already been dropped.)
+        """
+        if self.writer is None:
+            return
+        try:
+            await asyncio.wait_for(self.command("QUIT", (221, )), 5)
+        except (smtplib.SMTPException, OSError, asyncio.TimeoutError):
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (OSError, ssl.SSLError):
+            pass
+        self.writer = None
+
+
+async def send_async(emails, mta, report_progress=True,
+                     include_wait=True, confirm=True, journal=None,
+                     spool_dir=None):
+    """
+    The coroutine doing the work of send (see below.)
+    """
+    n_emails = len(emails)
+    if journal is None:
+        items = [(n, None, email) for n, email in enumerate(emails, 1)]
+    else:
+        items = journal.pending(emails)
+        if report_progress and len(items) < n_emails:
+            print("Skipping {} email(s) already dealt with (see {})."
+                  .format(n_emails - len(items), journal.journal_file))
+    result = dict(sent=0, failed=[], seconds=0)
+    if not items:
+        return result
+    print("Using {} as MTA...".format(mta))
+    server = config.config[mta]
+    sender = server["from"]
+    if spool_dir is not None:
+        sync.check_spooled(emails, sender)
+    if report_progress:
+        print("Initiating SMTP: {host} {port}".format_map(server))
+    sessions = [await Session(server).open()]
+    if confirm:
+        response = input("... successful.  Continue? ")
+        if not response or not response[0] in 'yY':
+            await sessions[0].close()
+            sys.exit()
+    bucket = None
+    if include_wait:
+        bucket = sync.TokenBucket(server.get("rate", sync.RATE),
+                                  server.get("burst", sync.BURST))
+    failed = {}  # n => ('To', error)
+    loop = asyncio.get_running_loop()
+
+    def report(n, key, email, error=None):
+        if journal is not None:
+            if error is None:
+                journal.record(key, 'sent')
+            else:
+                journal.record(key, 'failed', to=email.get('To'),
+                               error=repr(error),
+                               retry=isinstance(error,
+                                                smtplib.SMTPDataError))
+        if error is None:
+            result['sent'] += 1
+            failed.pop(n, None)
+        else:
+            failed[n] = (email.get('To'), repr(error))
+        if report_progress:
+            if error is None:
+                print("Sent email {} of {} to {}"
+                      .format(n, n_emails, email.get('To')))
+            else:
+                print("FAILURE sending email #{} to {}: {!r}"
+                      .format(n, email.get('To'), error))
+
+    def prepare(email):
+        if spool_dir is None:
+            return sync.render(email, sender)
+        return sync.spooled(spool_dir, email)
+
+    async def build(items, ready, n_workers):
+        for n, key, email in items:
+            try:
+                message = await loop.run_in_executor(None, prepare,
+                                                     email)
+            except OSError as error:  # e.g. a missing attachment
+                report(n, key, email, error)
+                continue
+            await ready.put((n, key, email, message))
+        for _ in range(n_workers):
+            await ready.put(None)
+
+    async def work(session, ready):
+        try:
+            while True:
+                item = await ready.get()
+                if item is None:
+                    return
+                n, key, email, message = item
+                if bucket:
+                    wait = bucket.reserve()
+                    if wait:
+                        await asyncio.sleep(wait)
+                for attempt in range(sync.RECONNECTS + 1):
+                    try:
+                        if session is None:
+                            session = await Session(server).open()
+                        await session.sendmail(*message)
+                    except (smtplib.SMTPServerDisconnected,
+                            smtplib.SMTPConnectError,
+                            ConnectionError) as error:
+                        if session is not None:
+                            await session.close()
+                        session = None
+                        if attempt == sync.RECONNECTS:
+                            report(n, key, email, error)
+                    except (smtplib.SMTPDataError,
+                            smtplib.SMTPRecipientsRefused,
+                            smtplib.SMTPSenderRefused) as error:
+                        report(n, key, email, error)
+                        break
+                    except (smtplib.SMTPException, ssl.SSLError,
+                            OSError) as error:
+                        # e.g. (re)connecting: EHLO, STARTTLS or
+                        # AUTH refused.  Not worth trying again.
+                        if session is not None:
+                            await session.close()
+                        session = None
+                        report(n, key, email, error)
+                        break
+                    else:
+                        report(n, key, email)
+                        break
+        finally:
+            if session is not None:
+                await session.close()
+
+    start = time.perf_counter()
+    while items:
+        n_connections = max(1, min(int(server.get("connections",
+                                       sync.CONNECTIONS)), len(items)))
+        sessions.extend([None] * (n_connections - len(sessions)))
+        ready = asyncio.Queue(n_connections)
+        tasks = [asyncio.create_task(build(items, ready, n_connections))]
+        tasks.extend(asyncio.create_task(work(session, ready))
+                     for session in sessions)
+        sessions = []
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        if journal is None:
+            break
+        items = journal.retries(emails)
+        if items:
+            due = min(journal.due(key) for n, key, email in items)
+            wait = due - time.time()
+            if wait > 0:
+                if report_progress:
+                    print("Trying refused email(s) again in {:.0f}"
+                          " seconds...".format(wait))
+                await asyncio.sleep(wait)
+            items = [item for item in items
+                     if journal.due(item[1]) <= due]
+    result['seconds'] = time.perf_counter() - start
+    result['failed'] = [(n, ) + failed[n] for n in sorted(failed)]
+    if report_progress:
+        print("Sent {} of {} emails in {:.1f} seconds ({:.2f}/sec)"
+              " using {} connection(s)."
+              .format(result['sent'], n_emails, result['seconds'],
+                      result['sent'] / (result['seconds'] or 1),
+                      n_connections))
+    return result
+
+
+def send(emails, mta, report_progress=True, include_wait=True,
+                confirm=True, journal=None, spool_dir=None):
+    """
+    As send.send but using asyncio (see send_async.)
+    """
+    return asyncio.run(send_async(emails, mta, report_progress,
+                                  include_wait, confirm, journal,
+                                  spool_dir))
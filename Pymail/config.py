@@ -29,10 +29,28 @@ def getpw(service):
         return f_obj.read().strip()
 
 
+class Server(dict):
+    """
+    The settings of an MTA.  The password is only read (by getpw,
+    from the file named by "pw") when it's first needed so
+    importing this module doesn't require any of the dot files.
+    Optional settings used by send.send (defaults in send.py):
+        "connections": number of SMTP sessions used at once
+        "rate": emails per second (on average)
+        "burst": emails that can be sent before "rate" applies
+    """
+
+    def __missing__(self, key):
+        if key == "password" and "pw" in self:
+            password = self["password"] = getpw(self["pw"])
+            return password
+        raise KeyError(key)
+
+
 # Plan to rename 'config' to 'mta' ("--mta" command line option.)
 # mta = dict(
 config = dict(
-    sonic= {
+    sonic=Server({
         "host": "smtp://akleider@mail.sonic.net",
         "port": "587",
         "protocol": "smtp",
@@ -40,10 +58,10 @@ config = dict(
         "tls_starttls": "on",
         "user": "akleider@sonic.net",
         "from": "akleider@sonic.net",
-        "password": getpw("sonic"),
+        "pw": "sonic",
         "tls": "on",
-    },
-    easy= {
+    }),
+    easy=Server({
         "host": "mailout.easydns.com",
         "tls_port": "587",
         "ssl_port": "465",  # SSL deprecated predecessor to TLS
@@ -54,12 +72,12 @@ config = dict(
         "tls_starttls": "on",
         "user": "kleider.ca",
         "from": "alex@kleider.ca",
-        "password": getpw("easy"),
+        "pw": "easy",
         "tls": "on",
-    },
+    }),
 # google no longer provides smtp services so 
 # the following won't work!!
-    akg= {
+    akg=Server({
         "host": "smtp.gmail.com",
         "port": "587",
         "tls_port": "587",
@@ -67,19 +85,21 @@ config = dict(
         "ssl_port": "465",
         "user": "alexkleider@gmail.com",
         "from": "alexkleider@gmail.com",
-        "password": getpw("akg"),
+        "rate": 0.33,  # (as did send.pause: 1 to 5 seconds apart)
+        "pw": "akg",
 
-    },
-    clubg= {
+    }),
+    clubg=Server({
         "host": "smtp.gmail.com",
         "port": "587",
         "tls_port": "587",
         "ssl_port": "465",
         "user": "rodandboatclub@gmail.com",
         "from": "rodandboatclub@gmail.com",
-        "password": getpw("clubg"),
+        "rate": 0.33,  # (as did send.pause: 1 to 5 seconds apart)
+        "pw": "clubg",
 
-    },
+    }),
 )
 
 if __name__ == '__main__':
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+# File: Pymail/journal.py
+
+"""
+A record (append only; each entry forced to disk as it's made)
+of what's become of each email of a mailing so that, should
+sending stop part way, running it again sends only what hasn't
+already gone.  Each email is known by a hash of its content (see
+keys) so the journal stays valid as long as the JSON file of
+emails (see utils.py prepare_mailing) isn't changed.
+Emails an MTA refuses (SMTPDataError) are tried again, each time
+waiting longer (see Journal.due), up to ATTEMPTS times.
+
+Each line of the journal file is a JSON object:
+    {"key": ..., "status": "sent" | "failed", "time": ...,
+     "to": ..., "error": ..., "retry": true | false}
+
+Typical usage:
+    journal = Journal(json_file + '.journal')
+    send.send(emails, mta, journal=journal)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+ATTEMPTS = 3    # Tries (in all) at sending an email.
+BACKOFF = 60    # Seconds before the first retry; doubled thereafter.
+
+
+def email_key(email):
+    """
+    Returns a (hex) sha256 of the content of <email> (a dict.)
+    """
+    text = json.dumps(email, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def keys(emails):
+    """
+    Returns a list of the key of each of <emails>: its email_key
+    (with ':n' appended for the nth copy of an identical email.)
+    """
+    ret = []
+    seen = {}
+    for email in emails:
+        key = email_key(email)
+        n = seen[key] = seen.get(key, 0) + 1
+        ret.append(key if n == 1 else '{}:{}'.format(key, n))
+    return ret
+
+
+class Journal(object):
+    """
+    The journal kept in <journal_file> (created if need be.)
+    Attributes (from what's already been recorded):
+        sent: set of keys of emails already sent
+        failures: key => list of entries (dicts) of failed attempts
+    """
+
+    def __init__(self, journal_file, attempts=ATTEMPTS,
+                 backoff=BACKOFF):
+        self.journal_file = journal_file
+        self.attempts = attempts
+        self.backoff = backoff
+        self.sent = set()
+        self.failures = {}
+        self.lock = threading.Lock()
+        complete = True
+        if os.path.exists(journal_file):
+            with open(journal_file, 'r', encoding='utf-8') as stream:
+                for line in stream:
+                    complete = line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Cut short (by a crash.)
+                    self.add(entry)
+        self.stream = open(journal_file, 'a', encoding='utf-8')
+        if not complete:
+            self.stream.write('\n')
+
+    def add(self, entry):
+        if entry['status'] == 'sent':
+            self.sent.add(entry['key'])
+            self.failures.pop(entry['key'], None)
+        else:
+            self.failures.setdefault(entry['key'], []).append(entry)
+
+    def record(self, key, status, to=None, error=None, retry=False):
+        """
+        Appends (and forces to disk) an entry for the email
+        known by <key>: <status> is 'sent' or 'failed'.
+        """
+        entry = dict(key=key, status=status, time=time.time())
+        if status != 'sent':
+            entry.update(to=to, error=error, retry=retry)
+        with self.lock:
+            self.stream.write(json.dumps(entry) + '\n')
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+            self.add(entry)
+
+    def pending(self, emails):
+        """
+        Returns a list of (n, key, email) of those of <emails>
+        (n counting from 1) yet to be sent (and not yet given up
+        on: see given_up.)
+        """
+        return [(n, key, email) for n, (key, email)
+                in enumerate(zip(keys(emails), emails), 1)
+                if key not in self.sent
+                and len(self.failures.get(key, ())) < self.attempts]
+
+    def retries(self, emails):
+        """
+        Returns those of pending(<emails>) to be tried again: their
+        last attempt failed because the MTA refused them.
+        """
+        return [item for item in self.pending(emails)
+                if self.failures.get(item[1])
+                and self.failures[item[1]][-1].get('retry')]
+
+    def due(self, key):
+        """
+        Returns when (time.time()) the email known by <key> can be
+        tried again: BACKOFF seconds after its first failure,
+        twice that after the second, ...
+        """
+        failures = self.failures.get(key)
+        if not failures:
+            return 0
+        return (failures[-1]['time']
+                + self.backoff * 2 ** (len(failures) - 1))
+
+    def given_up(self):
+        """
+        Returns a list of the last (failed) entry of each email
+        that's failed <attempts> times.
+        """
+        return [failures[-1] for key, failures in self.failures.items()
+                if len(failures) >= self.attempts]
+
+    def close(self):
+        self.stream.close()
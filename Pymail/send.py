@@ -32,19 +32,26 @@ a second command line argument to specify
 a json file from which to load emails.
 """
 
+import io
 import sys
 import os
 import smtplib
+from email.generator import BytesGenerator
+from email.utils import getaddresses
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-# from email.mime.base import MIMEBase
+from email.mime.base import MIMEBase
 # from email import encoders
 import mimetypes
 import hashlib
 import json
 import time
-import random
+import mmap
+import queue
+import base64
+import threading
+import collections
 
 try:
     import config
@@ -54,17 +61,53 @@ except ModuleNotFoundError:
     except ModuleNotFoundError:
         from code import config
 
-MIN_TIME_TO_SLEEP = 1   #} Seconds between
-MAX_TIME_TO_SLEEP = 5   #} email postings.
+CONNECTIONS = 2  # Default number of SMTP sessions used at once,
+RATE = 1.0       # emails per second (on average)
+BURST = 5        # and how many can go before RATE applies.
+RECONNECTS = 2   # Tries (per email) to reopen a dropped session.
+ATTACHMENTS_KEPT = 64 * 2**20  # Bytes of encoded attachments kept.
+MMAP_SIZE = 2**20  # Attachments this big (or bigger) are mmapped.
 
-def pause():
+_attachments = collections.OrderedDict()  # See encoded.
+_attachments_lock = threading.Lock()
+
+
+class TokenBucket(object):
     """
-    Provides a random interval between emails so that the
-    MTA is less likely to think the process is automated.
-    Only used in the case of gmail.
+    Limits (across threads) the rate at which emails are sent:
+    take() waits (if need be) for a token; tokens accumulate at
+    <rate> per second up to <burst>.  Used instead of random
+    pauses between emails (MTAs limit how many are sent in a
+    given time, not how regularly.)
     """
-    time.sleep(random.randint(MIN_TIME_TO_SLEEP,
-                              MAX_TIME_TO_SLEEP))
+
+    def __init__(self, rate, burst=1,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.last = clock()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Takes a token: returns how long (seconds) to wait before
+        using it.
+        """
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst,
+                              self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0
+
+    def take(self):
+        wait = self.reserve()
+        if wait:
+            self.sleep(wait)
 
 
 rfc5322 = {    # Here for reference, not used by the code.
@@ -122,6 +165,38 @@ def pseudo_recipient(plus_name, g_email):
     return parts[0] + '+' + plus_name + '@' + parts[1]
 
 
+def encoded(attachment):
+    """
+    Returns the content of the file <attachment> base64 encoded
+    (a str.)  Each file is encoded only once (for as long as its
+    (path, mtime, size) stay the same) however many emails it's
+    attached to: the most recently used are kept (up to
+    ATTACHMENTS_KEPT bytes.)  Big files (MMAP_SIZE bytes or more)
+    are memory mapped rather than read.
+    """
+    stat = os.stat(attachment)
+    key = (os.path.abspath(attachment), stat.st_mtime_ns, stat.st_size)
+    with _attachments_lock:
+        if key in _attachments:
+            _attachments.move_to_end(key)
+            return _attachments[key]
+    with open(attachment, "rb") as f_obj:
+        if stat.st_size >= MMAP_SIZE:
+            with mmap.mmap(f_obj.fileno(), 0,
+                           access=mmap.ACCESS_READ) as data:
+                ret = str(base64.encodebytes(data), 'ascii')
+        else:
+            ret = str(base64.encodebytes(f_obj.read()), 'ascii')
+    if len(ret) <= ATTACHMENTS_KEPT:
+        with _attachments_lock:
+            _attachments[key] = ret
+            total = sum(len(value) for value in _attachments.values())
+            while total > ATTACHMENTS_KEPT:
+                _, value = _attachments.popitem(last=False)
+                total -= len(value)
+    return ret
+
+
 def attach(attachment, msg):
     """
     <msg>: an instance of MIMEMultipart() to which to add
@@ -130,12 +205,13 @@ def attach(attachment, msg):
     This code has been successfully tested to work for the
     following types of files: text, .docx, .pdf, ..
     so is expected to work for all files.
+    The part is as MIMEApplication would make it but the
+    encoding (see encoded) is shared by all emails.
     """
     basename = os.path.basename(attachment)
-    with open(attachment, "rb") as f_obj:
-        part = MIMEApplication(
-            f_obj.read(), basename)
-    # After the file is closed
+    part = MIMEBase('application', basename)
+    part.set_payload(encoded(attachment))
+    part['Content-Transfer-Encoding'] = 'base64'
     part['Content-Disposition'] = (
         'attachment; filename="%s"' % basename)
     msg.attach(part)
@@ -212,8 +288,98 @@ def into_string(header_value):
         return ''
 
 
-def send(emails, mta, report_progress=True,
-                            include_wait=True):
+def connect(server, report_progress=False):
+    """
+    Returns an SMTP session with <server> (an entry of
+    config.config) logged in (unless its "auth" is "off".)
+    """
+    if report_progress:
+        print("Initiating SMTP: {host} {port}".format_map(server))
+    s = smtplib.SMTP(host=server['host'], port=server['port'])
+    if server.get("tls_starttls", "on") != "off":
+        s.starttls()
+    s.ehlo()
+    if server.get("auth", "on") != "off":
+        if report_progress:
+            print("Attempting login: {user} /w pw REDACTED ..."
+                  .format_map(server))
+        s.login(server['user'], server['password'])
+    return s
+
+
+def close(s):
+    """
+    Closes SMTP session <s> (even if it's already been dropped.)
+    """
+    try:
+        s.quit()
+    except (smtplib.SMTPException, OSError):
+        s.close()
+
+
+def build_message(email, sender):
+    """
+    Returns the MIMEMultipart version of <email> (a dict: see
+    send) from <sender>.  <email> itself is left as it was.
+    """
+    msg = MIMEMultipart()
+    msg["Sender"] = sender
+    for key in email:
+        if key not in ('body', 'attachments', 'Sender'):
+            msg[key] = into_string(email[key])
+    msg.attach(MIMEText(email['body'], 'plain'))
+#   attach_many(attachments, msg)  ## Fails, 2b trouble sh.
+    for attachment in email['attachments']:
+        attach(attachment, msg)
+    return msg
+
+
+def render(email, sender):
+    """
+    Returns (from, recipients, data): the envelope and the bytes
+    of <email> (see build_message) as smtplib's send_message
+    would send them (Bcc left out of the headers.)
+    """
+    msg = build_message(email, sender)
+    from_addr = getaddresses([msg['Sender'] or msg['From']])[0][1]
+    recipients = [address for name, address in getaddresses(
+                    msg.get_all('To', []) + msg.get_all('Cc', [])
+                    + msg.get_all('Bcc', []))
+                  if address]
+    del msg['Bcc']
+    data = io.BytesIO()
+    BytesGenerator(data, policy=msg.policy.clone(linesep='\r\n')
+                   ).flatten(msg)
+    return from_addr, recipients, data.getvalue()
+
+
+def spooled(spool_dir, entry):
+    """
+    Returns (from, recipients, data) (as does render) of the
+    message of <entry>, one of the index of <spool_dir> (see
+    spool.py.)
+    """
+    with open(os.path.join(spool_dir, entry['file']), 'rb') as stream:
+        return entry['from'], entry['recipients'], stream.read()
+
+
+def check_spooled(entries, sender):
+    """
+    Raises ValueError unless all <entries> (see spool.py) were
+    rendered as sent by <sender> (whose address is in their
+    headers: an MTA sending them must be sending as that sender.)
+    """
+    address = getaddresses([sender])[0][1]
+    others = sorted({entry['from'] for entry in entries} - {address})
+    if others:
+        raise ValueError("Spooled emails are from {} but the MTA sends"
+                         " as {}: prepare the mailing again (with the"
+                         " same --mta.)".format(', '.join(others),
+                                                address))
+
+
+def send(emails, mta, report_progress=True, include_wait=True,
+                confirm=True, journal=None, spool_dir=None):
     """
     Sends emails using Python modules.
     <emails> is a list of dicts each representing an email to
@@ -225,69 +391,159 @@ def send(emails, mta, report_progress=True,
     ...Values are either strings or lists of strings;
     in the latter case the values are converted into a single
     comma separated string.
+    The emails are shared among the <mta>'s "connections" (each
+    a thread with its own SMTP session: reopened if dropped.)
+    If <include_wait> the <mta>'s "rate" (see TokenBucket) is
+    respected.  Unless <confirm> is False, the user is asked to
+    continue once the first login succeeds.
+    If a <journal> (see journal.Journal) is provided, emails it
+    shows as already sent are skipped, what becomes of each email
+    is recorded in it and emails the MTA refuses are tried again
+    (once the journal says they're due.)
+    If <spool_dir> is given, <emails> are the entries of its
+    index (see spool.py) and the messages (already rendered) are
+    sent as they are.
+    Returns a dict: 'sent' (number of), 'failed' (list of
+    (number, 'To', error) of those not sent), 'seconds' taken.
     """
     n_emails = len(emails)
-    counter = 0
+    if journal is None:
+        items = [(n, None, email) for n, email in enumerate(emails, 1)]
+    else:
+        items = journal.pending(emails)
+        if report_progress and len(items) < n_emails:
+            print("Skipping {} email(s) already dealt with (see {})."
+                  .format(n_emails - len(items), journal.journal_file))
+    result = dict(sent=0, failed=[], seconds=0)
+    if not items:
+        return result
     print("Using {} as MTA...".format(mta))
     server = config.config[mta]
     sender = server["from"]
-    if report_progress:
-        print("Initiating SMTP: {host} {port}".format(**server))
-    s = smtplib.SMTP(host=server['host'], port=server['port'])
-    s.starttls()
-    s.ehlo
-
-    # Comment out one of the following two:
-#   testing = True     # Very INSECURE: use only for testing.
-    testing = False    # This should be the default.
-    if report_progress:
-        if mta.endswith('g') and testing:
-            message = (
-                "Attempting login: {user} /w pw '{password}' ...")
-        else:
-            message = (
-                "Attempting login: {user} /w pw REDACTED ...")
-        print(message.format(**server))
-    s.login(server['user'], server['password'])
-    response = input("... successful.  Continue? ")
-    if not response or not response[0] in 'yY':
-        sys.exit()
-
-    try:
-        for email in emails:
-            email["Sender"] = sender
-            msg = MIMEMultipart()
-            body = email['body']
-            attachments = email['attachments']
-            del email['body']
-            del email['attachments']
+    if spool_dir is not None:
+        check_spooled(emails, sender)
+    sessions = [connect(server, report_progress)]
+    if confirm:
+        response = input("... successful.  Continue? ")
+        if not response or not response[0] in 'yY':
+            close(sessions[0])
+            sys.exit()
+    bucket = None
+    if include_wait:
+        bucket = TokenBucket(server.get("rate", RATE),
+                             server.get("burst", BURST))
+    lock = threading.Lock()
+    failed = {}  # n => ('To', error)
+    errors = []  # Anything other than a failure to send an email.
+
+    def report(n, key, email, error=None):
+        if journal is not None:
+            if error is None:
+                journal.record(key, 'sent')
+            else:
+                journal.record(key, 'failed', to=email.get('To'),
+                               error=repr(error),
+                               retry=isinstance(error,
+                                                smtplib.SMTPDataError))
+        with lock:
+            if error is None:
+                result['sent'] += 1
+                failed.pop(n, None)
+            else:
+                failed[n] = (email.get('To'), repr(error))
             if report_progress:
-                counter += 1
-                print("Sending email {} of {} ..."
-                    .format(counter, n_emails))
-                for key in email:
-                    print("\t{}: {}".format(key, email[key]))
-                    msg[key] = into_string(email[key])
-            msg.attach(MIMEText(body, 'plain'))
-#           attach_many(attachments, msg)  ## Fails, 2b trouble sh.
-            for attachment in attachments:
-                attach(attachment, msg)
-
-            try:
-                s.send_message(msg)
-            except SMTPDataError:
-                print("FAILURE sending email #{} to {}"
-                      .format(n, email['To']))
-                continue
-            if include_wait:
-                pause()
-    except:
-        s.quit()
-        if report_progress:
-            print("Pymail.send.send() failed sending to {}."
-                .format(email['To']))
-        raise
-    s.quit()
+                if error is None:
+                    print("Sent email {} of {} ...".format(n, n_emails))
+                    for key in email:
+                        if key not in ('body', 'attachments'):
+                            print("\t{}: {}".format(key, email[key]))
+                else:
+                    print("FAILURE sending email #{} to {}"
+                          .format(n, email.get('To')))
+
+    def work(i, todo):
+        s = sessions[i]
+        sessions[i] = None
+        email = {}
+        try:
+            while not errors:
+                try:
+                    n, key, email = todo.get_nowait()
+                except queue.Empty:
+                    break
+                if spool_dir is None:
+                    message = render(email, sender)
+                else:
+                    message = spooled(spool_dir, email)
+                if bucket:
+                    bucket.take()
+                for attempt in range(RECONNECTS + 1):
+                    try:
+                        if s is None:
+                            s = connect(server)
+                        s.sendmail(*message)
+                    except (smtplib.SMTPServerDisconnected,
+                            ConnectionError) as error:
+                        if s is not None:
+                            s.close()
+                        s = None
+                        if attempt == RECONNECTS:
+                            report(n, key, email, error)
+                    except (smtplib.SMTPDataError,
+                            smtplib.SMTPRecipientsRefused,
+                            smtplib.SMTPSenderRefused) as error:
+                        report(n, key, email, error)
+                        break
+                    else:
+                        report(n, key, email)
+                        break
+        except BaseException as error:
+            errors.append(error)
+            if report_progress:
+                print("Pymail.send.send() failed sending to {}."
+                    .format(email.get('To')))
+        finally:
+            if s is not None:
+                close(s)
+
+    start = time.perf_counter()
+    while items:
+        n_connections = max(1, min(int(server.get("connections",
+                                       CONNECTIONS)), len(items)))
+        sessions.extend([None] * (n_connections - len(sessions)))
+        todo = queue.Queue()
+        for item in items:
+            todo.put(item)
+        threads = [threading.Thread(target=work, args=(i, todo))
+                   for i in range(n_connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        if journal is None:
+            break
+        items = journal.retries(emails)
+        if items:
+            due = min(journal.due(key) for n, key, email in items)
+            wait = due - time.time()
+            if wait > 0:
+                if report_progress:
+                    print("Trying refused email(s) again in {:.0f}"
+                          " seconds...".format(wait))
+                time.sleep(wait)
+            items = [item for item in items
+                     if journal.due(item[1]) <= due]
+    result['seconds'] = time.perf_counter() - start
+    result['failed'] = [(n, ) + failed[n] for n in sorted(failed)]
+    if report_progress:
+        print("Sent {} of {} emails in {:.1f} seconds ({:.2f}/sec)"
+              " using {} connection(s)."
+              .format(result['sent'], n_emails, result['seconds'],
+                      result['sent'] / (result['seconds'] or 1),
+                      n_connections))
+    return result
 
 
 def main(emails):
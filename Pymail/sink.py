@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+# File: Pymail/sink.py
+
+"""
+A stand in for an MTA: a local SMTP server that accepts (and
+keeps) whatever it's sent.  Lets send.send be tested (and its
+throughput measured) without sending anything anywhere.
+
+Usage:  (when used from the command line)
+  ./sink.py [PORT]
+
+Typical usage:  (when imported as a module)
+    with sink.Sink() as server:
+        config.config['sink'] = server.config()
+        send.send(emails, 'sink', confirm=False)
+        server.messages  # what was received
+"""
+
+import sys
+import time
+import threading
+import socketserver
+
+try:
+    import config
+except ModuleNotFoundError:
+    try:
+        import Pymail.config as config
+    except ModuleNotFoundError:
+        from code import config
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """
+    Just enough SMTP for smtplib: EHLO/HELO, AUTH (anything goes),
+    MAIL, RCPT, DATA, RSET, NOOP & QUIT (no TLS.)
+    """
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        sink = self.server.sink
+        n_messages = 0
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b'EHLO':
+                self.reply("250-sink")
+                self.reply("250-AUTH PLAIN")
+                self.reply("250 8BITMIME")
+            elif command == b'AUTH':
+                self.reply("235 Authentication successful")
+            elif command in (b'HELO', b'MAIL', b'RCPT',
+                             b'RSET', b'NOOP'):
+                self.reply("250 OK")
+            elif command == b'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for line in self.rfile:
+                    if line == b'.\r\n':
+                        break
+                    if line.startswith(b'.'):
+                        line = line[1:]  # (See RFC 5321: 4.5.2.)
+                    data.append(line)
+                if sink.delay:
+                    time.sleep(sink.delay)
+                with sink.lock:
+                    refused = sink.refusals > 0
+                    if refused:
+                        sink.refusals -= 1
+                    else:
+                        sink.messages.append(b''.join(data))
+                if refused:
+                    self.reply("451 Try again later")
+                    continue
+                n_messages += 1
+                if sink.drop_after and n_messages >= sink.drop_after:
+                    return  # Without a reply: as if the line dropped.
+                self.reply("250 OK")
+            elif command == b'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Sink(object):
+    """
+    Runs (in a thread) a local SMTP server on <port> (0: any free
+    port.)  Each message received (as bytes) is appended to
+    self.messages.  <delay>: seconds taken to accept each one.
+    <drop_after>: sessions are dropped after that many messages.
+    <refusals>: the first that many messages are refused (as an
+    MTA might when it's busy.)
+    """
+
+    def __init__(self, port=0, delay=0, drop_after=None, refusals=0):
+        self.delay = delay
+        self.drop_after = drop_after
+        self.refusals = refusals
+        self.messages = []
+        self.lock = threading.Lock()
+        self.server = Server(('localhost', port), Handler)
+        self.server.sink = self
+        self.host, self.port = self.server.server_address[:2]
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def config(self, **settings):
+        """
+        Returns a config.config entry for this server; <settings>
+        (e.g. connections, rate, burst) are added to it.
+        """
+        server = config.Server({
+            "host": self.host,
+            "port": self.port,
+            "tls_starttls": "off",
+            "auth": "off",
+            "user": "sink",
+            "from": "sink@localhost",
+            })
+        server.update(settings)
+        return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 2525
+    sink = Sink(port)
+    print("SMTP sink listening on {}:{} (^C to stop)"
+          .format(sink.host, sink.port))
+    try:
+        sink.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n{} messages received.".format(len(sink.messages)))
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+# File: Pymail/spool.py
+
+"""
+A spool (a maildir style directory) of emails rendered (by
+send.render) ahead of time, ready to be sent exactly as they
+are: the work of building each message (and encoding its
+attachments) is done when the mailing is prepared rather than
+while sending (when the MTA's rate limit applies.)
+
+Layout of <spool_dir>:
+    tmp/    messages being written
+    new/    messages (RFC 5322 bytes, CRLF line endings) ready
+    index.json  one entry (dict) for each message, in order:
+        'file': the message's path relative to <spool_dir>
+        'from': envelope sender
+        'recipients': envelope recipients (To, Cc & Bcc)
+        'To', 'Subject': as in the email (for progress reports)
+
+Typical usage:
+    spool.write(club.json_data, club.spool_dir, sender, jobs=4)
+    send.send(spool.entries(spool_dir), mta, spool_dir=spool_dir)
+    (send.spooled reads each message; send.check_spooled makes
+    sure the MTA sends as the sender the messages were rendered
+    for.)
+"""
+
+import os
+import json
+import shutil
+import concurrent.futures
+
+try:
+    import send
+    import journal
+except ModuleNotFoundError:
+    try:
+        import Pymail.send as send
+        import Pymail.journal as journal
+    except ModuleNotFoundError:
+        from code import send
+        from code import journal
+
+INDEX = 'index.json'
+
+
+def file_name(n, key):
+    """
+    Returns the (unique) name of the <n>th email, <key> being
+    its journal key (see journal.keys.)
+    """
+    return "{:06d}.{}.eml".format(n, key[:16])
+
+
+def render_range(spool_dir, sender, start, emails):
+    """
+    Renders <emails> (numbered from <start> + 1) into <spool_dir>
+    returning their index entries.  (Run in its own process if
+    write is given more than one job.)
+    """
+    entries = []
+    for n, (key, email) in enumerate(zip(journal.keys(emails), emails),
+                                     start + 1):
+        from_addr, recipients, data = send.render(email, sender)
+        name = file_name(n, key)
+        tmp_name = os.path.join(spool_dir, 'tmp', name)
+        with open(tmp_name, 'wb') as stream:
+            stream.write(data)
+        os.rename(tmp_name, os.path.join(spool_dir, 'new', name))
+        entries.append({'file': os.path.join('new', name),
+                        'from': from_addr, 'recipients': recipients,
+                        'To': email.get('To'),
+                        'Subject': email.get('Subject')})
+    return entries
+
+
+def write(emails, spool_dir, sender, jobs=1):
+    """
+    Renders <emails> (dicts: see send.send) as sent by <sender>
+    into (a new) <spool_dir>.  If <jobs> > 1 the emails are split
+    into that many consecutive ranges each rendered in its own
+    process.  Returns the index (list of entries.)
+    """
+    if os.path.exists(spool_dir):
+        shutil.rmtree(spool_dir)
+    for sub_dir in ('tmp', 'new'):
+        os.makedirs(os.path.join(spool_dir, sub_dir))
+    jobs = max(1, min(jobs, len(emails)))
+    if jobs == 1:
+        index = render_range(spool_dir, sender, 0, emails)
+    else:
+        bounds = [len(emails) * n // jobs for n in range(jobs + 1)]
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            futures = [executor.submit(render_range, spool_dir, sender,
+                                       start, emails[start:stop])
+                       for start, stop in zip(bounds, bounds[1:])]
+            index = []
+            for future in futures:
+                index.extend(future.result())
+    tmp_index = os.path.join(spool_dir, 'tmp', INDEX)
+    with open(tmp_index, 'w') as stream:
+        json.dump(index, stream, indent=1)
+    os.replace(tmp_index, os.path.join(spool_dir, INDEX))
+    return index
+
+
+def entries(spool_dir):
+    """
+    Returns the index (list of entries) of <spool_dir>.
+    """
+    with open(os.path.join(spool_dir, INDEX), 'r') as stream:
+        return json.load(stream)
+
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# File: Tests/bashmail_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import time
+import pytest
+import Bashmail.send as send
+import Pymail.journal as journal
+
+stub_mutt = """#!/bin/sh
+# Stands in for mutt: keeps each message as sent.<recipient>
+dir=$(dirname "$0")
+for recipient; do :; done
+case "$recipient" in
+    *bad*) echo "invalid recipient"; exit 1;;
+    *busy*) if [ ! -e "$dir/tried" ]; then
+                touch "$dir/tried"; echo "try later"; exit 75
+            fi;;
+esac
+sleep 0.2
+cat > "$dir/sent.$recipient"
+"""
+
+
+def emails(*recipients):
+    return [{'From': 'club@localhost', 'To': recipient,
+             'Subject': 'Dues', 'body': 'Dear {},\n'.format(recipient),
+             'attachments': []}
+            for recipient in recipients]
+
+
+@pytest.fixture
+def bin_dir(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    mutt = bin_dir / 'mutt'
+    mutt.write_text(stub_mutt)
+    mutt.chmod(0o755)
+    monkeypatch.setenv('PATH', '{}{}{}'.format(
+                       bin_dir, os.pathsep, os.environ['PATH']))
+    return bin_dir
+
+
+def test_commands():
+    email = emails('a@x.com, b@x.com')[0]
+    cmd_args, message = send.smtp_command(email, 'easy')
+    assert cmd_args == ['msmtp', '-a', 'easy', '-t', '--',
+                        'a@x.com', 'b@x.com']
+    assert message == ('From: club@localhost\nSubject: Dues\n\n'
+                       'Dear a@x.com, b@x.com,\n')
+    cmd_args, body = send.command(email, 'easy')  # Always mutt.
+    assert cmd_args[0] == 'mutt'
+    assert cmd_args[-4:] == ['-s', 'Dues', 'a@x.com', 'b@x.com']
+    assert body == 'Dear a@x.com, b@x.com,\n'
+    email['attachments'] = ['bylaws.pdf']
+    email['To'] = ['a@x.com']
+    cmd_args, body = send.command(email, 'easy')
+    assert cmd_args[0] == 'mutt'
+    assert cmd_args[-4:] == ['-a', 'bylaws.pdf', '--', 'a@x.com']
+    email['Bcc'] = 'b@x.com, c@x.com'
+    cmd_args, body = send.command(email, 'easy')
+    assert cmd_args[-8:] == ['-b', 'b@x.com', '-b', 'c@x.com',
+                             '-a', 'bylaws.pdf', '--', 'a@x.com']
+
+
+def test_concurrent(bin_dir, capsys):
+    to_send = emails(*['m{}@x.com'.format(n) for n in range(6)])
+    start = time.perf_counter()
+    result = send.send(to_send, 'easy', include_wait=False, jobs=3,
+                       confirm=False)
+    assert time.perf_counter() - start < 6 * 0.2
+    assert result['sent'] == 6
+    assert (bin_dir / 'sent.m5@x.com').read_text() == (
+        'Dear m5@x.com,\n')
+    assert capsys.readouterr().out.strip().endswith(
+        'Sent 6 of 6 (0 failed, 0 skipped)')
+
+
+def test_failures_and_journal(bin_dir, tmp_path, capsys):
+    to_send = emails('a@x.com', 'bad@x.com', 'busy@x.com', 'b@x.com')
+    journal_file = str(tmp_path / 'journal')
+    sent = journal.Journal(journal_file, backoff=0.01)
+    result = send.send(to_send, 'easy', include_wait=False, jobs=2,
+                       journal=sent, confirm=False)
+    sent.close()
+    assert result['sent'] == 3  # busy@x.com on its second try.
+    assert [(n, to) for n, to, error in result['failed']] == [
+        (2, 'bad@x.com')]
+    assert 'invalid recipient' in result['failed'][0][2]
+    assert "FAILURE sending email #2 to bad@x.com" in (
+        capsys.readouterr().out)
+    for name in ('sent.a@x.com', 'sent.b@x.com'):
+        (bin_dir / name).unlink()
+    sent = journal.Journal(journal_file, backoff=0.01)
+    result = send.send(to_send, 'easy', include_wait=False, jobs=2,
+                       journal=sent, confirm=False)
+    sent.close()
+    assert result['sent'] == 0
+    assert not (bin_dir / 'sent.a@x.com').exists()  # Not sent again.
+    assert "(1 failed, 3 skipped)" in capsys.readouterr().out
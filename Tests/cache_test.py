@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# File: Tests/cache_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import csv
+import pytest
+import cache
+
+csv_text = """first,last,phone,email
+Al,Bo,111,al@x.com
+Cy,Do,222
+
+Ed,Fa,333,ed@x.com,extra
+"""
+
+
+def dict_reader_records(path):
+    with open(path, 'r', newline='') as stream:
+        return list(csv.DictReader(stream))
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'memlist.csv'
+    path.write_text(csv_text)
+    cache.forget()
+    yield str(path)
+    cache.forget()
+
+
+def test_records_same_as_dict_reader(csv_file):
+    assert list(cache.records(csv_file)) == dict_reader_records(
+                                                            csv_file)
+
+
+def test_cache_file_written_and_reused(csv_file):
+    first = cache.get_table(csv_file)
+    c_file = cache.cache_file(csv_file, 'csv')
+    assert os.path.isfile(c_file)
+    cache.forget()
+    def no_parse(text):
+        raise AssertionError("Should have come from the cache.")
+    assert cache.load(csv_file, no_parse, 'csv') == first
+
+
+def test_cache_kept_private(csv_file, cache_dir):
+    cache.get_table(csv_file)
+    c_file = cache.cache_file(csv_file, 'csv')
+    assert os.path.dirname(c_file) == cache_dir
+    assert not os.listdir(os.path.dirname(csv_file))[1:]  # Only csv.
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+    assert os.stat(c_file).st_mode & 0o777 == 0o600
+    os.chmod(cache_dir, 0o777)  # Anyone could have put it there:
+    cache.forget()
+    def parse(text):
+        return 'parsed'
+    assert cache.load(csv_file, parse, 'csv') == 'parsed'  # so unused.
+
+
+def test_change_invalidates(csv_file):
+    cache.get_table(csv_file)
+    with open(csv_file, 'a') as stream:
+        stream.write("Gi,Ho,444,gi@x.com\n")
+    records = list(cache.records(csv_file))
+    assert records[-1]['first'] == 'Gi'
+    assert records == dict_reader_records(csv_file)
+
+
+def test_touch_without_change(csv_file):
+    table = cache.get_table(csv_file)
+    stat = os.stat(csv_file)
+    os.utime(csv_file, ns=(stat.st_atime_ns,
+                           stat.st_mtime_ns + 10**9))
+    cache.forget()
+    def no_parse(text):
+        raise AssertionError("Content hash should have matched.")
+    assert cache.load(csv_file, no_parse, 'csv') == table
+
+
+def test_records_are_independent(csv_file):
+    record = next(cache.records(csv_file))
+    record['first'] = 'Changed'
+    assert next(cache.records(csv_file))['first'] == 'Al'
+
+
+def test_projected_records(csv_file):
+    table = cache.get_table(csv_file)
+    assert list(cache.projected_records(table, ('email', 'first',
+                                                'no_such'))) == [
+        {'email': 'al@x.com', 'first': 'Al'},
+        {'email': None, 'first': 'Cy'},
+        {'email': 'ed@x.com', 'first': 'Ed'},
+        ]
+    assert list(cache.projected_records(table, ('last', ),
+                                        start=1)) == [
+        {'last': 'Do'}, {'last': 'Fa'}]
+
+
+if __name__ == '__main__':
+    pass
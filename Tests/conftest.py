@@ -0,0 +1,22 @@
+# File: Tests/conftest.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(os.path.dirname(
+                                    os.path.abspath(__file__)))[0])
+
+import pytest
+import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """
+    Parse caches go to a directory of the test session's own
+    rather than the user's.
+    """
+    path = tmp_path_factory.mktemp('cache')
+    monkeypatch.setattr(cache, 'CACHE_DIR', str(path / 'club_utilities'))
+    return cache.CACHE_DIR
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# File: Tests/content_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import types
+import pytest
+import member
+import content
+
+record = dict(first='Jane', last='Doe', address='1 An Ave.',
+              town='Any Town', state='CA', postal_code='94924',
+              country='USA', email='jane@x.com', dues='100',
+              extra='You owe $100.')
+
+
+@pytest.mark.parametrize('template', [
+    "Dear {first} {last},\n{extra}",
+    "{last:>10}|{dues!r}|{first[0]}.|{{literal}}",
+    "{first:{dues}}|",
+    "No fields at all.",
+    "",
+    ])
+def test_render_same_as_format(template):
+    renderer = content.Renderer(template)
+    assert renderer.render(record) == template.format(**record)
+    assert renderer.render_many([record, record]) == (
+        [template.format(**record)] * 2)
+
+
+def test_fields_and_check():
+    renderer = content.Renderer("{first} {last:>5} {first[0]} {x:{y}}")
+    assert renderer.fields == ['first', 'last', 'x', 'y']
+    assert renderer.missing(record) == ['x', 'y']
+    with pytest.raises(KeyError, match='x, y'):
+        renderer.check(record.keys())
+    with pytest.raises(KeyError, match='x, y'):
+        renderer.render(record)
+
+
+def test_prepared_templates():
+    which = content.content_types['for_testing']
+    email = content.prepare_email_template(which)
+    assert email is content.prepare_email_template(which)  # Once.
+    assert email.render(record).startswith('Dear Jane Doe,\n')
+    letter = content.prepare_letter_template(
+        which, content.printers['X6505_e9'])
+    assert '1 An Ave.' in letter.render(record)
+
+
+def test_check_templates(tmp_path):
+    infile = tmp_path / 'memlist.csv'
+    infile.write_text("first,last,email\nJane,Doe,jane@x.com\n")
+    club = types.SimpleNamespace(
+        infile=str(infile), which={'funcs': [member.testing_func]},
+        email=content.Renderer("Dear {first},\n{extra}"),
+        letter=content.Renderer("{first} {last}\n{address}"))
+    with pytest.raises(KeyError, match='letter template.*address'):
+        member.check_templates(club)
+    club.letter = None  # (Emails only.)
+    member.check_templates(club)
+    club.which['funcs'] = [member.std_mailing_func]  # No 'extra'.
+    with pytest.raises(KeyError, match='email template.*extra'):
+        member.check_templates(club)
+
+
+@pytest.mark.parametrize('which', sorted(content.content_types))
+def test_content_types_check(tmp_path, which):
+    infile = tmp_path / 'memlist.csv'
+    infile.write_text("first,last,phone,address,town,state,postal_code,"
+                      "country,email,dues,dock,kayak,mooring,status\n")
+    letter = content.content_types[which]
+    club = types.SimpleNamespace(
+        infile=str(infile), which=letter,
+        email=content.prepare_email_template(letter),
+        letter=content.prepare_letter_template(
+            letter, content.printers['X6505_e9']))
+    member.check_templates(club)
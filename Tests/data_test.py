@@ -17,7 +17,11 @@ sys.path.insert(0, os.path.split(sys.path[0])[0])
 # ... or alternatively set PYTHONPATH to project directory:
 # export PYTHONPATH=/home/alex/Git/Club/Utils
 
+import csv
+import types
+import cache
 import data
+import member
 import rbc
 import sys_globals as glbs
 import pytest
@@ -115,3 +119,210 @@ def test_applicant_data_line2record(line, expected):
     assert data.applicant_data_line2record(line) == expected
 
 
+
+
+def test_parse_applicants():
+    text = ("# Applicants\n"
+            "Al Bo | 200101 | 200102 |\n"
+            "Cy Do |\n"                                # no dates
+            "Ed\n"                                     # no fields
+            "Gi Ho | 1 | 2 | 3 | 4 | 5 | 6 | 7 | 8\n"  # too many
+            "Ik Jo | 200101 | w\n"
+            "Al Bo | 200101 | 200102 | 200103\n")      # again
+    parsed = data.parse_applicants(text)
+    assert [error.line_no for error in parsed['errors']] == [3, 4, 5]
+    assert [rec['status'] for rec in parsed['records']] == [
+        'a0', 'aw', 'a1']
+    assert parsed['by_name']['Bo,Al']['1st'] == '200103'
+    assert parsed['by_status'] == {'a1': ['Bo,Al'], 'aw': ['Jo,Ik']}
+    with pytest.raises(data.ParseError):
+        data.applicant_data_line2record("Cy Do | Application expired")
+
+
+def test_parse_sponsors():
+    parsed = data.parse_sponsors("Al Bo: Cy Do, Ed Fa\n"
+                                 "Gi Ho Cy Do, Ed Fa\n"       # no ':'
+                                 "Ik Jo: Cy Do, Ed\n")        # 'Ed'?
+    assert parsed['tuples'] == {'Bo,Al': ('Cy Do', 'Ed Fa')}
+    assert parsed['by_applicant'] == {'Bo,Al': ['Do,Cy', 'Fa,Ed']}
+    assert [(error.line_no, error.line) for error in parsed['errors']
+            ] == [(2, "Gi Ho Cy Do, Ed Fa"), (3, "Ik Jo: Cy Do, Ed")]
+
+
+def test_sponsor_line_extra_colon():
+    line = "Al Bo: Cy Do, Ed Fa: met at the picnic"
+    assert data.parse_sponsor_data_line(line) == (
+        'Bo,Al', ('Cy Do', 'Ed Fa'))
+    parsed = data.parse_sponsors(line + '\n')
+    assert parsed['tuples'] == {'Bo,Al': ('Cy Do', 'Ed Fa')}
+    assert parsed['errors'] == []
+
+
+ck_data_spots = {
+    'memlist.csv': (
+        "first,last,email,dues,dock,kayak,mooring,status\n"
+        "Al,Bo,al@x.com,100,75,,,a1\n"
+        "Cy,Do,cy@x.com,100,,,,\n"
+        "Ed,Fa,ed@x.com,0,,,,i\n"
+        ),
+    'contacts.csv': (
+        "Given Name,Additional Name,Family Name,Name Suffix,"
+        "E-mail 1 - Value,Group Membership\n"
+        "Al,,Bo,,al@x.com,applicant ::: DockUsers ::: * myContacts\n"
+        "Cy,,Do,,cy@x.com,LIST ::: * myContacts\n"
+        "Ed,,Fa,,ed@x.com,inactive ::: LIST\n"
+        ),
+    'applicants.txt': "Al Bo | 200101 | 200102 | 200103\n",
+    'sponsors.txt': "Al Bo: Cy Do, Ed Fa\n",
+    'dock.txt': "Al Bo: 75\n",
+    'kayak.txt': "",
+    'mooring.txt': "",
+    }
+
+
+def ck_data_club(data_dir):
+    def spot(name):
+        return os.path.join(data_dir, name)
+    return types.SimpleNamespace(
+        MEMBERSHIP_SPoT=spot('memlist.csv'),
+        infile=spot('memlist.csv'),
+        contacts_spot=spot('contacts.csv'),
+        applicant_spot=spot('applicants.txt'),
+        sponsors_spot=spot('sponsors.txt'),
+        extra_fees_spots=[spot(name) for name in
+                          ('dock.txt', 'kayak.txt', 'mooring.txt')],
+        APPLICANT_GROUP=rbc.Club.APPLICANT_GROUP,
+        MEMBER_GROUP=rbc.Club.MEMBER_GROUP,
+        INACTIVE_GROUP=rbc.Club.INACTIVE_GROUP,
+        quiet=True, fee_details=False, all_applicants=False,
+        format=member.fstrings['last_first'])
+
+
+def test_incremental_ck_data(tmp_path, monkeypatch):
+    for name, text in ck_data_spots.items():
+        (tmp_path / name).write_text(text)
+    club = ck_data_club(tmp_path)
+    first = data.ck_data(club)
+    assert "No fees by name problem." in '\n'.join(first)
+    diffs = club.diffs
+    assert [diff['check'] for diff in diffs] == [
+        'fee_paying_labels', 'fees_by_category', 'fees_by_name',
+        'gmail_applicants', 'gmail_members', 'gmail_inactive',
+        'applicants']
+    gathered = []
+    for source in data.ck_data_sources(ck_data_club(tmp_path)):
+        gather = source['gather']
+        def counted(club, gather=gather):
+            gathered.append(gather.__name__)
+            gather(club)
+        monkeypatch.setattr(data, gather.__name__, counted)
+    club = ck_data_club(tmp_path)
+    assert data.ck_data(club) == first
+    assert club.diffs == diffs
+    assert gathered == []
+    (tmp_path / 'dock.txt').write_text("Al Bo: 70\n")
+    changed = data.ck_data(ck_data_club(tmp_path))
+    assert gathered == ['gather_extra_fees_data']
+    assert changed != first
+    cache.forget()
+    os.remove(cache.cache_file(str(tmp_path / 'memlist.csv'), 'ck_data'))
+    assert data.ck_data(ck_data_club(tmp_path)) == changed
+
+
+def test_fee_index(tmp_path, monkeypatch):
+    parsed = []
+    def counted(text, parse_fees=data.parse_fees):
+        parsed.append(text)
+        return parse_fees(text)
+    monkeypatch.setattr(data, 'parse_fees', counted)
+    (tmp_path / 'dock.txt').write_text("# Dock\nAl Bo: 75\nCy Do: 75\n")
+    (tmp_path / 'kayak.txt').write_text("Al Bo: 70\n")
+    club = types.SimpleNamespace(extra_fees_spots=[
+        str(tmp_path / 'dock.txt'), str(tmp_path / 'kayak.txt')])
+    index = data.fee_index(club)
+    assert index == dict(
+        by_name={'Bo,Al': {'dock': 75, 'kayak': 70},
+                 'Do,Cy': {'dock': 75}},
+        by_category={'dock': {'Bo,Al': 75, 'Do,Cy': 75},
+                     'kayak': {'Bo,Al': 70}},
+        totals={'dock': 150, 'kayak': 70})
+    data.populate_extra_fees(club)
+    data.gather_extra_fees_data(club)
+    assert club.by_name is club.fees_by_name is index['by_name']
+    assert len(parsed) == 2
+    (tmp_path / 'kayak.txt').write_text("Al Bo: 100\n")
+    assert data.fee_index(club)['totals'] == {'dock': 150, 'kayak': 100}
+    assert len(parsed) == 3
+
+
+def test_restore_fees(tmp_path):
+    (tmp_path / 'memlist.csv').write_text(
+        "first,last,email,dues,dock,kayak,mooring,status\n"
+        "Al,Bo,al@x.com,,,,,\n"
+        "Cy,Do,cy@x.com,-100,,5,,\n"
+        "Ed,Fa,ed@x.com,,,,,h\n"
+        "Gi,Ho\n")
+    (tmp_path / 'dock.txt').write_text("Al Bo: 75\nEd Fa: 75\n")
+    (tmp_path / 'kayak.txt').write_text("Cy Do: 70\nIk Jo: 70\n")
+    club = types.SimpleNamespace(
+        infile=str(tmp_path / 'memlist.csv'),
+        outfile=str(tmp_path / 'new_memlist.csv'),
+        extra_fees_spots=[str(tmp_path / 'dock.txt'),
+                          str(tmp_path / 'kayak.txt')],
+        YEARLY_DUES=100)
+    data.restore_fees(club)
+    assert (tmp_path / 'new_memlist.csv').read_text() == (
+        "first,last,email,dues,dock,kayak,mooring,status\n"
+        "Al,Bo,al@x.com,100,75,,,\n"
+        "Cy,Do,cy@x.com,0,,75,,\n"
+        "Ed,Fa,ed@x.com,,,,,h\n"
+        "Gi,Ho,,100,,,,\n")
+    assert club.errors == [
+        "Non zero balances...",
+        "Do, Cy: {'dues': -100, 'kayak': 5}",
+        "Non members listed as paying extra fees!",
+        "\tJo,Ik: non member listed as paying fee(s).",
+        ]
+    assert not [name for name in os.listdir(tmp_path)
+                if name.endswith('.tmp')]
+
+
+def test_load_sources():
+    def first(club):
+        club.one = 1
+    def second(club):
+        club.two = club.one + 1
+    club = types.SimpleNamespace(quiet=True)
+    loaded = data.load_sources(club, [
+        dict(name='second', gather=second, attrs=['two'],
+             needs=('first', )),
+        dict(name='first', gather=first, attrs=['one']),
+        ])
+    assert loaded == dict(first=dict(one=1), second=dict(two=2))
+    assert (club.one, club.two) == (1, 2)
+    assert set(club.load_timings) == {'first', 'second'}
+
+
+def test_gather_contacts_data(tmp_path):
+    contacts = tmp_path / 'contacts.csv'
+    contacts.write_text(ck_data_spots['contacts.csv']
+                        + ",,Ng,,,\n"                   # no labels
+                        + "Al,,Bo,,al@y.com,Kayak\n")   # a duplicate
+    expected = types.SimpleNamespace(gmail_by_name={},
+                                     groups_by_name={}, g_by_group={})
+    with open(contacts, newline='') as stream:
+        for g_rec in csv.DictReader(stream):
+            g_dict = data.get_gmail_record(g_rec)
+            name = g_dict['gname']
+            expected.gmail_by_name[name] = g_dict['g_email']
+            expected.groups_by_name[name] = g_dict['groups']
+            for label in g_dict['groups']:
+                expected.g_by_group.setdefault(label, set()).add(name)
+    club = types.SimpleNamespace(quiet=True, contacts_spot=contacts)
+    data.gather_contacts_data(club)
+    assert club.gmail_by_name == expected.gmail_by_name
+    assert club.groups_by_name == expected.groups_by_name
+    assert club.g_by_group == expected.g_by_group
+    assert club.label_bits_by_name['Bo,Al'] == 1 << (
+                                    club.contact_labels.index('Kayak'))
+    assert data.get_fee_paying_contacts(club) == {'Bo,Al': ['kayak']}
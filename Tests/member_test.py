@@ -7,6 +7,9 @@ import os
 import sys
 sys.path.insert(0, os.path.split(sys.path[0])[0])
 
+import csv
+import types
+import pickle
 import pytest
 import helpers
 import member
@@ -109,6 +112,179 @@ def test_fstrings_last_first_w_all_data(record, expected):
             'last_first_w_all_data'].format(**record) ==expected
 
 
+fused_records = [
+    {'first': 'Al', 'last': 'Bo', 'phone': '', 'address': '',
+     'town': '', 'state': '', 'postal_code': '', 'country': '',
+     'email': 'al@x.com', 'dues': '100', 'dock': '', 'kayak': '5',
+     'mooring': '', 'status': 'a1'},
+    {'first': 'Cy', 'last': 'Ab', 'phone': '', 'address': '',
+     'town': '', 'state': '', 'postal_code': '', 'country': '',
+     'email': '', 'dues': 'x', 'dock': '', 'kayak': '',
+     'mooring': '', 'status': 'm|be'},
+    ]
+fused_funcs = (member.add2email_by_m, member.get_usps,
+               member.add2fee_data, member.add2stati_by_m,
+               member.add2ms_by_status, member.increment_napplicants,
+               member.add2malformed, member.add2member_with_email_set,
+               member.add2applicant_with_email_set)
+
+
+def new_club():
+    club = types.SimpleNamespace(previous_name='',
+                format=member.fstrings['last_first_w_all_data'])
+    member.setup_required_attributes(fused_funcs, club)
+    return club
+
+
+def test_fuse_same_as_calling_each():
+    called = new_club()
+    for record in fused_records:
+        for func in fused_funcs:
+            func(record, called)
+    fused = new_club()
+    fuse = member.fuse(fused_funcs)
+    for record in fused_records:
+        fuse(record, fused)
+    assert vars(fused) == vars(called)
+    assert fused.napplicants == 1
+    assert fused.malformed == ["Ab, Cy, dues:x",
+                               "Record out of order: Ab, Cy"]
+
+
+def test_fuse_unknown_derivation():
+    def collector(record, club, derived=None):
+        pass
+    member.collectors[collector] = dict(attrs={}, reads=None,
+                                        derived=('no_such_key', ))
+    try:
+        with pytest.raises(ValueError):
+            member.fuse((collector, ))
+    finally:
+        del member.collectors[collector]
+
+
+def test_traverse_in_parallel(tmp_path, monkeypatch):
+    fieldnames = list(fused_records[0].keys())
+    # 3 shards: rows 0-2, 3-5 & 6-8; 'Aa' is out of order and
+    # begins the second shard.
+    names = ['Ab', 'Ac', 'Ad', 'Aa', 'Ba', 'Bb', 'Bc', 'Ca', 'Cb']
+    infile = tmp_path / 'memlist.csv'
+    with open(infile, 'w', newline='') as stream:
+        writer = csv.DictWriter(stream, fieldnames=fieldnames)
+        writer.writeheader()
+        for n, last in enumerate(names):
+            record = dict(fused_records[n % 2])
+            record['last'] = last
+            writer.writerow(record)
+    monkeypatch.setattr(member, 'MIN_ROWS_PER_JOB', 2)
+    n_parallel = []
+    traverse_in_parallel = member.traverse_in_parallel
+    def counted(*args):
+        n_parallel.append(args[-1])
+        traverse_in_parallel(*args)
+    monkeypatch.setattr(member, 'traverse_in_parallel', counted)
+    results = []
+    for jobs in (1, 3):
+        club = new_club()
+        club.quiet = True
+        club.jobs = jobs
+        member.traverse_records(str(infile), fused_funcs, club)
+        del club.jobs
+        results.append(vars(club))
+    assert n_parallel == [3]
+    assert results[1] == results[0]
+    assert results[1]['malformed'].count(
+                        "Record out of order: Aa, Cy") == 1
+
+
+@pytest.mark.parametrize("status", [
+    '', 'm', 'a1', 'a2|be', 'z3_sec', 'h', 'i|m', 'ai', 'ad|w',
+    'r', 'xyz', 'xyz|a0',
+    ])
+def test_status_predicates(status):
+    record = {'status': status}
+    stati = member.get_status_set(record)
+    assert member.is_applicant(record) == bool(
+                                stati & member.APPLICANT_SET)
+    assert member.is_member(record) == (
+                    not stati & member.NON_MEMBER_SET)
+    assert bool(member.is_non_fee_paying(record)) == bool(
+                    stati & member.NON_FEE_PAYING_STATI)
+    assert bool(member.is_dues_paying(record)) == bool(
+            not stati & member.NON_FEE_PAYING_STATI and (
+                not stati & member.NON_MEMBER_SET
+                or stati & {'ai', 'ad'}))
+    assert member.is_honorary_member(record) == ('h' in stati)
+
+
+def test_status_index():
+    table = dict(fieldnames=('first', 'last', 'status'), rows=[
+        ('A', 'B', 'a1'), ('C', 'D', ''), ('E', 'F', 'm|be'),
+        ('G', 'H', 'a1|xyz'), ('I', 'J')])
+    index = member.build_status_index(table)
+    assert index['by_status'] == {'a1': [0, 3], 'm': [2], 'be': [2]}
+    assert index['masks'][1] == index['masks'][4] == 0
+    assert index['masks'][3] & member.UNKNOWN_STATUS_BIT
+
+
+def test_populate_ms_by_status(tmp_path):
+    infile = tmp_path / 'memlist.csv'
+    with open(infile, 'w', newline='') as stream:
+        writer = csv.DictWriter(stream,
+                                fieldnames=list(fused_records[0]))
+        writer.writeheader()
+        for record in fused_records:
+            writer.writerow(record)
+    traversed = new_club()
+    traversed.quiet = True
+    member.traverse_records(str(infile), member.add2ms_by_status,
+                            traversed)
+    indexed = new_club()
+    member.populate_ms_by_status(str(infile), indexed)
+    assert indexed.ms_by_status == traversed.ms_by_status
+    assert indexed.entries_w_status == traversed.entries_w_status
+    member.populate_ms_by_status(str(infile), indexed, ['be'])
+    assert indexed.ms_by_status == {'be': ['Ab,Cy']}
+
+
+def test_projected_traversal(tmp_path):
+    funcs = [func for func, entry in member.collectors.items()
+             if entry['reads'] is not None]
+    assert member.projection(funcs + [member.get_usps]) is None
+    assert set(member.projection((member.add2fee_data, ))) == set(
+                        member.NAME + member.MONEY_KEYS)
+    infile = tmp_path / 'memlist.csv'
+    with open(infile, 'w', newline='') as stream:
+        writer = csv.DictWriter(stream,
+                                fieldnames=list(fused_records[0]))
+        writer.writeheader()
+        for record in fused_records:
+            writer.writerow(record)
+    full = types.SimpleNamespace(asterixUSPS=True)
+    member.setup_required_attributes(funcs, full)
+    fuse = member.fuse(funcs)
+    for record in fused_records:
+        fuse(dict(record), full)
+    projected = types.SimpleNamespace(asterixUSPS=True, quiet=True)
+    member.traverse_records(str(infile), funcs, projected)
+    del projected.fieldnames, projected.n_fields, projected.quiet
+    assert vars(projected) == vars(full)
+
+
+def test_member_record():
+    record = member.MemberRecord(fused_records[0])
+    assert record == fused_records[0]
+    assert "{first} {last}".format(**record) == 'Al Bo'
+    assert record(member.fstrings['key']) == 'Bo,Al'
+    assert record.last_first == 'Bo, Al'
+    assert record.get_derived('money')['kayak'] == 5
+    copy = record.copy()
+    copy['first'] = 'Cy'
+    assert copy.first_last == 'Cy Bo'
+    assert record.first_last == 'Al Bo'
+    assert pickle.loads(pickle.dumps(record)).key == 'Bo,Al'
+
+
 redacted = '''
 #({'first': 'Rick', 'last': 'Addicks', 'phone': '883-0365', 'address': '185 Caribe Isle', 'town': 'Novato', 'state': 'CA', 'postal_code': '94949', 'country': 'USA', 'email': 'mail@rickaddicks.com', 'dues': '0', 'dock': '', 'kayak': '', 'mooring': '', 'status': ''},
 #    ),
@@ -123,3 +299,38 @@ redacted = '''
 #({'first': 'Raymond', 'last': 'Bagley', 'phone': '415/522-2908', 'address': '211 Paloma Ave.', 'town': 'San Rafael', 'state': 'CA', 'postal_code': '94901', 'country': 'USA', 'email': '', 'dues': '0', 'dock': '', 'kayak': '', 'mooring': '', 'status': ''}, 
 #    ),
 '''
+
+
+def dues_emails(*names, body='Dues are due.\n'):
+    return [{'From': 'club@x.com', 'To': '{}@x.com'.format(name),
+             'Cc': '', 'Bcc': 'sec@x.com', 'Subject': 'Dues',
+             'attachments': [], 'body': 'Dear {},\n{}'.format(name, body)}
+            for name in names]
+
+
+def test_batch_emails():
+    emails = dues_emails('a', 'b', 'c')
+    batched = member.batch_emails(emails, k=2, salutation='Hi all,')
+    assert [email['Bcc'] for email in batched] == [
+        'sec@x.com,a@x.com,b@x.com', 'sec@x.com,c@x.com']
+    assert batched[0]['To'] == 'club@x.com'
+    assert batched[0]['body'] == 'Hi all,\nDues are due.\n'
+    emails.extend(dues_emails('d', body='Thanks!\n'))
+    batched = member.batch_emails(emails)
+    assert len(batched) == 2
+    assert batched[1] == emails[3]  # One of a kind: as it was.
+    assert member.batch_emails(emails[:3], k=1) == emails[:3]
+
+
+def test_batching_only_if_broadcast(tmp_path):
+    emails = dues_emails('a', 'b', 'c')
+    club = types.SimpleNamespace(
+        infile=str(tmp_path / 'memlist.csv'), json_data=list(emails),
+        json_file=str(tmp_path / 'emails.json'), email=None,
+        letter=None, quiet=True, which={'funcs': []})
+    (tmp_path / 'memlist.csv').write_text("first,last,email\n")
+    member.prepare_mailing(club)
+    assert club.json_data == emails  # Same bodies: still personal.
+    club.which['broadcast'] = True
+    member.prepare_mailing(club)
+    assert len(club.json_data) == 1
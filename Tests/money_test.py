@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# File: Tests/money_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import types
+import pytest
+import cache
+import member
+import money
+
+memlist = (
+    "first,last,email,dues,dock,kayak,mooring,status\n"
+    "Al,Bo,al@x.com,100,75,,,\n"
+    "Cy,Do,,0,,-70,,\n"
+    "Ed,Fa,ed@x.com,,,,,a1\n"
+    "Gi,Ho,,-25,,,,\n"
+    "Ik,Jo,ik@x.com,200,,,,h\n"
+    "Lu,Ma,,50,,,200,m\n"
+    "Qu,Ra,qu@x.com,0,0,0,0,i\n"
+    )
+bad_dues = "No,Pe,no@x.com,xx,,,,\n"  # (the collectors' int() fails)
+
+
+@pytest.fixture
+def infile(tmp_path):
+    path = tmp_path / 'memlist.csv'
+    path.write_text(memlist)
+    return str(path)
+
+
+@pytest.fixture
+def bad_infile(tmp_path):
+    path = tmp_path / 'bad_memlist.csv'
+    path.write_text(memlist + bad_dues)
+    return str(path)
+
+
+def traversed(infile, funcs, **attrs):
+    club = types.SimpleNamespace(quiet=True, **attrs)
+    member.traverse_records(infile, funcs, club)
+    return club
+
+
+def test_payables(infile, bad_infile):
+    expected = traversed(infile, [member.get_payables],
+                         asterixUSPS=True)
+    club = types.SimpleNamespace(asterixUSPS=True)
+    money.payables(money.get_columns(infile), club)
+    assert club.still_owing == expected.still_owing
+    assert club.advance_payments == expected.advance_payments
+    assert club.n_no_email == expected.n_no_email
+    club.asterixUSPS = False
+    money.payables(money.get_columns(bad_infile), club)
+    assert club.still_owing == [line.replace('*', '') for line
+                                in expected.still_owing]
+
+
+def test_payables_dict(infile):
+    expected = traversed(infile, [member.get_payables_dict])
+    club = types.SimpleNamespace()
+    money.payables_dict(money.get_columns(infile), club)
+    assert club.owing_dict == expected.owing_dict
+    assert club.credits_dict == expected.credits_dict
+
+
+def test_dues_field(bad_infile):
+    expected = traversed(bad_infile, [member.ck_dues_field])
+    assert expected.nulls[-1] == "Pe, No: xx"
+    club = types.SimpleNamespace()
+    money.dues_field(money.get_columns(bad_infile), club)
+    for attr in ('nulls', 'zeros', 'dues_owing', 'errors'):
+        assert getattr(club, attr) == getattr(expected, attr)
+
+
+def test_columns(infile):
+    columns = money.get_columns(infile)
+    assert columns['n'] == 7
+    assert list(columns['values']['dues']) == [
+        100, 0, 0, -25, 200, 50, 0]
+    assert list(columns['nulls']['dues']) == [0, 0, 1, 0, 0, 0, 0]
+    assert money.totals(columns) == dict(dues=325, dock=75,
+                                         kayak=-70, mooring=200)
+    assert list(money.row_totals(columns)) == [
+        175, -70, 0, -25, 200, 250, 0]
+    cache.forget()
+    assert money.get_columns(infile) == columns  # (from the cache)
+
+
+if __name__ == '__main__':
+    pass
+
+
+def test_bill_non_zero(infile):
+    columns = money.get_columns(infile)
+    non_zero = {}
+    billed = money.bill(columns, 100, {'Bo,Al': {'Kayak': 70}},
+                        non_zero=non_zero)
+    assert non_zero == {0: dict(dues=100, dock=75), 1: dict(kayak=-70),
+                        3: dict(dues=-25), 4: dict(dues=200),
+                        5: dict(dues=50, mooring=200)}
+    assert list(billed['kayak'][0])[:2] == [70, 0]
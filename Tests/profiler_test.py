@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# File: Tests/profiler_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import json
+import types
+import concurrent.futures
+import member
+import profiler
+
+records = [
+    {'first': 'Al', 'last': 'Bo', 'email': 'al@x.com', 'status': 'a1'},
+    {'first': 'Cy', 'last': 'Do', 'email': '', 'status': ''},
+    ]
+
+
+def traverse(funcs):
+    club = types.SimpleNamespace()
+    member.setup_required_attributes(funcs, club)
+    fused = member.fuse(funcs)
+    for record in records:
+        fused(record, club)
+    return club
+
+
+def test_profile(tmp_path):
+    funcs = (member.add2email_by_m, member.increment_napplicants)
+    profile = profiler.start()
+    try:
+        with profiler.phase('output'):
+            club = traverse(funcs)
+    finally:
+        assert profiler.stop() is profile
+    assert club.napplicants == 1
+    assert club.email_by_m == {'Bo, Al': 'al@x.com'}
+    timings = profile.as_dict()
+    assert timings['n_records'] == 2
+    assert timings['funcs']['add2email_by_m']['calls'] == 2
+    assert timings['phases']['output']['count'] == 1
+    assert profile.report()[1].startswith('function ')
+    json_file = tmp_path / 'profile.json'
+    profile.dump(json_file)
+    assert json.loads(json_file.read_text())['n_records'] == 2
+
+
+def test_threaded_counts():
+    funcs = (member.increment_napplicants, )
+    profile = profiler.start()
+    try:
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            for _ in pool.map(lambda _: [traverse(funcs)
+                                          for _ in range(500)],
+                              range(8)):
+                pass
+    finally:
+        profiler.stop()
+    timings = profile.as_dict()
+    assert timings['n_records'] == 8 * 500 * len(records)
+    assert (timings['funcs']['increment_napplicants']['calls']
+            == 8 * 500 * len(records))
+
+
+def test_nothing_recorded_when_off():
+    assert profiler.active is None
+    with profiler.phase('output'):
+        club = traverse((member.increment_napplicants, ))
+    assert club.napplicants == 1
+    assert profiler.active is None
+
+
+if __name__ == '__main__':
+    pass
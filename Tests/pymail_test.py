@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# File: Tests/pymail_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import email
+import asyncio
+import smtplib
+import pytest
+import Pymail.asend as asend
+import Pymail.config as config
+import Pymail.journal as journal
+import Pymail.send as send
+import Pymail.sink as sink
+import Pymail.spool as spool
+
+
+def emails(n, attachments=()):
+    return [{'From': 'club@localhost',
+             'To': 'member{}@localhost'.format(i),
+             'Subject': 'Dues {}'.format(i),
+             'body': 'Dear member {},\n'.format(i),
+             'attachments': list(attachments)}
+            for i in range(n)]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    with sink.Sink() as server:
+        monkeypatch.setitem(config.config, 'sink', server.config())
+        yield server
+
+
+def test_password_read_only_when_needed(monkeypatch):
+    read = []
+    monkeypatch.setattr(config, 'getpw',
+                        lambda service: read.append(service) or 'pw')
+    server = config.Server({"user": "me", "pw": "easy"})
+    assert read == []
+    assert server["password"] == 'pw'
+    assert server["password"] == 'pw'
+    assert read == ['easy']
+    with pytest.raises(KeyError):
+        server["port"]
+
+
+def test_token_bucket():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = send.TokenBucket(2, burst=3, clock=lambda: now[0],
+                              sleep=sleep)
+    for _ in range(3):
+        bucket.take()
+    assert now[0] == 0
+    for _ in range(4):
+        bucket.take()
+    assert now[0] == pytest.approx(2.0)
+
+
+def test_send(server, tmp_path):
+    attachment = tmp_path / 'bylaws.txt'
+    attachment.write_text('By laws.\n')
+    config.config['sink']['connections'] = 3
+    to_send = emails(10, [str(attachment)])
+    result = send.send(to_send, 'sink', report_progress=False,
+                       include_wait=False, confirm=False)
+    assert result['sent'] == 10 and result['failed'] == []
+    assert to_send == emails(10, [str(attachment)])  # Left as was.
+    received = [email.message_from_bytes(message)
+                for message in server.messages]
+    assert sorted(msg['To'] for msg in received) == sorted(
+        'member{}@localhost'.format(i) for i in range(10))
+    for msg in received:
+        assert msg['Sender'] == 'sink@localhost'
+        parts = msg.get_payload()
+        assert parts[1].get_filename() == 'bylaws.txt'
+
+
+def test_reconnects(server):
+    server.drop_after = 2
+    result = send.send(emails(7), 'sink', report_progress=False,
+                       include_wait=False, confirm=False)
+    assert result['sent'] == 7
+    # (A message dropped before it's acknowledged is sent again.)
+    assert len({email.message_from_bytes(message)['To']
+                for message in server.messages}) == 7
+
+
+def test_keys():
+    to_send = emails(3)
+    to_send.append(dict(to_send[0]))
+    keys = journal.keys(to_send)
+    assert keys[3] == keys[0] + ':2'
+    assert len(set(keys)) == 4
+    assert journal.keys(emails(3)) == keys[:3]
+
+
+def test_journal_resumes(server, tmp_path):
+    journal_file = str(tmp_path / 'emails.json.journal')
+    sent = journal.Journal(journal_file)
+    send.send(emails(4), 'sink', report_progress=False,
+              include_wait=False, confirm=False, journal=sent)
+    sent.close()
+    with open(journal_file, 'a') as stream:
+        stream.write('{"key": "cut sh')  # As if it had crashed.
+    sent = journal.Journal(journal_file)
+    assert len(sent.sent) == 4
+    assert len(sent.pending(emails(10))) == 6
+    result = send.send(emails(10), 'sink', report_progress=False,
+                       include_wait=False, confirm=False, journal=sent)
+    sent.close()
+    assert result['sent'] == 6
+    assert len(server.messages) == 10
+    assert journal.Journal(journal_file).pending(emails(10)) == []
+
+
+def test_journal_retries(server, tmp_path):
+    server.refusals = 3
+    sent = journal.Journal(str(tmp_path / 'journal'), backoff=0.01)
+    result = send.send(emails(5), 'sink', report_progress=False,
+                       include_wait=False, confirm=False, journal=sent)
+    assert result['sent'] == 5 and result['failed'] == []
+    assert len(server.messages) == 5
+    assert sum(len(failures) for failures
+               in sent.failures.values()) == 0  # (Sent in the end.)
+    sent.close()
+
+
+def test_journal_gives_up(server, tmp_path):
+    server.refusals = 100
+    sent = journal.Journal(str(tmp_path / 'journal'), attempts=2,
+                           backoff=0.01)
+    result = send.send(emails(2), 'sink', report_progress=False,
+                       include_wait=False, confirm=False, journal=sent)
+    assert result['sent'] == 0
+    assert [n for n, to, error in result['failed']] == [1, 2]
+    assert sorted(entry['to'] for entry in sent.given_up()) == [
+        'member0@localhost', 'member1@localhost']
+    assert sent.pending(emails(2)) == []
+    sent.close()
+
+
+def test_render():
+    mail = emails(1)[0]
+    mail['Cc'] = ''
+    mail['Bcc'] = 'secretary@localhost'
+    from_addr, recipients, data = send.render(mail, 'club@localhost')
+    assert from_addr == 'club@localhost'
+    assert recipients == ['member0@localhost', 'secretary@localhost']
+    assert b'Bcc' not in data
+    assert b'\r\nTo: member0@localhost\r\n' in data
+
+
+@pytest.mark.parametrize('jobs', [1, 3])
+def test_spool(server, tmp_path, jobs):
+    spool_dir = str(tmp_path / 'spool')
+    index = spool.write(emails(7), spool_dir, 'sink@localhost', jobs=jobs)
+    assert index == spool.entries(spool_dir)
+    assert [entry['To'] for entry in index] == [
+        'member{}@localhost'.format(i) for i in range(7)]
+    assert sorted(os.listdir(os.path.join(spool_dir, 'new'))) == [
+        os.path.basename(entry['file']) for entry in index]
+    assert os.listdir(os.path.join(spool_dir, 'tmp')) == []
+    sent = journal.Journal(os.path.join(spool_dir, 'journal'))
+    result = send.send(index, 'sink', report_progress=False,
+                       include_wait=False, confirm=False,
+                       journal=sent, spool_dir=spool_dir)
+    sent.close()
+    assert result['sent'] == 7
+    assert sorted(server.messages) == sorted(  # Sent as they are.
+        send.spooled(spool_dir, entry)[2] for entry in index)
+    spool.write(emails(1), spool_dir, 'club@localhost')
+    with pytest.raises(ValueError, match='club@localhost'):
+        send.send(spool.entries(spool_dir), 'sink', confirm=False,
+                  spool_dir=spool_dir)  # The sink sends as sink@...
+
+
+def test_attachment_encoded_once(tmp_path, monkeypatch):
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    monkeypatch.setattr(send, '_attachments', type(send._attachments)())
+    monkeypatch.setattr(send, 'MMAP_SIZE', 1000)
+    small = tmp_path / 'small.txt'
+    small.write_bytes(b'small\n')
+    big = tmp_path / 'big.pdf'
+    big.write_bytes(bytes(range(256)) * 40)
+    encodings = []
+    encodebytes = send.base64.encodebytes
+    monkeypatch.setattr(send.base64, 'encodebytes',
+                        lambda data: encodings.append(1)
+                        or encodebytes(data))
+    for path in (small, big, small, big):
+        msg = MIMEMultipart()
+        send.attach(str(path), msg)
+        part = msg.get_payload()[0]
+        expected = MIMEApplication(path.read_bytes(), path.name)
+        assert part.get_payload() == expected.get_payload()
+        assert part['Content-Type'] == expected['Content-Type']
+        assert part.get_payload(decode=True) == path.read_bytes()
+    assert len(encodings) == 2
+    big.write_bytes(b'changed')
+    msg = MIMEMultipart()
+    send.attach(str(big), msg)
+    assert msg.get_payload()[0].get_payload(decode=True) == b'changed'
+    assert len(encodings) == 3
+
+
+def test_attachments_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(send, '_attachments', type(send._attachments)())
+    monkeypatch.setattr(send, 'ATTACHMENTS_KEPT', 300)
+    paths = []
+    for n in range(3):
+        path = tmp_path / 'file{}'.format(n)
+        path.write_bytes(bytes([n]) * 100)  # (136 bytes encoded)
+        paths.append(str(path))
+        send.encoded(paths[-1])
+    assert [key[0] for key in send._attachments] == paths[1:]
+    send.encoded(paths[1])  # Now the most recently used.
+    send.encoded(paths[0])
+    assert [key[0] for key in send._attachments] == [paths[1], paths[0]]
+
+
+def test_async_send(server, tmp_path):
+    attachment = tmp_path / 'bylaws.txt'
+    attachment.write_text('By laws.\n')
+    config.config['sink'].update(connections=3, auth="on",
+                                 password="secret")
+    to_send = emails(9, [str(attachment)])
+    to_send[0]['body'] = '.A line starting with a dot.\n'
+    to_send[4]['attachments'] = [str(tmp_path / 'missing.pdf')]
+    result = asend.send(to_send, 'sink', report_progress=False,
+                        include_wait=False, confirm=False)
+    assert result['sent'] == 8
+    assert [(n, to) for n, to, error in result['failed']] == [
+        (5, 'member4@localhost')]
+    received = {msg['To']: msg for msg in
+                map(email.message_from_bytes, server.messages)}
+    assert len(received) == 8
+    first = received['member0@localhost'].get_payload()[0]
+    assert first.get_payload().rstrip() == '.A line starting with a dot.'
+
+
+def test_async_journal(server, tmp_path):
+    server.refusals = 2
+    server.drop_after = 3
+    sent = journal.Journal(str(tmp_path / 'journal'), backoff=0.01)
+    result = asend.send(emails(6), 'sink', report_progress=False,
+                        include_wait=False, confirm=False, journal=sent)
+    sent.close()
+    assert result['sent'] == 6 and result['failed'] == []
+    assert len({email.message_from_bytes(message)['To']
+                for message in server.messages}) == 6
+
+
+def test_async_cancel(server, tmp_path):
+    server.delay = 0.05
+    sent = journal.Journal(str(tmp_path / 'journal'))
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(asend.send_async(
+                emails(50), 'sink', report_progress=False,
+                include_wait=False, confirm=False, journal=sent), 0.3))
+    sent.close()
+    n_sent = len(journal.Journal(str(tmp_path / 'journal')).sent)
+    assert 0 < n_sent < 50
+    assert n_sent <= len(server.messages)
+
+
+def test_async_reconnect_refused(server, monkeypatch):
+    server.drop_after = 1
+    greet = asend.Session.greet
+    greeted = []
+    async def refused_after_first(session):
+        greeted.append(session)
+        if len(greeted) > 1:
+            raise smtplib.SMTPAuthenticationError(535, b'Bad password')
+        await greet(session)
+    monkeypatch.setattr(asend.Session, 'greet', refused_after_first)
+    result = asend.send(emails(3), 'sink', report_progress=False,
+                        include_wait=False, confirm=False)
+    assert result['sent'] == 0  # (The first was dropped unacknowledged.)
+    assert [n for n, to, error in result['failed']] == [1, 2, 3]
+    assert all('SMTPAuthenticationError' in error
+               for n, to, error in result['failed'])
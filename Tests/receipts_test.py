@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# File: Tests/receipts_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import pytest
+import cache
+import helpers
+import receipts
+
+day1 = (
+    "Date: Jan 3, 2020\n"
+    "Al Bo                        100  dues\n"
+    "Cy Do                         75  dock\n"
+    "                             ---\n"
+    )
+day2 = (
+    "\n"
+    "Date: Jan 10, 2020\n"
+    "Al Bo                         70  kayak\n"
+    "a note without an amount\n"
+    "Ed Fa                        -25  refund\n"
+    )
+
+
+def fee_totals(text):
+    """
+    What rbc.Club.fee_totals did before there was a ledger.
+    """
+    res = ["Fees taken in to date:"]
+    invalid_lines = []
+    total = 0
+    subtotal = 0
+    for line in text.splitlines():
+        line = line.rstrip()
+        if line.startswith("Date:") or not line.strip():
+            continue
+        if (line[29:32] == "---") and subtotal:
+            res.append("    SubTotal                 --- {:>10}"
+                       .format(helpers.format_dollar_value(subtotal)))
+            subtotal = 0
+        try:
+            amount = int(line[28:33])
+        except (ValueError, IndexError):
+            invalid_lines.append(line)
+            continue
+        total += amount
+        subtotal += amount
+    if subtotal:
+        res.append("         SubTotal            --- {:>10}"
+                   .format(helpers.format_dollar_value(subtotal)))
+    res.append("\nGrand Total to Date:         --- ---- {:>10}"
+               .format(helpers.format_dollar_value(total)))
+    return res, invalid_lines
+
+
+@pytest.fixture
+def receipts_file(tmp_path):
+    cache.forget()
+    path = tmp_path / 'receipts-2020.txt'
+    path.write_text(day1)
+    return path
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """
+    Collects the lines receipts.add_lines is given.
+    """
+    lines = []
+    add_lines = receipts.add_lines
+
+    def counting(ledger, new_lines):
+        new_lines = list(new_lines)
+        lines.extend(line for line in new_lines if line)
+        add_lines(ledger, new_lines)
+
+    monkeypatch.setattr(receipts, 'add_lines', counting)
+    return lines
+
+
+def test_totals_report(receipts_file):
+    receipts_file.write_text(day1 + day2)
+    ledger = receipts.get_ledger(str(receipts_file))
+    res, invalid_lines = fee_totals(day1 + day2)
+    assert receipts.totals_report(ledger) == res
+    assert ledger['invalid_lines'] == invalid_lines
+    assert ledger['total'] == 220
+
+
+def test_only_appended_lines_parsed(receipts_file, parsed):
+    receipts.get_ledger(str(receipts_file))
+    assert len(parsed) == 4
+    del parsed[:]
+    with open(str(receipts_file), 'a') as stream:
+        stream.write(day2)
+    cache.forget()  # Must also work from the cache file.
+    ledger = receipts.get_ledger(str(receipts_file))
+    assert parsed == day2.strip().split('\n')
+    assert receipts.totals_report(ledger) == fee_totals(day1 + day2)[0]
+    del parsed[:]
+    receipts.get_ledger(str(receipts_file))
+    assert parsed == []
+
+
+def test_edited_file_parsed_again(receipts_file):
+    receipts.get_ledger(str(receipts_file))
+    receipts_file.write_text(day1.replace('100', '150') + day2)
+    ledger = receipts.get_ledger(str(receipts_file))
+    assert ledger['total'] == 270
+    receipts_file.write_text(day2)  # Shorter than before.
+    assert receipts.get_ledger(str(receipts_file))['total'] == 45
+
+
+def test_early_edit_then_append(receipts_file):
+    padding = "\n" * 5000  # The edit is well before the end.
+    receipts_file.write_text(day1 + padding)
+    assert receipts.get_ledger(str(receipts_file))['total'] == 175
+    receipts_file.write_text(day1.replace('100', '150') + padding + day2)
+    ledger = receipts.get_ledger(str(receipts_file))
+    assert ledger['total'] == 270
+    assert ledger['by_name']['Bo,Al'][0] == ('Jan 3, 2020', 150)
+
+
+def test_partial_last_line(receipts_file):
+    with open(str(receipts_file), 'a') as stream:
+        stream.write("Gi Ho                         5")
+    assert receipts.get_ledger(str(receipts_file))['total'] == 180
+    with open(str(receipts_file), 'a') as stream:
+        stream.write("0  dock\n")
+    ledger = receipts.get_ledger(str(receipts_file))
+    assert ledger['total'] == 225
+    assert ledger['by_name']['Ho,Gi'] == [('Jan 3, 2020', 50)]
+
+
+def test_lookups(receipts_file, tmp_path):
+    receipts_file.write_text(day1 + day2)
+    earlier = tmp_path / 'receipts-2019.txt'
+    earlier.write_text("Date: Dec 1, 2019\n"
+                       "Al Bo                        100  dues\n")
+    ledgers = [receipts.get_ledger(str(path))
+               for path in (earlier, receipts_file)]
+    assert receipts.received_from('Bo,Al', ledgers) == [
+        ('Dec 1, 2019', 100), ('Jan 3, 2020', 100),
+        ('Jan 10, 2020', 70)]
+    assert receipts.received_on('Jan 10, 2020', ledgers) == [
+        ('Bo,Al', 70), ('Fa,Ed', -25)]
+    assert receipts.totals_by_file([str(earlier), str(receipts_file)]
+                                   ) == {str(earlier): 100,
+                                         str(receipts_file): 220,
+                                         None: 320}
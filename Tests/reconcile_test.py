@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# File: Tests/reconcile_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import csv
+import json
+import pytest
+import helpers
+import reconcile
+
+left = {'a': {'1'}, 'b': {'2'}, 'c': {'3'}}
+right = {'b': {'2'}, 'c': {'4'}, 'd': {'5'}}
+
+
+def test_compare():
+    result = reconcile.compare('x', left, right, 'l', 'r')
+    assert result == dict(check='x', left='l', right='r',
+                          only_left=['a'], only_right=['d'],
+                          mismatched=[('c', {'3'}, {'4'})])
+    assert reconcile.differs(result)
+    assert reconcile.keys_differ(result)
+    same = reconcile.compare('x', {'b': 2}, {'b': 2})
+    assert not reconcile.differs(same)
+    values_only = reconcile.compare('x', {'b': 2}, {'b': 3})
+    assert reconcile.differs(values_only)
+    assert not reconcile.keys_differ(values_only)
+
+
+@pytest.mark.parametrize("s1, s2", [
+    ({'a', 'b', 'c'}, {'b', 'd'}),
+    ({'a'}, {'a'}),
+    (set(), {'z', 'y'}),
+    ])
+def test_listing_as_check_sets(s1, s2):
+    result = reconcile.compare('x', s1, s2)
+    assert result['mismatched'] == []
+    assert (reconcile.listing(result, 'first', 'second')
+            == helpers.check_sets(s1, s2, 'first', 'second'))
+
+
+def test_by_key():
+    result = reconcile.with_values(
+                reconcile.compare('x', left, {'b': {'2'}}, 'l', 'r'),
+                left, {'b': {'2'}})
+    # Without mismatches: as helpers.compare_dicts.
+    assert reconcile.by_key(result) == helpers.compare_dicts(
+                                            left, {'b': {'2'}}, 'l', 'r')
+    result = reconcile.with_values(
+                reconcile.compare('x', left, right, 'l', 'r'),
+                left, right)
+    assert reconcile.by_key(result, show=repr).split('\n') == [
+        "Only in l:", "\ta: {'1'}", "Only in r:", "\td: {'5'}",
+        "Different in l and r:", "\tc: {'3'} != {'4'}"]
+
+
+def test_dumps(tmp_path):
+    results = [reconcile.compare('x', left, right, 'l', 'r'),
+               reconcile.compare('y', {'k'}, set(), 'l', 'r')]
+    reconcile.dump_json(results, tmp_path / 'diffs.json')
+    with open(tmp_path / 'diffs.json') as stream:
+        dumped = json.load(stream)
+    assert [d['check'] for d in dumped] == ['x', 'y']
+    assert dumped[0]['mismatched'] == [['c', ['3'], ['4']]]
+    reconcile.dump_csv(results, tmp_path / 'diffs.csv')
+    with open(tmp_path / 'diffs.csv', newline='') as stream:
+        rows = list(csv.DictReader(stream))
+    assert [(row['check'], row['kind'], row['key']) for row in rows] == [
+        ('x', 'only_left', 'a'), ('x', 'only_right', 'd'),
+        ('x', 'mismatched', 'c'), ('y', 'only_left', 'k')]
+    assert (rows[2]['left_value'], rows[2]['right_value']) == ('["3"]', '["4"]')
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# File: Tests/sqldb_test.py
+
+# Must first add the parent directory of the
+# currently running script to the system path:
+import os
+import sys
+sys.path.insert(0, os.path.split(sys.path[0])[0])
+
+import types
+import sqlite3
+import pytest
+import data
+import member
+import sqldb
+
+spots = {
+    'memlist.csv': (
+        "first,last,email,dues,dock,kayak,mooring,status\r\n"
+        "Al,Bo,al@x.com,100,,5,,a1\r\n"
+        "Cy,Do,,0,75,,,m|be\r\n"
+        "Ed,Fa,ed@x.com,,,,,\r\n"
+        "Gi,Ho,gi@x.com,-25,,,,h\r\n"
+        "Ik,Jo,\r\n"
+        '"Lu, Jr",Ma,lu@x.com,100,,,,z3_sec,surplus\r\n'
+        ),
+    'applicants.txt': (
+        "# Applicants\n\n"
+        "Al Bo | 200101 | 200102 | 200103\n"
+        "Pa Qu | 200101\n"
+        ),
+    'sponsors.txt': (
+        "# Sponsors\n"
+        "Al Bo: Cy Do, Ed Fa\n"
+        ),
+    'dock.txt': "# Dock\nCy Do:  75\n",
+    'kayak.txt': "Al Bo: 5\n",
+    'receipts-2020.txt': (
+        "Date: Jan 3, 2020\n"
+        "    Al Bo                     100\n"
+        "    Cy Do                      75\n"
+        "                             ---\n"
+        "no amount here\n"
+        ),
+    }
+
+
+@pytest.fixture
+def database(tmp_path):
+    data_dir = tmp_path / 'Data'
+    data_dir.mkdir()
+    for name, text in spots.items():
+        with open(data_dir / name, 'w', newline='') as stream:
+            stream.write(text)
+    db_file = str(tmp_path / 'club.db')
+    sqldb.import_spots(db_file, str(data_dir))
+    database = sqldb.Database(db_file)
+    yield database
+    database.close()
+
+
+def test_round_trip(database, tmp_path):
+    out_dir = tmp_path / 'out'
+    written = sqldb.export_spots(database.name, str(out_dir))
+    assert len(written) == len(spots)
+    for name, text in spots.items():
+        with open(out_dir / name, newline='') as stream:
+            assert stream.read() == text
+    with pytest.raises(FileExistsError):
+        sqldb.export_spots(database.name, str(out_dir))
+
+
+def test_round_trip_byte_for_byte(tmp_path):
+    data_dir = tmp_path / 'Data'
+    data_dir.mkdir()
+    content = ('"first","last","email"\n'  # Not as csv.writer quotes
+               '"Zoë","Brontë",""\n').encode('utf-8')
+    (data_dir / 'memlist.csv').write_bytes(content)
+    db_file = str(tmp_path / 'club.db')
+    sqldb.import_spots(db_file, str(data_dir))
+    sqldb.export_spots(db_file, str(tmp_path / 'out'))
+    assert (tmp_path / 'out' / 'memlist.csv').read_bytes() == content
+
+
+def test_stale(database, tmp_path):
+    data_dir = tmp_path / 'Data'
+    assert database.changed() == []
+    with open(data_dir / 'dock.txt', 'a') as stream:
+        stream.write("Al Bo: 75\n")
+    (data_dir / 'mooring.txt').write_text("Ed Fa: 100\n")
+    with pytest.raises(sqldb.Stale, match='dock.txt.*mooring.txt'):
+        sqldb.Database(database.name)
+    sqldb.import_spots(database.name, str(data_dir))
+    sqldb.Database(database.name).close()
+
+
+def test_unchanged_not_hashed(database, tmp_path, monkeypatch):
+    kayak = str(tmp_path / 'Data' / 'kayak.txt')
+    stat = os.stat(kayak)
+    os.utime(kayak, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    hashed = []
+    file_hash = sqldb.cache.file_hash
+    monkeypatch.setattr(sqldb.cache, 'file_hash',
+                        lambda path: hashed.append(path) or file_hash(path))
+    assert database.changed() == []
+    assert hashed == [kayak]  # Touched: hashed (& found the same.)
+    assert database.changed() == []
+    assert hashed == [kayak]  # Its new mtime was recorded.
+
+
+def test_tables(database):
+    assert database.fees('dock') == {'Do,Cy': '75'}
+    db = database.db
+    assert db.execute("SELECT status FROM applicants WHERE key = ?",
+                      ('Bo,Al', )).fetchall() == [('a1', )]
+    assert db.execute("SELECT sponsor FROM sponsors ORDER BY position"
+                      ).fetchall() == [('Cy Do', ), ('Ed Fa', )]
+    assert db.execute("SELECT count(*) FROM lines WHERE spot = ?",
+                      ('receipts-2020.txt', )).fetchone() == (5, )
+    assert database.emails(['Bo,Al', 'Do,Cy', 'No,One']) == {
+        'Bo,Al': 'al@x.com', 'Do,Cy': ''}
+
+
+def test_parse_errors_collected(tmp_path, capsys):
+    data_dir = tmp_path / 'Data'
+    data_dir.mkdir()
+    (data_dir / 'applicants.txt').write_text(
+        "Al Bo | 200101\nnot an applicant line\nPa Qu | 200101\n")
+    (data_dir / 'sponsors.txt').write_text(
+        "no sponsors here\nAl Bo: Cy Do, Ed Fa\n")
+    db_file = str(tmp_path / 'club.db')
+    sqldb.import_spots(db_file, str(data_dir))
+    out = capsys.readouterr().out
+    assert 'line 2' in out and 'line 1' in out
+    db = sqlite3.connect(db_file)
+    assert db.execute("SELECT count(*) FROM applicants").fetchone() == (
+                                                                    2, )
+    assert db.execute("SELECT count(*) FROM sponsors").fetchone() == (
+                                                                    2, )
+    db.close()
+
+
+def traverse(funcs, infile, database=None):
+    club = types.SimpleNamespace(quiet=True, asterixUSPS=True,
+                                 be=True, sqlite=database,
+                                 format=member.fstrings['first_last'])
+    member.traverse_records(infile, funcs, club)
+    del club.sqlite
+    return vars(club)
+
+
+@pytest.mark.parametrize("funcs", [
+    (member.get_usps, member.get_secretary),
+    (member.increment_nmembers, member.increment_napplicants,
+     member.add2stati_by_m),
+    (member.get_payables, member.get_payables_dict),
+    (member.increment_nminutes_only, ),
+    (member.add2email_by_m, member.add2ms_by_status),
+    ])
+def test_traverse_same_as_csv(database, tmp_path, funcs):
+    infile = str(tmp_path / 'Data' / 'memlist.csv')
+    assert traverse(funcs, infile, database) == traverse(funcs, infile)
+
+
+def test_where_filters(database):
+    funcs = (member.increment_napplicants, member.get_secretary)
+    table = database.select(member.projection(funcs),
+                            member.sql_filter(funcs))
+    assert len(table['rows']) == 2
+    assert member.sql_filter(
+                (member.increment_napplicants, member.add2malformed)
+                ) is None
+
+
+def test_populate_ms_by_status(database, tmp_path):
+    infile = str(tmp_path / 'Data' / 'memlist.csv')
+    from_csv = types.SimpleNamespace(format=member.fstrings['key'])
+    member.populate_ms_by_status(infile, from_csv)
+    from_db = types.SimpleNamespace(format=member.fstrings['key'],
+                                    sqlite=database)
+    member.populate_ms_by_status(infile, from_db)
+    assert from_db.ms_by_status == from_csv.ms_by_status
+    assert from_db.entries_w_status == from_csv.entries_w_status
+
+
+if __name__ == '__main__':
+    pass
+
+
+def test_sponsor_emails_from_database(database, tmp_path):
+    club = types.SimpleNamespace(
+        quiet=True, sqlite=database, infile=str(tmp_path / 'no.csv'),
+        sponsors_spot=str(tmp_path / 'Data' / 'sponsors.txt'))
+    data.populate_sponsor_data(club)  # (No memlist.csv read.)
+    assert club.sponsor_emails == {'Do,Cy': '', 'Fa,Ed': 'ed@x.com'}
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+
+# File: benchmark.py
+
+"""
+Timings of some of the more data intensive code.
+Synthetic data (written to a temporary directory) is used
+so there's no need for (or risk to) the club's own data.
+
+Usage:
+    ./benchmark.py fused [-n <records>] [-r <repeats>]
+    ./benchmark.py records [-n <records> -i <infile>]
+    ./benchmark.py projection [-n <records>] [-r <repeats>] [-w <extra>]
+    ./benchmark.py money [-n <records>] [-r <repeats>]
+    ./benchmark.py smtp [-e <emails>] [-c <connections>] [-d <delay>]
+
+Options:
+    -i <infile>  Use an existing membership file rather than
+                 synthetic data.
+    -n <records>  Number of records to generate.  [default: 10000]
+    -r <repeats>  Number of times each timing is repeated;
+                  the best is reported.  [default: 5]
+    -w <extra>  Number of (note) fields added to each synthetic
+                record to make a wide memlist.  [default: 40]
+    -e <emails>  Number of emails to send.  [default: 200]
+    -c <connections>  Number of SMTP sessions.  [default: 4]
+    -d <delay>  Seconds the SMTP sink takes to accept each
+                email.  [default: 0.02]
+
+Commands:
+    fused: Records/sec for the nine collectors used by
+        data.gather_membership_data, each called in turn (as
+        before) versus combined by member.fuse.
+    records: Memory per record: a dict from csv.DictReader versus
+        a MemberRecord (which shares the interned strings of the
+        parse cache's table.)
+    projection: Records/sec for the collectors of the zeros and
+        payables commands (which declare the fields they read)
+        given records from csv.DictReader, full records from the
+        parse cache and records with only the fields needed.
+    money: Records/sec for the payables & zeros reports: the
+        collectors (a record at a time) versus the money columns
+        (see money.py.)  Try it with -n 100000.
+    smtp: Emails/sec sent by Pymail.send.send to a local stand
+        in (Pymail/sink.py) for an MTA: one connection versus
+        several (and Pymail.asend.send with as many.)  Nothing
+        leaves the machine.
+"""
+
+import os
+import csv
+import time
+import random
+import tempfile
+import tracemalloc
+import types
+from docopt import docopt
+import cache
+import member
+import money
+import Pymail.send
+import Pymail.asend
+import Pymail.sink
+
+FIELDNAMES = ("first", "last", "phone", "address", "town", "state",
+              "postal_code", "country", "email",
+              "dues", "dock", "kayak", "mooring", "status")
+
+MEMBERSHIP_COLLECTORS = (   # as in data.gather_membership_data
+    member.add2email_by_m,
+    member.get_usps,
+    member.add2fee_data,
+    member.add2stati_by_m,
+    member.add2ms_by_status,
+    member.increment_napplicants,
+    member.add2malformed,
+    member.add2member_with_email_set,
+    member.add2applicant_with_email_set,
+    )
+
+
+def synthetic_record(n):
+    """
+    Returns a plausible (but fake) membership record.
+    """
+    status = random.choice(('', '', '', 'm', 'a1', 'a2|be',
+                            'z3_sec', 'h', 'i'))
+    email = random.choice(('', 'member{}@example.com'.format(n)))
+    money = [random.choice(('', '0', '100', '-25'))
+             for key in member.MONEY_KEYS]
+    return dict(zip(FIELDNAMES, (
+        'First{}'.format(n), 'Last{:07d}'.format(n),
+        '555-{:04d}'.format(n % 10000),
+        '{} Main St.'.format(n), 'Bolinas', 'CA', '94924', 'USA',
+        email, *money, status)))
+
+
+def write_memlist(path, n_records, extra=0):
+    """
+    <extra> > 0 adds that many 'note' fields to each record.
+    """
+    notes = ['note{}'.format(n) for n in range(extra)]
+    with open(path, 'w', newline='') as stream:
+        writer = csv.DictWriter(stream, fieldnames=FIELDNAMES
+                                + tuple(notes))
+        writer.writeheader()
+        for n in range(n_records):
+            record = synthetic_record(n)
+            for note in notes:
+                record[note] = 'Remark {} on {}'.format(note, n)
+            writer.writerow(record)
+
+
+def new_club(infile):
+    return types.SimpleNamespace(
+        infile=infile, quiet=True, previous_name='',
+        format=member.fstrings['first_last_w_all_data'])
+
+
+def best_of(repeats, func):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def unfused_traversal(infile, funcs, club):
+    """
+    Each function called in turn for each record: the way
+    member.traverse_records used to work.
+    """
+    member.setup_required_attributes(funcs, club)
+    for record in cache.records(infile):
+        for func in funcs:
+            func(record, club)
+
+
+def bench_fused(infile, n_records, repeats):
+    cache.get_table(infile)  # So parsing isn't part of the timing.
+    unfused = best_of(repeats, lambda: unfused_traversal(
+                infile, MEMBERSHIP_COLLECTORS, new_club(infile)))
+    fused = best_of(repeats, lambda: member.traverse_records(
+                infile, MEMBERSHIP_COLLECTORS, new_club(infile)))
+    return [
+        "Nine collectors of data.gather_membership_data:",
+        "    unfused: {:>10,.0f} records/sec".format(
+                                            n_records / unfused),
+        "    fused:   {:>10,.0f} records/sec".format(
+                                            n_records / fused),
+        ]
+
+
+PROJECTED_COLLECTORS = (   # zeros_cmd & payables_cmd
+    member.ck_dues_field,
+    member.get_payables_dict,
+    member.increment_nmembers,
+    )
+
+
+def dict_reader_traversal(infile, funcs, club):
+    """
+    Every record read by csv.DictReader (as before the parse cache.)
+    """
+    member.setup_required_attributes(funcs, club)
+    fused = member.fuse(funcs)
+    with open(infile, 'r', newline='') as stream:
+        for record in csv.DictReader(stream):
+            fused(record, club)
+
+
+def full_traversal(infile, funcs, club):
+    """
+    Every field of every record (as when a collector doesn't
+    declare the fields it reads.)
+    """
+    member.setup_required_attributes(funcs, club)
+    fused = member.fuse(funcs)
+    for record in cache.table_records(cache.get_table(infile),
+                                      member.MemberRecord):
+        fused(record, club)
+
+
+def bench_projection(infile, n_records, repeats):
+    funcs = PROJECTED_COLLECTORS
+    n_fields = len(cache.get_table(infile)['fieldnames'])
+    timings = [(label, best_of(repeats, lambda: traverse(
+                    infile, funcs, new_club(infile))))
+               for label, traverse in (
+                   ('csv.DictReader:', dict_reader_traversal),
+                   ('full records:  ', full_traversal),
+                   ('projected:     ', member.traverse_records),
+                   )]
+    ret = ["zeros & payables collectors, {} of {} fields read:"
+           .format(len(member.projection(funcs)), n_fields)]
+    for label, elapsed in timings:
+        ret.append("    {} {:>10,.0f} records/sec".format(
+                                        label, n_records / elapsed))
+    return ret
+
+
+MONEY_COLLECTORS = (   # payables_cmd, zeros_cmd & code/angie.py
+    member.get_payables,
+    member.get_payables_dict,
+    member.ck_dues_field,
+    )
+
+
+def money_columns(columns, club):
+    """
+    What MONEY_COLLECTORS do but a column at a time.
+    """
+    money.payables(columns, club)
+    money.payables_dict(columns, club)
+    money.dues_field(columns, club)
+
+
+def bench_money(infile, n_records, repeats):
+    def new_money_club():
+        club = new_club(infile)
+        club.asterixUSPS = True
+        return club
+
+    cache.get_table(infile)  # So parsing isn't part of the timing.
+    by_record = best_of(repeats, lambda: member.traverse_records(
+                infile, MONEY_COLLECTORS, new_money_club()))
+    building = best_of(1, lambda: money.table2columns(
+                                        cache.get_table(infile)))
+    columns = money.get_columns(infile)
+    by_column = best_of(repeats, lambda: money_columns(
+                                        columns, new_money_club()))
+    return [
+        "payables & zeros reports ({:,} records):".format(n_records),
+        "    by record: {:>10,.0f} records/sec".format(
+                                            n_records / by_record),
+        "    by column: {:>10,.0f} records/sec".format(
+                                            n_records / by_column),
+        "    (building the columns: {:.0f} ms, once per file.)"
+            .format(building * 1e3),
+        ]
+
+
+def bench_smtp(n_emails, connections, delay):
+    emails = [{'From': 'club@localhost',
+               'To': 'member{}@localhost'.format(n),
+               'Subject': 'Benchmark', 'body': 'Hello.\n' * 20,
+               'attachments': []}
+              for n in range(n_emails)]
+    res = ["Pymail.send.send ({} emails, {:.0f} ms each at the sink):"
+           .format(n_emails, delay * 1e3)]
+    with Pymail.sink.Sink(delay=delay) as sink:
+        for n_connections in sorted({1, connections}):
+            Pymail.send.config.config['sink'] = sink.config(
+                                        connections=n_connections)
+            result = Pymail.send.send(emails, 'sink',
+                                      report_progress=False,
+                                      include_wait=False,
+                                      confirm=False)
+            res.append("    {:>2} connection(s): {:>8.1f} emails/sec"
+                       .format(n_connections,
+                               result['sent'] / result['seconds']))
+        result = Pymail.asend.send(emails, 'sink',
+                                   report_progress=False,
+                                   include_wait=False, confirm=False)
+        res.append("    {:>2} connection(s): {:>8.1f} emails/sec"
+                   " (asyncio: Pymail.asend.send)"
+                   .format(connections,
+                           result['sent'] / result['seconds']))
+    return res
+
+
+def memory_used(func):
+    """
+    Returns the memory (bytes) still allocated (by Python) once
+    <func> returns along with what it returned.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def bench_records(infile):
+    def dict_reader():
+        with open(infile, 'r', newline='') as stream:
+            return list(csv.DictReader(stream))
+
+    def member_records():
+        return list(cache.table_records(table, member.MemberRecord))
+    dicts, records = memory_used(dict_reader)
+    n_records = len(records)
+    table_size, table = memory_used(
+            lambda: cache.parse_csv(open(infile, newline='').read()))
+    records_size, _ = memory_used(member_records)
+    return [
+        "Memory per record ({} records):".format(n_records),
+        "    csv.DictReader (dict & its strings): {:>6.0f} bytes"
+            .format(dicts / n_records),
+        "    MemberRecord (given cached table):   {:>6.0f} bytes"
+            .format(records_size / n_records),
+        "    cached table (once per file):        {:>6.0f} bytes"
+            .format(table_size / n_records),
+        ]
+
+
+def main():
+    args = docopt(__doc__)
+    n_records = int(args['-n'])
+    repeats = int(args['-r'])
+    random.seed(n_records)
+    if args['smtp']:  # (No membership file needed.)
+        print('\n'.join(bench_smtp(int(args['-e']), int(args['-c']),
+                                   float(args['-d']))))
+        return
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args['-i']:
+            infile = args['-i']
+        else:
+            infile = os.path.join(tmp_dir, 'memlist.csv')
+            extra = int(args['-w']) if args['projection'] else 0
+            write_memlist(infile, n_records, extra)
+        if args['fused']:
+            print('\n'.join(bench_fused(infile, n_records, repeats)))
+        if args['records']:
+            print('\n'.join(bench_records(infile)))
+        if args['projection']:
+            print('\n'.join(bench_projection(infile, n_records,
+                                              repeats)))
+        if args['money']:
+            print('\n'.join(bench_money(infile, n_records, repeats)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+
+# File: cache.py
+
+"""
+Provides a persistent cache of parsed SPoT files.
+The first time a file is parsed the result is pickled into a file
+in CACHE_DIR (~/.cache/club_utilities unless XDG_CACHE_HOME says
+otherwise.)  Since unpickling can run code, the cache is kept in
+a directory only its owner can write to (and is ignored if
+that's not so) rather than along side the (shared) data.
+Subsequent parses are answered from that file (or, within the same
+process, from memory) for as long as the source file's path,
+mtime, size and content hash still match what was recorded.
+Typical usage:
+    table = cache.get_table(club.infile)
+    for record in cache.table_records(table):
+        ...
+"""
+
+import os
+import io
+import sys
+import csv
+import pickle
+import threading
+import operator
+import itertools
+import hashlib
+
+CACHE_VERSION = 2  # Bump whenever the format of a payload changes.
+CACHE_SUFFIX = '.cache'
+ENCODING = 'utf-8'
+ENABLED = True  # Set to False to always parse from scratch.
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'club_utilities')
+
+_memo = {}  # (path, tag) => entry; avoids unpickling more than once.
+
+
+def cache_file(path, tag):
+    """
+    Returns the name of the file (in CACHE_DIR) in which the
+    parsed version of <path> is kept: memlist.csv =>
+    memlist.csv.<hash of its directory>.csv.cache
+    """
+    head, tail = os.path.split(os.path.abspath(path))
+    return os.path.join(CACHE_DIR, '{}.{}.{}{}'.format(
+        tail, hashlib.sha256(head.encode(ENCODING)).hexdigest()[:16],
+        tag, CACHE_SUFFIX))
+
+
+def private(path):
+    """
+    True if <path> is owned by the user and can't be written to
+    by anyone else (so what's in it can be trusted.)
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if hasattr(os, 'getuid') and stat.st_uid != os.getuid():
+        return False
+    return not stat.st_mode & 0o022
+
+
+def cache_dir():
+    """
+    Returns CACHE_DIR (created, readable by the user only, if
+    need be) or None if it's not private (see above.)
+    """
+    try:
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+    except OSError:
+        return None
+    return CACHE_DIR if private(CACHE_DIR) else None
+
+
+def file_signature(path):
+    """
+    Returns a tuple (path, mtime, size) which is cheap to get and
+    almost always enough to tell if a file has changed.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def file_hash(path=None, content=None):
+    """
+    Returns the sha256 hex digest of a file's content.
+    Provide either the file name (<path>) or its <content> (bytes.)
+    """
+    if content is None:
+        with open(path, 'rb') as stream:
+            content = stream.read()
+    return hashlib.sha256(content).hexdigest()
+
+
+def _read_entry(c_file):
+    if not (private(os.path.dirname(c_file)) and private(c_file)):
+        return None
+    try:
+        with open(c_file, 'rb') as stream:
+            entry = pickle.load(stream)
+    except (OSError, EOFError, pickle.UnpicklingError,
+            AttributeError, ImportError, IndexError):
+        return None
+    if (not isinstance(entry, dict)
+            or entry.get('version') != CACHE_VERSION):
+        return None
+    return entry
+
+
+def _write_entry(c_file, entry):
+    """
+    Written to a temporary file which is then renamed so a
+    reader never sees a partially written cache.
+    Failure to write (read only directory etc) is not an error.
+    """
+    if cache_dir() is None:
+        return
+    # Named for the process & thread: several may write at once.
+    temp = '{}.{}.{}.tmp'.format(c_file, os.getpid(),
+                                 threading.get_ident())
+    try:
+        with open(os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                          0o600), 'wb') as stream:
+            pickle.dump(entry, stream, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, c_file)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+
+
+def load(path, parse, tag):
+    """
+    Returns parse(<text of path>), using the cache if possible.
+    <parse> must accept the file content (a string) and return
+    something that can be pickled.
+    <tag> distinguishes different parsers of the same file.
+    """
+    signature = file_signature(path)
+    key = (signature[0], tag)
+    entry = _memo.get(key)
+    if entry and entry['signature'] == signature:
+        return entry['payload']
+    c_file = cache_file(path, tag)
+    if ENABLED and not entry:
+        entry = _read_entry(c_file)
+    if entry and entry['signature'] == signature:
+        _memo[key] = entry
+        return entry['payload']
+    with open(path, 'rb') as stream:
+        content = stream.read()
+    digest = file_hash(content=content)
+    if entry and entry['hash'] == digest:
+        # Touched but not changed: just record the new signature.
+        entry['signature'] = signature
+    else:
+        entry = dict(
+            version=CACHE_VERSION,
+            signature=signature,
+            hash=digest,
+            payload=parse(content.decode(ENCODING)),
+            )
+    if ENABLED:
+        _write_entry(c_file, entry)
+    _memo[key] = entry
+    return entry['payload']
+
+
+def get_snapshot(path, tag):
+    """
+    Returns what was last saved (by save_snapshot) under <tag>
+    for <path>; None if nothing has been (or can't be read.)
+    Unlike <load>, no check is made against <path> itself: the
+    client keeps track of what its snapshot depends on.
+    """
+    if not ENABLED:
+        return None
+    entry = _read_entry(cache_file(path, tag))
+    if entry is None:
+        return None
+    return entry.get('payload')
+
+
+def save_snapshot(path, tag, payload):
+    """
+    Keeps <payload> (which must be picklable) in the cache (under
+    <tag> for <path>) for get_snapshot to retrieve.
+    """
+    if ENABLED:
+        _write_entry(cache_file(path, tag),
+                     dict(version=CACHE_VERSION, payload=payload))
+
+
+def forget(path=None):
+    """
+    Drops the in memory copy of <path> (or of everything if no
+    <path> is given.)  The cache file itself is left in place.
+    """
+    if path is None:
+        _memo.clear()
+        return
+    path = os.path.abspath(path)
+    for key in [key for key in _memo if key[0] == path]:
+        del _memo[key]
+
+
+def parse_csv(text):
+    """
+    Parses the text of a csv file (with a header line) into a
+    dict with keys:
+        'fieldnames': a tuple of the field names
+        'rows': a list of tuples, one per (non blank) data row.
+    Values are interned: the many repeats (of states, towns,
+    stati, dues...) are then all the one string object, in
+    memory and (since pickle keeps track) in the cache file.
+    """
+    reader = csv.reader(io.StringIO(text, newline=''))
+    try:
+        fieldnames = tuple(map(sys.intern, next(reader)))
+    except StopIteration:
+        fieldnames = ()
+    rows = [tuple(map(sys.intern, row)) for row in reader if row]
+    return dict(fieldnames=fieldnames, rows=rows)
+
+
+def get_table(infile):
+    """
+    Returns the parsed version of the csv file <infile>.
+    (See parse_csv for its format.)
+    """
+    return load(infile, parse_csv, 'csv')
+
+
+def row2record(fieldnames, row, factory=dict):
+    """
+    Returns a dict exactly as csv.DictReader would for <row>:
+    missing fields get None, surplus values are listed under None.
+    <factory> can be any dict (sub)class.
+    """
+    record = factory(zip(fieldnames, row))
+    n_fields = len(fieldnames)
+    n_values = len(row)
+    if n_fields < n_values:
+        record[None] = list(row[n_fields:])
+    elif n_fields > n_values:
+        for key in fieldnames[n_values:]:
+            record[key] = None
+    return record
+
+
+def table_records(table, factory=dict, start=0, stop=None):
+    """
+    A generator yielding a fresh dict (of type <factory>) for
+    each row (or each of rows[<start>:<stop>]) of <table> (so
+    collectors are free to modify what they are given.)
+    """
+    fieldnames = table['fieldnames']
+    for row in itertools.islice(table['rows'], start, stop):
+        yield row2record(fieldnames, row, factory)
+
+
+def projected_records(table, fields, factory=dict,
+                      start=0, stop=None):
+    """
+    Like table_records but each record has only <fields> (in that
+    order.)  Field positions are looked up once rather than a
+    dict of every field being built for each row.  As with
+    row2record, a field missing from a (short) row is None; a
+    field not in the header at all is left out.
+    """
+    fieldnames = table['fieldnames']
+    fields = [field for field in fields if field in fieldnames]
+    index = [fieldnames.index(field) for field in fields]
+    if not index:
+        for row in itertools.islice(table['rows'], start, stop):
+            yield factory()
+        return
+    n_needed = max(index) + 1
+    # itemgetter of a single index returns a value, not a tuple.
+    get = operator.itemgetter(*index, index[0])
+    for row in itertools.islice(table['rows'], start, stop):
+        if len(row) >= n_needed:
+            yield factory(zip(fields, get(row)))
+        else:
+            yield factory((field, row[i] if i < len(row) else None)
+                          for field, i in zip(fields, index))
+
+
+def records(infile, factory=dict):
+    """
+    Equivalent of iterating over csv.DictReader(open(infile)).
+    """
+    return table_records(get_table(infile), factory)
+
+
+if __name__ == "__main__":
+    print("cache.py compiles OK.")
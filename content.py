@@ -28,14 +28,21 @@ A number of 'dict's are being used:
 
 Other items:
     email_header
+    class: Renderer(template)  a template compiled (once) for
+        rendering record after record: render(record) and
+        render_many(records)
     func: prepare_letter_template(which_letter, printer):
     func: prepare_email_template(which_letter):
+    (both return a Renderer.)
 
 Printing Letters:
 Both the printer and the windowed envelope being used must be taken
 into consideration.
 """
 
+import re
+import string
+import functools
 import helpers
 import member
 import rbc
@@ -569,6 +576,12 @@ attribute of an instance of utils.Club for mailing purposes.
           'email' email only,
           'usps' mail only,
        or 'one_only' email if available, otherwise usps.
+      broadcast: (optional) if True, emails that are the same
+          but for the salutation are sent in Bcc batches (see
+          member.batch_emails); otherwise (the default) each
+          member gets an email of their own.
+      salutation: (optional) used in place of 'Dear {first}
+          {last},' by emails sent in Bcc batches.
   One of the following becomes the 'which' attribute
   of a Membership instance.
 """
@@ -609,6 +622,7 @@ content_types = dict(  # which_letter
         "funcs": [member.std_mailing_func, ],
         "test": member.is_gmail_user,
         "e_and_or_p": "email",
+        "broadcast": True,
         },
     bad_address={
         "subject": "Address correction requested.",
@@ -638,6 +652,7 @@ content_types = dict(  # which_letter
         "funcs": (member.std_mailing_func,),
         "test": lambda record: True if record["email"] else False,
         "e_and_or_p": "email",
+        "broadcast": True,
         },
     happyNY_and_0th_fees_request={
         "subject": "Happy New Year from the Bolinas R&B Club",
@@ -998,6 +1013,107 @@ printers = dict(
 # ## ... end of printers (dict specifying printer being used.)
 
 
+FIELD_KEY = re.compile(r'[^.\[]*')  # What precedes any .attr or [index]
+
+
+def field_key(field):
+    """
+    Returns the record key of format <field> (eg: 'first' of
+    'first', 'first[0]' or 'first.upper'.)
+    """
+    return FIELD_KEY.match(field).group()
+
+
+class Renderer(object):
+    """
+    A str.format style <template> compiled once so as to be
+    rendered for record after record: its static text is split
+    from its format fields and the record keys it needs are
+    known up front (self.fields) so missing ones can be reported
+    (see check) before any rendering is done.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.literals = []  # Static text before each field (& after
+        self.getters = []   # the last): (key, format string or None)
+        self.fields = []    # Record keys needed, in order of use.
+        literal = ''
+        for text, field, spec, conversion in (
+                string.Formatter().parse(template)):
+            literal += text
+            if field is None:
+                continue
+            self.literals.append(literal)
+            literal = ''
+            key = field_key(field)
+            self.need(key)
+            if field == key and not spec and not conversion:
+                self.getters.append((key, None))  # The usual case.
+                continue
+            for _, nested, _, _ in string.Formatter().parse(spec or ''):
+                if nested:
+                    self.need(field_key(nested))
+            self.getters.append((key, '{{{}{}{}}}'.format(
+                field, '!' + conversion if conversion else '',
+                ':' + spec if spec else '')))
+        self.literals.append(literal)
+
+    def need(self, key):
+        if key not in self.fields:
+            self.fields.append(key)
+
+    def missing(self, keys):
+        """
+        Returns a list of the fields this template needs that
+        aren't among <keys>.
+        """
+        keys = set(keys)
+        return [key for key in self.fields if key not in keys]
+
+    def check(self, keys, what='template'):
+        """
+        Raises KeyError naming every field <what> needs that
+        isn't among <keys>.
+        """
+        missing = self.missing(keys)
+        if missing:
+            raise KeyError("{} needs field(s) not provided: {}"
+                           .format(what, ', '.join(missing)))
+
+    def render(self, record):
+        """
+        Same as self.template.format(**record).
+        """
+        ret = [self.literals[0]]
+        try:
+            for (key, fmt), literal in zip(self.getters,
+                                           self.literals[1:]):
+                if fmt is None:
+                    ret.append(format(record[key]))
+                else:
+                    ret.append(fmt.format_map(record))
+                ret.append(literal)
+        except KeyError:
+            self.check(record.keys())
+            raise
+        return ''.join(ret)
+
+    def render_many(self, records):
+        """
+        Returns a list: render(record) for each of <records>.
+        """
+        return [self.render(record) for record in records]
+
+
+@functools.lru_cache(maxsize=None)
+def compiled(template):
+    """
+    Returns the Renderer for <template> (compiled only once.)
+    """
+    return Renderer(template)
+
+
 def get_postscripts(which_letter):
     """
     Returns a list of lines representing the post scripts
@@ -1015,7 +1131,7 @@ def prepare_letter_template(which_letter, lpr):
     Prepares the template for a letter.
     <which_letter>: one of the <content_types> and
     <printer>: one of the keys to the <printers> dict
-    Returns a 'letter' /w formatting fields.
+    Returns a Renderer of the 'letter' /w formatting fields.
     """
     ret = [""] * lpr["top"]  # add blank lines at top
     # return address:
@@ -1040,20 +1156,21 @@ def prepare_letter_template(which_letter, lpr):
     ret.append(which_letter["from"]["mail_signature"])
     # post script:
     ret.extend(get_postscripts(which_letter))
-    return '\n'.join(ret)
+    return compiled('\n'.join(ret))
 
 
 def prepare_email_template(which_letter):
     """
     Prepares the template for an email.
     Used by utils.prepare_mailing_cmd,
-    Format fields are subsequently filled by **record.
+    Returns a Renderer: format fields are subsequently filled
+    by its render(record) method.
     """
     ret = ["Dear {first} {last},"]
     ret.append(which_letter["body"])
     ret.append(which_letter["from"]["email_signature"])
     ret.extend(get_postscripts(which_letter))
-    return '\n'.join(ret)
+    return compiled('\n'.join(ret))
 
 
 def contents():
@@ -1106,14 +1223,14 @@ Certainly nothing very serious!
 Just a lot of junk.""",
         )
     print("Letter follows...")
-    print(letter.format(**rec))
+    print(letter.render(rec))
     with open("letter2print", 'w') as fout:
-        fout.write(helpers.indent(letter.format(**rec),
+        fout.write(helpers.indent(letter.render(rec),
                                   lpr['indent']))
     print("Email follows...")
-    print(email.format(**rec))
+    print(email.render(rec))
     with open("email2print", 'w') as fout:
-        fout.write(email.format(**rec))
+        fout.write(email.render(rec))
 
 
 duplicate_email_template = """From: rodandboatclub@gmail.com
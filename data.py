@@ -9,11 +9,21 @@ collecting data for presentation.
 """
 
 import os
+import io
+import re
 import sys
 import csv
+import copy as copy_module
 import json
+import time
+import pickle
+import concurrent.futures
+import cache
 import helpers
 import member
+import money
+import profiler
+import reconcile
 import sys_globals as glbs
 import rbc
 
@@ -49,47 +59,41 @@ def ck_malformed(club):
 def ck_fee_paying_labels(club):
     """
     Checks fee paying labels against memlist data.
-    Appends results to club.ret.
+    Appends results to club.ret (and club.diffs.)
     """
     fee_paying_contacts = get_fee_paying_contacts(club)
-    fee_paying_contacts_set = set(fee_paying_contacts.keys())
-    fee_paying_m_set = club.fee_category_by_m.keys()
     no_email_recs = club.usps_only  # a list of records
 #   _ = input("so far so good")
     no_email_set = {member.fstrings['key'].format(**rec)
                     for rec in no_email_recs}
-    fee_paying_w_email_set = fee_paying_m_set - no_email_set
     collector = {}
-    for name in sorted(fee_paying_w_email_set):
-        collector[name] = [key for key in 
-                sorted(club.fee_category_by_m[name].keys())]
+    for name, fees in club.fee_category_by_m.items():
+        if name not in no_email_set:
+            collector[name] = sorted(fees.keys())
 #   helpers.store(collector, 'fee-paying-members.txt')
-    if not club.fee_paying_contacts==collector:
+    result = reconcile.compare('fee_paying_labels',
+                               fee_paying_contacts, collector,
+                               'contacts', 'membership')
+    club.diffs.append(result)
+    if reconcile.differs(result):
         club.ret.append(
                 "\nfee_paying_contacts|=fee paying members")
-    fee_mismatches = helpers.check_sets(
-        fee_paying_contacts_set,
-        fee_paying_w_email_set,
-        "Fee paying contacts not in member listing",
-        "Fee paying members not in google contacts",
-        )
-    if fee_mismatches:
-        only_in_contact_set = (fee_paying_contacts_set
-                                    - fee_paying_w_email_set)
-        only_in_paying_w_email_set = (fee_paying_w_email_set
-                                    - fee_paying_contacts_set)
+    if reconcile.keys_differ(result):
         helpers.add_header2list(
             "Memlist vs contacts fee label mimatches",
             club.ret, underline_char='=', extra_line=True)
-        if only_in_contact_set:
+        if result['only_left']:
             club.ret.append("Only in Contacts:")
-            for item in only_in_contact_set:
+            for item in result['only_left']:
                 club.ret.append("\t{}".format(repr(item)))
-        if only_in_paying_w_email_set:
+        if result['only_right']:
             club.ret.append("Only in Member DB:")
-            for item in only_in_paying_w_email_set:
+            for item in result['only_right']:
                 club.ret.append("\t{}".format(repr(item)))
-        club.ret.extend(fee_mismatches)
+        club.ret.extend(reconcile.listing(result,
+            "Fee paying contacts not in member listing",
+            "Fee paying members not in google contacts",
+            ))
     else:
         club.ok.append(
                 'No memlist vs contacts fee label mismatches')
@@ -100,31 +104,35 @@ def ck_gmail(club):
     Checks that the main db matches gmail with regard to
     members & applicants and other stati (e.g. inactive.)
     """
-    applicant_set = club.g_by_group[club.APPLICANT_GROUP]
-    applicant_mismatches = helpers.check_sets(
-        applicant_set,
-        club.applicant_with_email_set,  # populated by 
+    applicants = reconcile.compare('gmail_applicants',
+        club.g_by_group[club.APPLICANT_GROUP],
+        club.applicant_with_email_set,  # populated by
                                         # gather_membership_data
+        'contacts', 'membership')
+    applicant_mismatches = reconcile.listing(applicants,
         "Applicant(s) in Google Contacts not in Member Listing",
         "Applicant(s) in Member Listing not in Google Contacts"
         )
     # Deal with members...
-    member_mismatches = helpers.check_sets(
+    members = reconcile.compare('gmail_members',
         club.g_by_group[club.MEMBER_GROUP],
         club.member_with_email_set,
+        'contacts', 'membership')
+    member_mismatches = reconcile.listing(members,
         "Member(s) in Google Contacts not in Member Listing",
         "Member(s) in Member Listing not in Google Contacts"
         )
 
-    g_inactive = club.g_by_group[club.INACTIVE_GROUP]
-    m_inactive = set(club.ms_by_status['i'])
-    special_status_mismatches = helpers.check_sets(
-        g_inactive,
-        m_inactive,
+    inactive = reconcile.compare('gmail_inactive',
+        club.g_by_group[club.INACTIVE_GROUP],
+        set(club.ms_by_status['i']),
+        'contacts', 'membership')
+    special_status_mismatches = reconcile.listing(inactive,
         "{} doesn't match membership listing"
             .format(club.INACTIVE_GROUP),
         "'m' status (inactive) not reflected in google contacts"
         )
+    club.diffs.extend((applicants, members, inactive))
 
 
     if special_status_mismatches:
@@ -147,8 +155,6 @@ def ck_gmail(club):
 
 
 def ck_applicants(club):
-    g_members = club.g_by_group[club.MEMBER_GROUP]
-    g_applicants = club.g_by_group[club.APPLICANT_GROUP]
     keys = sorted(club.ms_by_status.keys(), reverse=True)
     for key in keys:
         if not (key in member.APPLICANT_SET):
@@ -157,11 +163,15 @@ def ck_applicants(club):
             club.applicants_by_status, ('m', 'zae'))
     applicants_by_status = helpers.lists2sets(applicants_by_status)
     ms_by_status_sets = helpers.lists2sets(club.ms_by_status)
-    if applicants_by_status != ms_by_status_sets:
+    result = reconcile.compare('applicants',
+                               applicants_by_status, ms_by_status_sets,
+                               "applicant_spot", "membership_spot")
+    reconcile.with_values(result,
+                          applicants_by_status, ms_by_status_sets)
+    club.diffs.append(result)
+    if reconcile.differs(result):
         club.ret.append("\nApplicant problem:")
-        club.ret.append(helpers.compare_dicts(
-            applicants_by_status, ms_by_status_sets,
-            "applicant_spot", "membership_spot"))
+        club.ret.append(reconcile.by_key(result))
     else:
         club.ok.append("No applicant problem.")
 
@@ -169,13 +179,15 @@ def ck_applicants(club):
 def ck_fees_spots(club):
     """
     Checks extra fees SPoTs against memlist data.
-    Appends results to club.ret.
-    """
-    if (club.fees_by_category !=
-            club.ms_by_fee_category):
-        club_keys = set(club.fees_by_category.keys())
-        file_keys = set(club.ms_by_fee_category.keys())
-        if club_keys == file_keys:
+    Appends results to club.ret (and club.diffs.)
+    """
+    by_category = reconcile.compare('fees_by_category',
+                                    club.fees_by_category,
+                                    club.ms_by_fee_category,
+                                    'extra_fees_files', 'membership')
+    club.diffs.append(by_category)
+    if reconcile.differs(by_category):
+        if not reconcile.keys_differ(by_category):
             club.not_matching_notice = (
                 "Fee amounts (by category) don't match")
             # traverse keys and report by name later
@@ -188,30 +200,24 @@ def ck_fees_spots(club):
             club.ret.append(repr(club.ms_by_fee_category))
     else:
         club.ok.append("No fees by category problem.")
-    if (club.fees_by_name != club.fee_category_by_m):
-        club_keys = set(club.fees_by_name.keys())
-        file_keys = set(club.fee_category_by_m.keys())
-        if club_keys == file_keys:
+    # Amounts are compared (once, by compare) for every name.
+    by_name = reconcile.compare('fees_by_name',
+                                club.fees_by_name,
+                                club.fee_category_by_m,
+                                'extra_fees_files', 'membership')
+    club.diffs.append(by_name)
+    if reconcile.differs(by_name):
+        if not reconcile.keys_differ(by_name):
             if club.fee_details:
                 club.not_matching_notice = "Fee amounts mismatch"
-                # traverse and specify mismatches
-                sorted_club_keys = sorted(
-                        [key for key in club_keys])
-                for key in sorted_club_keys:
-                    if (club.fees_by_name[key] !=
-                            club.fee_category_by_m[key]):
-                        club.varying_amounts.append('{}: {} != {}'
-                            .format(
-                                key,
-                                club.fees_by_name[key],
-                                club.fee_category_by_m[key]
-                                ))
+                for key, from_files, from_memlist in (
+                                            by_name['mismatched']):
+                    club.varying_amounts.append('{}: {} != {}'
+                        .format(key, from_files, from_memlist))
             else:
                 club.not_matching_notice = (
             "Fee amount mismatch (try -d option for details)")
         else:
-            club_set = set(club_keys)
-            file_set = set(file_keys)
             club.ret.append("\nFees problem (by name):")
             club.ret.append(
                     "club.fee_category_by_m[club.NAME_KEY]:")
@@ -276,25 +282,33 @@ def applicants_by_status(applicant_data):
     return collector
 
 
-def gather_membership_data(club):    # used by ck_data #
+def membership_collectors():
     """
-    Gathers info from club.infile (default club.MEMBERSHIP_SPoT)
-    into attributes of <club>.
+    Returns the functions gather_membership_data applies.
+    (A function since member imports this module.)
     """
-    club.previous_name = ''
-    err_code = member.traverse_records(club.MEMBERSHIP_SPoT,
-        (
+    return (
         member.add2email_by_m,
         member.get_usps,  # > usps_only & usps_csv
         member.add2fee_data,  # > fee_category_by_m(ember)
-                              # & ms_by_fee_category  
+                              # & ms_by_fee_category
         member.add2stati_by_m,
         member.add2ms_by_status, #  also > entries_w_status{}
         member.increment_napplicants,
         member.add2malformed,
         member.add2member_with_email_set, # also > no_email_set
         member.add2applicant_with_email_set,
-        ), club)
+        )
+
+
+def gather_membership_data(club):    # used by ck_data #
+    """
+    Gathers info from club.infile (default club.MEMBERSHIP_SPoT)
+    into attributes of <club>.
+    """
+    club.previous_name = ''
+    err_code = member.traverse_records(club.MEMBERSHIP_SPoT,
+        membership_collectors(), club)
     if err_code:
         print("Error condition! #{}".format(err_code))
 
@@ -341,35 +355,112 @@ def mail_only_keys(club):
     return helpers.collect_last_first_keys(club.usps_only)
 
 
-def gather_contacts_data(club):    # used by ck_data #
+CONTACTS_COLUMNS = ("Given Name", "Additional Name", "Family Name",
+                    "Name Suffix", "E-mail 1 - Value",
+                    "Group Membership")  # The only ones used.
+
+
+def parse_contacts(text):
+    """
+    # used (via get_contacts) by gather_contacts_data #
+    Parses the <text> of a Google contacts export (as does
+    get_gmail_record, one row at a time and reading only the
+    CONTACTS_COLUMNS) into a dict with keys:
+        'labels': a tuple of the (interned) labels (groups) used
+        'names': a list of names ('last,first'), one per contact
+        'emails': a list of their emails
+        'masks': a list of integer bitsets of each one's labels:
+            bit n set => has labels[n]
+    """
+    reader = csv.reader(io.StringIO(text, newline=''))
+    try:
+        header = next(reader)
+    except StopIteration:
+        header = []
+    indices = [header.index(column) for column in CONTACTS_COLUMNS]
+    bits = {}  # label: bit
+    names = []
+    emails = []
+    masks = []
+    for row in reader:
+        if not row:
+            continue
+        n_values = len(row)
+        given, additional, family, suffix, email, groups = [
+            row[i] if i < n_values else '' for i in indices]
+        groups = groups.split(" ::: ")
+        if groups and groups[-1] == '* myContacts':
+            groups = groups[:-1]
+        mask = 0
+        for label in groups:
+            bit = bits.get(label)
+            if bit is None:
+                bit = bits[sys.intern(label)] = 1 << len(bits)
+            mask |= bit
+        first_name = " ".join((given, additional)).strip()
+        last_name = " ".join((family, suffix)).strip()
+        names.append(sys.intern("{},{}".format(last_name, first_name)))
+        emails.append(email)
+        masks.append(mask)
+    return dict(labels=tuple(bits), names=names, emails=emails,
+                masks=masks)
+
+
+def get_contacts(contacts_spot):
     """
-    The club attributes populated:
-        g_by_name: /w values indexed by:
-              ["email"] => email
-              ["groups"] => set of labels
-        g_by_group: keyed by labels /w values sets of names
+    Returns the parsed version (see parse_contacts) of the Google
+    contacts export <contacts_spot>: parsed only if it's changed.
     """
-    club.gmail_by_name = dict()  # => string
-    club.groups_by_name = dict()  # => set
+    return cache.load(contacts_spot, parse_contacts, 'contacts')
 
-    club.g_by_group = dict()  # >set of names
 
-    # Traverse contacts.csv => g_by_name
-    with open(club.contacts_spot, 'r',
-        encoding='utf-8', newline='') as file_obj:
-        google_reader = csv.DictReader(file_obj)
-        if not club.quiet:
-            print('DictReading Google contacts file "{}"...'
-                .format(file_obj.name))
-        for g_rec in google_reader:
-            g_dict = get_gmail_record(g_rec)
+_label_sets = {}  # (mask, labels) => frozenset (see labels_of)
 
-            club.gmail_by_name[g_dict['gname']] = g_dict['g_email']
-            club.groups_by_name[g_dict['gname']] = g_dict['groups']
 
-            for key in g_dict["groups"]:
-                _ = club.g_by_group.setdefault(key, set())
-                club.g_by_group[key].add(g_dict["gname"])
+def labels_of(mask, labels):
+    """
+    Returns the frozenset of <labels> indicated by the bits of
+    <mask>.  Contacts with the same labels share the one set.
+    """
+    key = (mask, labels)
+    ret = _label_sets.get(key)
+    if ret is None:
+        ret = _label_sets[key] = frozenset(
+                label for n, label in enumerate(labels)
+                if mask & (1 << n))
+    return ret
+
+
+def gather_contacts_data(club):    # used by ck_data #
+    """
+    The club attributes populated:
+        gmail_by_name: names => email
+        groups_by_name: names => (frozen)set of labels
+        g_by_group: keyed by labels /w values sets of names
+        contact_labels: the labels used by the contacts and
+        label_bits_by_name: names => bitset of their labels
+            (bit n set => has contact_labels[n])
+    """
+    if not club.quiet:
+        print('DictReading Google contacts file "{}"...'
+            .format(club.contacts_spot))
+    contacts = get_contacts(club.contacts_spot)
+    labels = club.contact_labels = contacts['labels']
+    names = contacts['names']
+    masks = contacts['masks']
+    club.gmail_by_name = dict(zip(names, contacts['emails']))
+    club.label_bits_by_name = dict(zip(names, masks))
+    club.groups_by_name = {name: labels_of(mask, labels)
+                           for name, mask in
+                           club.label_bits_by_name.items()}
+    club.g_by_group = {label: set() for label in labels}
+    by_bit = {1 << n: club.g_by_group[label]
+              for n, label in enumerate(labels)}  # bit => set of names
+    for name, mask in zip(names, masks):
+        while mask:
+            bit = mask & -mask  # lowest bit set
+            by_bit[bit].add(name)
+            mask ^= bit
 
 
 def move_date_listing_into_record(dates, record):
@@ -394,10 +485,42 @@ def move_date_listing_into_record(dates, record):
     return record
 
 
+class ParseError(ValueError):
+    """
+    Raised (or collected) when a line of the applicant or sponsor
+    SPoT can't be parsed.  <line_no> is 0 if not known.
+    """
+    def __init__(self, reason, line, line_no=0):
+        super().__init__(reason, line, line_no)
+        self.reason = reason
+        self.line = line
+        self.line_no = line_no
+
+    def __str__(self):
+        if self.line_no:
+            return "line {}: {} ({!r})".format(
+                    self.line_no, self.reason, self.line)
+        return "{} ({!r})".format(self.reason, self.line)
+
+
+APPLICANT_LINE = re.compile(r"""
+    (?P<first>[^\s|]+) \s+ (?P<last>[^\s|]+) [^|]*  # names (any more
+                                                   # are ignored)
+    (?P<fields> (?: \| [^|]* )* )                  # '|' separated
+    """, re.VERBOSE)
+SPONSOR_LINE = re.compile(r"""
+    (?P<first>[^\s:]+) \s+ (?P<last>[^\s:]+) [^:]*  # applicant
+    : (?P<sponsors> [^:]* )                         # sponsors
+    (?: : .* )?                # (anything after another ':' ignored)
+    """, re.VERBOSE)
+# Applicant status by number of dates listed:
+STATUS_BY_N_DATES = ('a-', 'a0', 'a1', 'a2', 'a3', 'ad', 'm')
+
+
 def applicant_data_line2record(line):
     """
-    # used only by populate_applicant_data #
-    Assumes a valid line from the Data/applicant.txt file.
+    # used by (iter_applicants &) sqldb #
+    Assumes a line from the Data/applicant.txt file.
     Returns a dict with keys as listed in 
     Club.APPLICANT_DATA_FIELD_NAMES = (
         "first", "last", "status",
@@ -406,70 +529,100 @@ def applicant_data_line2record(line):
         "inducted", "dues_paid",  #} hasn't happened.
         "sponsor1", "sponsor2",   # empty strings if not available
         )
-    Note: terminates program if no dates are provided.
-    """
-    ret = {}
-    for key in rbc.Club.APPLICANT_DATA_FIELD_NAMES:
-        ret[key] = ''
-    parts = line.split(glbs.SEPARATOR)
-    while not parts[-1]:  # lose trailing empty fields
-        parts = parts[:-1]
-    parts = [part.strip() for part in parts]
-    names = parts[0].split()
-#   key = "{}, {}".format(names[1], names[0]) 
-#   print(names)
-    ret['first'] = names[0]
-    ret['last'] = names[1]
-    dates = parts[1:]
-    l = len(dates)
-    if parts[-1].startswith("Appl"):
-        dates = dates[:-1]  # waste the text
-        special_status = "zae"  # see members.STATUS_KEY_VALUES
-        l -= 1
-    elif parts[-1].startswith("w"):
-        dates = dates[:-1]
-        special_status = "aw"
-        l -= 1
-    else:
-        special_status = ''
-    if l == 0:       # Should never have an entry /w no dates.
-        print("Entry for applicant {}{} is without any dates."
-                .format(names[0], names[1]))
-        sys.exit()
-    elif l == 1:               # one date listed
-        status = "a-"
-    elif l == 2:
-        status = "a0"
-    elif l == 3:
-        status = "a1"
-    elif l == 4:
-        status = "a2"
-    elif l == 5:
-        status = "a3"
-    elif l == 6:
-        status = "ad"
-    elif l == 7:
-        status = "m"
-    else:
-        print("Entry for {}{} has an invalid number of dates."
-                .format(names[0], names[1]))
-        sys.exit()
+    Raises ParseError if the line is malformed (e.g. has no dates.)
+    """
+    match = APPLICANT_LINE.fullmatch(line.strip())
+    if not match:
+        raise ParseError("not 'first last | date | ...'", line)
+    ret = dict.fromkeys(rbc.Club.APPLICANT_DATA_FIELD_NAMES, '')
+    ret['first'] = match['first']
+    ret['last'] = match['last']
+    parts = match['fields'].split(glbs.SEPARATOR)[1:]
+    while parts and not parts[-1]:  # lose trailing empty fields
+        parts.pop()
+    dates = [part.strip() for part in parts]
+    special_status = ''
+    if dates:
+        if dates[-1].startswith("Appl"):
+            dates.pop()  # waste the text
+            special_status = "zae"  # see members.STATUS_KEY_VALUES
+        elif dates[-1].startswith("w"):
+            dates.pop()
+            special_status = "aw"
+    if not dates:       # Should never have an entry /w no dates.
+        raise ParseError("entry without any dates", line)
+    if len(dates) > len(STATUS_BY_N_DATES):
+        raise ParseError("invalid number of dates", line)
     move_date_listing_into_record(dates, ret)
-    if special_status:
-        ret['status'] = special_status
-    else:
-        ret['status'] = status
+    ret['status'] = (special_status
+                     or STATUS_BY_N_DATES[len(dates) - 1])
     return ret
 
 
+def iter_applicants(lines, errors):
+    """
+    A generator: yields a record (see applicant_data_line2record)
+    for each of the (useful) <lines> of the applicant SPoT.  Lines
+    that can't be parsed are skipped: a ParseError (with its line
+    number) is appended to <errors> for each.
+    """
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            yield applicant_data_line2record(line)
+        except ParseError as error:
+            errors.append(ParseError(error.reason, line, line_no))
+
+
+def parse_applicants(text):
+    """
+    # used (via get_applicants) by populate_applicant_data #
+    Parses the <text> of the applicant SPoT.  Returns a dict:
+        records: list of records in the order listed
+        by_name: 'last,first' => record (the last listed)
+        by_status: status => list of 'last,first' names
+        errors: list of ParseErrors (of lines that were skipped)
+    """
+    errors = []
+    records = list(iter_applicants(text.splitlines(), errors))
+    by_name = {}
+    for record in records:
+        by_name[member.fstrings['key'].format(**record)] = record
+    by_status = {}
+    for name, record in by_name.items():
+        by_status.setdefault(record['status'], []).append(name)
+    return dict(records=records, by_name=by_name,
+                by_status=by_status, errors=errors)
+
+
+def get_applicants(applicant_spot):
+    """
+    Returns the parsed version (see parse_applicants) of
+    <applicant_spot>: parsed only if it's changed.
+    """
+    return cache.load(applicant_spot, parse_applicants, 'applicants')
+
+
+def report_parse_errors(errors, spot):
+    """
+    Prints the ParseErrors (if any) found in <spot>.
+    """
+    for error in errors:
+        print('Skipping malformed entry in "{}": {}'
+              .format(spot, error))
+
+
 def populate_applicant_data(club):
     """
     # used by new code as well as ck_data #
-    Reads applicant data file populating two attributes:
+    Reads applicant data file populating attributes:
     1. club.applicant_data: a dict with keys == applicants
         and each value is a record with fields as listed in
         rbc.Club.APPLICANT_DATA_FIELD_NAMES.
     2. club.applicant_data_keys
+    3. club.applicant_errors: ParseErrors of lines skipped.
     Note: Sponsor data is included if populate_sponsor_data has
     already been run, othwise, the values remain as empty strings.
     """
@@ -478,25 +631,48 @@ def populate_applicant_data(club):
     if sponsors:
         sponsored = club.sponsors_by_applicant.keys()
     club.applicant_data = {}
-    with open(club.applicant_spot, 'r') as stream:
-        if not club.quiet:
-            print('Reading file "{}"...'.format(stream.name))
-        for line in helpers.useful_lines(stream, comment='#'):
-            rec = applicant_data_line2record(line)
-            if (not(rec['status'] in member.APPLICANT_SET)
-            and not club.all_applicants):
-                continue
-            name_key = member.fstrings['key'].format(**rec)
-            if sponsors and name_key in sponsored:
-                rec = add_sponsors(rec,
-                        club.sponsors_by_applicant[name_key])
-            club.applicant_data[name_key] = rec
-        club.applicant_data_keys = club.applicant_data.keys()
+    if not club.quiet:
+        print('Reading file "{}"...'.format(club.applicant_spot))
+    applicants = get_applicants(club.applicant_spot)
+    club.applicant_errors = applicants['errors']
+    report_parse_errors(club.applicant_errors, club.applicant_spot)
+    for rec in applicants['records']:
+        if (not(rec['status'] in member.APPLICANT_SET)
+        and not club.all_applicants):
+            continue
+        name_key = member.fstrings['key'].format(**rec)
+        if sponsors and name_key in sponsored:
+            rec = add_sponsors(rec,
+                    club.sponsors_by_applicant[name_key])
+        else:
+            rec = dict(rec)  # Leave the cached one as is.
+        club.applicant_data[name_key] = rec
+    club.applicant_data_keys = club.applicant_data.keys()
+
+
+def parse_dict(text, sep=":", maxsplit=1):
+    """
+    # used by get_dict & parse_fees #
+    Parses <text> as described under get_dict.
+    """
+    ret = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] == '#': continue
+        parts = line.split(sep=sep, maxsplit=maxsplit)
+        if len(parts) != 2: assert False
+        names = parts[0].split()
+        try:
+            name_key = '{},{}'.format(names[1], names[0])
+        except IndexError:
+            _ = input("IndexError re line: '{}'"
+                    .format(line))
+        ret[name_key] = parts[1].strip()
+    return ret
 
 
 def get_dict(source_file, sep=":", maxsplit=1):
     """
-    # used by gather_extra_fees_data #
     A generic function to parse files.
     Blank lines or comments ('#') are ignored.
     All other lines must contains a 'first last' name followed by
@@ -507,21 +683,77 @@ def get_dict(source_file, sep=":", maxsplit=1):
     # Applicant data is populated one line at a time so this
     # function is not useful there
     """
-    ret = {}
     with open(source_file, 'r') as stream:
-        for line in stream:
-            line = line.strip()
-            if not line or line[0] == '#': continue
-            parts = line.split(sep=sep, maxsplit=maxsplit)
-            if len(parts) != 2: assert False
-            names = parts[0].split()
-            try:
-                name_key = '{},{}'.format(names[1], names[0])
-            except IndexError:
-                _ = input("IndexError re line: '{}'"
-                        .format(line))
-            ret[name_key] = parts[1].strip()
-    return ret
+        return parse_dict(stream.read(), sep=sep, maxsplit=maxsplit)
+
+
+def parse_fees(text):
+    """
+    # used (via get_fees) by fee_index #
+    Parses the <text> of an extra fees SPoT: returns a dict keyed
+    by 'last,first' name with (int) amounts as values.
+    """
+    return {name: int(amount) for name, amount
+            in parse_dict(text).items()}
+
+
+def get_fees(fees_spot):
+    """
+    Returns the parsed version (see parse_fees) of <fees_spot>:
+    parsed only if it's changed.
+    """
+    return cache.load(fees_spot, parse_fees, 'fees')
+
+
+def fee_category(fees_spot):
+    """
+    Returns the fee category of <fees_spot>: its name less any
+    suffix (e.g. 'Data/dock.txt' => 'dock'.)
+    """
+    base, name = os.path.split(fees_spot)
+    return name.split('.')[0]
+
+
+def fee_index(club, _memo={}):
+    """
+    Returns the index of extra fees (from the files listed in
+    club.extra_fees_spots or, if set, from club.sqlite): a dict
+    with keys:
+        by_name: names => dicts of category => amount
+        by_category: categories => dicts of name => amount
+        totals: categories => total amount
+    Each file is parsed (see get_fees) only when it's changed and
+    the index is built again only if one of them has.  It's shared
+    by all callers so must not be modified.
+    """
+    database = getattr(club, 'sqlite', None)  # see sqldb.py
+    if database is None:
+        spots = tuple(club.extra_fees_spots)
+        fees = [get_fees(f) for f in spots]
+        saved = _memo.get(spots)
+        if saved and all(new is old for new, old
+                         in zip(fees, saved['fees'])):
+            return saved['index']
+    else:
+        spots = None
+        fees = [{name: int(amount) for name, amount
+                 in database.fees(fee_category(f)).items()}
+                for f in club.extra_fees_spots]
+    by_category = {}
+    by_name = {}
+    totals = {}
+    for f, amounts in zip(club.extra_fees_spots, fees):
+        cat = fee_category(f)
+        by_category.setdefault(cat, {}).update(amounts)
+        for name, amount in amounts.items():
+            by_name.setdefault(name, {})[cat] = amount
+    for cat, amounts in by_category.items():
+        totals[cat] = sum(amounts.values())
+    index = dict(by_name=by_name, by_category=by_category,
+                 totals=totals)
+    if spots is not None:
+        _memo[spots] = dict(fees=fees, index=index)
+    return index
 
 
 def gather_extra_fees_data(club):  # so far used only by ck_data
@@ -530,61 +762,27 @@ def gather_extra_fees_data(club):  # so far used only by ck_data
     #   "gather" when more than one attribute is populated.
     """
     Populates club attrs fees_by_name & fees_by_category
-    based on attr 'extra_fees_spots'..
+    based on attr 'extra_fees_spots' (see fee_index.)
     Tested by Tests.xtra_fees.py
     """
-    def category(f):
-        base, name = os.path.split(f)
-        res = name.split('.')[0]
-        return res
-
-    fees_by_category = {}
-    fees_by_name = {}
-
-    for f in club.extra_fees_spots:
-        res = get_dict(f)
-        cat = category(f)
-        for name, amt in res.items():
-            # populate fees_by_name:
-            _ = fees_by_name.setdefault(name, {})
-            fees_by_name[name][cat] = int(amt)
-            # populate fees_by_category
-            _ = fees_by_category.setdefault(cat, {})
-            fees_by_category[cat][name] = int(amt)
-    club.fees_by_category = fees_by_category
-    club.fees_by_name = fees_by_name
+    index = fee_index(club)
+    club.fees_by_category = index['by_category']
+    club.fees_by_name = index['by_name']
 
 
 def populate_extra_fees(club):
     """
     ## plan to REDACT this in favour of gether_extra_fees_data
     Assumes <club> has attribute 'extra_fees_spots'.
-    Populates club.by_name and club.by_category.
+    Populates club.by_name and club.by_category (see fee_index.)
     Note also member.add2fee_data which (upon data traversal)
     populates club.fee_category_by_m and club.ms_by_fee_category.
     Both produce dicts in the same formats.
     Tested by Tests.xtra_fees.py
     """
-    def category(f):
-        base, name = os.path.split(f)
-        res = name.split('.')[0]
-        return res
-
-    by_category = {}
-    by_name = {}
-
-    for f in club.extra_fees_spots:
-        res = get_dict(f)
-        cat = category(f)
-        for name, amt in res.items():
-            # populate by_name:
-            _ = by_name.setdefault(name, {})
-            by_name[name][cat] = int(amt)
-            # populate_by_category
-            _ = by_category.setdefault(cat, {})
-            by_category[cat][name] = int(amt)
-    club.by_category = by_category
-    club.by_name = by_name
+    index = fee_index(club)
+    club.by_category = index['by_category']
+    club.by_name = index['by_name']
 
 
 def output_extra_fees_report_by_name(club):
@@ -707,34 +905,6 @@ def add_sponsors(rec, sponsors):
     ret['sponsor2'] = first_last[1]
     return ret
 
-redacted = '''
-def populate_applicant_data(club):
-    """
-    Reads applicant data file populating two attributes:
-    1. club.applicant_data: a dict with keys == applicants
-        and each value is a record with fields as listed in
-        rbc.Club.APPLICANT_DATA_FIELD_NAMES.
-    2. club.applicant_data_keys
-    Note: Sponsor data is included if populate_sponsor_data has
-    already been run, othwise, the values remain as empty strings.
-    """
-    sponsors = hasattr(club, 'sponsors_by_applicant')
-    # ... populate_sponsor_data must have been run
-    if sponsors:
-        sponsored = club.sponsors_by_applicant.keys()
-    club.applicant_data = {}
-    with open(club.applicant_spot, 'r') as stream:
-        print('Reading file "{}"...'.format(stream.name))
-        for line in helpers.useful_lines(stream, comment='#'):
-            rec = applicant_data_line2record(line)
-            name_key = member.fstrings['key'].format(**rec)
-            if sponsors and name_key in sponsored:
-                rec = add_sponsors(rec,
-                        club.sponsors_by_applicant[name_key])
-            club.applicant_data[name_key] = rec
-        club.applicant_data_keys = club.applicant_data.keys()
-'''
-
 def get_applicants_by_status(club):
     """
     # only used by ck_data which we are trying to rewrite #
@@ -756,67 +926,102 @@ def get_applicants_by_status(club):
 
 def parse_sponsor_data_line(line):
     """
-    # used by populate_sponsor_data #
+    # used by (parse_sponsors &) sqldb #
     Assumes blank and commented lines have already been removed.
     returns a 2 tuple: (for subsequent use as a key/value pair)
     t1 is "last,first" of applicant (can be used as a key)
     t2 is a tuple of sponsors ('first last')
     eg: ('Catz,John', ('Joe Shmo', 'Tom Duley'))
-    Fails if encounters an invalid line!!!
-    """
-    parts = line.split(":")
-    sponsored = parts[0].strip()
-    names = sponsored.split()
-    name = '{},{}'.format(names[1], names[0])
-    part2 = parts[1]
-    sponsors = (parts[1].split(', '))
-    sponsors = tuple([sponsor.strip() for sponsor in sponsors])
+    As always, the first ':' separates applicant from sponsors and
+    anything after a second one (eg: a note) is ignored.
+    Raises ParseError if the line is malformed.
+    """
+    match = SPONSOR_LINE.fullmatch(line.strip())
+    if not match:
+        raise ParseError("not 'first last: sponsor, sponsor'", line)
+    name = '{},{}'.format(match['last'], match['first'])
+    sponsors = tuple(sponsor.strip() for sponsor
+                     in match['sponsors'].split(', '))
     return (name, sponsors)
 
 
+def parse_sponsors(text):
+    """
+    # used (via get_sponsors) by populate_sponsor_data #
+    Parses the <text> of the sponsor SPoT.  Returns a dict:
+        tuples: 'last,first' of applicant => tuple of sponsors
+            ('first last'- see parse_sponsor_data_line)
+        by_applicant: 'last,first' of applicant => list of its
+            sponsors' 'last,first' names
+        sponsor_set: all the sponsors' 'last,first' names
+        errors: list of ParseErrors (of lines that were skipped)
+    """
+    tuples = {}
+    by_applicant = {}
+    sponsor_set = set()
+    errors = []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            name, sponsors = parse_sponsor_data_line(line)
+            try:
+                keys = [helpers.tofro_first_last(sponsor)
+                        for sponsor in line.split(':')[1].split(',')]
+            except ValueError:
+                raise ParseError("sponsors not 'first last'", line)
+        except ParseError as error:
+            errors.append(ParseError(error.reason, line, line_no))
+            continue
+        tuples[name] = sponsors
+        by_applicant[name] = keys
+        sponsor_set.update(keys)
+    return dict(tuples=tuples, by_applicant=by_applicant,
+                sponsor_set=sponsor_set, errors=errors)
+
+
+def get_sponsors(sponsors_spot):
+    """
+    Returns the parsed version (see parse_sponsors) of
+    <sponsors_spot>: parsed only if it's changed.
+    """
+    return cache.load(sponsors_spot, parse_sponsors, 'sponsors')
+
+
 def populate_sponsor_data(club):
     """
     # used by new code as well as ck_data #
-    Reads sponsor & membership data files populating attributes:
+    Reads sponsor & membership data files (or, if set, club.sqlite)
+    populating attributes:
         club.sponsors_by_applicant, 
         club.applicant_set,
         club.sponsor_emails,
-        club.sponsor_set.
+        club.sponsor_set,
+        club.sponsor_errors: ParseErrors of lines skipped.
     Is the following true???  (Should be 'last,first'!!!)
     All names (whether keys or values) are formated "last, first".
     Should be: keys are in format 'last,first' and 
     values in format 'last, first'
     """
-    club.sponsor_set = set()  # eschew duplicates!
+    if not club.quiet:
+        print('Reading file "{}"...'.format(club.sponsors_spot))
+    sponsors = get_sponsors(club.sponsors_spot)
+    club.sponsor_errors = sponsors['errors']
+    report_parse_errors(club.sponsor_errors, club.sponsors_spot)
+    club.sponsor_tuple_by_applicant = dict(sponsors['tuples'])
+    # key: applicant name
+    # value: list of two sponsors in "last,first" format.
+    club.sponsors_by_applicant = {
+            name: list(keys) for name, keys
+            in sponsors['by_applicant'].items()}
+    club.sponsor_set = set(sponsors['sponsor_set'])
     club.sponsor_emails = dict()
-    club.sponsors_by_applicant = dict()
-    club.sponsor_tuple_by_applicant = dict()
-    with open(club.sponsors_spot, 'r') as stream:
-        if not club.quiet:
-            print('Reading file "{}"...'.format(stream.name))
-        for line in helpers.useful_lines(stream, comment='#'):
-            name, sponsors = parse_sponsor_data_line(line)
-            club.sponsor_tuple_by_applicant[name] = sponsors
-            parts = line.split(':')
-            names = parts[0].split()  # applicant 1st and 2nd names
-            name = "{},{}".format(names[1], names[0])
-            try:
-                sponsors = parts[1].split(',')
-            except IndexError:
-                print("IndexError: {} sponsors???".format(name))
-                sys.exit()
-#           _ = input("sponsors = {}".format(repr(sponsors)))
-            sponsors = [helpers.tofro_first_last(name)
-                        for name in sponsors]
-            for sponsor in sponsors:
-                club.sponsor_set.add(sponsor)
-            club.sponsors_by_applicant[name] = sponsors
-            # key: applicant name
-            # value: list of two sponsors in "last, first" format.
-#   _ = input(f"sponsors are {repr(club.sponsor_set)}")
-    with open(club.infile, 'r') as stream:
-        dictreader = csv.DictReader(stream)
-        for record in dictreader:
+    database = getattr(club, 'sqlite', None)
+    if database is not None:  # see sqldb.py
+        club.sponsor_emails = database.emails(club.sponsor_set)
+    else:
+        for record in cache.records(club.infile):
             record = helpers.Rec(record)
             name = record(member.fstrings['key'])
             if name in club.sponsor_set:
@@ -847,8 +1052,14 @@ def get_fee_paying_contacts(club): # so far used only by ck_data
     collector = {}
     fee_groups = ["DockUsers", "Kayak", "Moorings"]
     fee_set = set(fee_groups)
+    fee_mask = 0
+    for n, label in enumerate(club.contact_labels):
+        if label in fee_set:
+            fee_mask |= 1 << n
     names = sorted(club.groups_by_name.keys())
     for name in names:
+        if not club.label_bits_by_name[name] & fee_mask:
+            continue
         intersect = club.groups_by_name[name].intersection(fee_set)
         if intersect:
             renamed_group = []
@@ -866,6 +1077,185 @@ def get_fee_paying_contacts(club): # so far used only by ck_data
     return collector
 
 
+def gather_applicant_data(club):    # used by ck_data #
+    """
+    Populates club.applicant_data (& applicant_data_keys) and
+    club.applicants_by_status.
+    """
+    populate_applicant_data(club)
+    club.applicants_by_status = get_applicants_by_status(club)
+
+
+def ck_data_sources(club):
+    """
+    Returns a list of what ck_data gathers its data from: for each
+    source a dict with keys:
+        name: (also used by CK_DATA_CHECKS)
+        files: the files read
+        gather: the function that reads them
+        attrs: the club attributes it populates
+        keys: attributes which are just the keys of another
+              (and so are set up again rather than kept)
+        needs: the sources it depends upon
+    """
+    membership_attrs = {'fieldnames', 'n_fields', 'previous_name'}
+    for func in membership_collectors():
+        membership_attrs.update(member.collectors[func]['attrs'])
+    membership_files = [club.MEMBERSHIP_SPoT]
+    fee_files = list(club.extra_fees_spots)
+    infile = club.infile
+    database = getattr(club, 'sqlite', None)
+    if database is not None:  # see sqldb.py
+        membership_files = fee_files = [database.name]
+        infile = database.name
+    return [
+        dict(name='membership', files=membership_files,
+             gather=gather_membership_data,
+             attrs=sorted(membership_attrs)),
+        dict(name='contacts', files=[club.contacts_spot],
+             gather=gather_contacts_data,
+             attrs=['gmail_by_name', 'groups_by_name', 'g_by_group',
+                    'contact_labels', 'label_bits_by_name']),
+        dict(name='fees', files=fee_files,
+             gather=gather_extra_fees_data,
+             attrs=['fees_by_category', 'fees_by_name']),
+        dict(name='sponsors', files=[club.sponsors_spot, infile],
+             gather=populate_sponsor_data,
+             attrs=['sponsor_set', 'sponsor_emails',
+                    'sponsors_by_applicant',
+                    'sponsor_tuple_by_applicant'],
+             keys={'applicant_set': 'sponsors_by_applicant'}),
+        dict(name='applicants', files=[club.applicant_spot],
+             gather=gather_applicant_data,
+             attrs=['applicant_data', 'applicants_by_status'],
+             keys={'applicant_data_keys': 'applicant_data'},
+             needs=('sponsors', )),
+        ]
+
+
+CK_DATA_VERSION = 2  # Bump whenever what a check saves changes.
+
+CK_DATA_CHECKS = (   # check: the sources it uses (in report order)
+    (ck_malformed, ('membership', )),
+    (ck_fee_paying_labels, ('membership', 'contacts')),
+    (ck_fees_spots, ('membership', 'fees')),
+    (ck_gmail, ('membership', 'contacts')),
+    (ck_applicants, ('membership', 'applicants')),
+    )
+
+
+def file_hashes(files, previous):
+    """
+    Returns a dict keyed by each of <files>; values are
+    (signature, content hash) tuples.  A hash in <previous> (a
+    dict of the same form) is used if the signature is unchanged.
+    """
+    ret = {}
+    for name in files:
+        signature = cache.file_signature(name)
+        old = previous.get(name)
+        if old and old[0] == signature:
+            ret[name] = old
+        else:
+            ret[name] = (signature, cache.file_hash(name))
+    return ret
+
+
+def load_source(gather, club, attrs):
+    """
+    Runs (in a worker thread or process) <gather>(<club>) and
+    returns the values of the attributes it populates (<attrs>)
+    along with the time it took.
+    """
+    began = time.perf_counter()
+    gather(club)
+    return ({attr: getattr(club, attr) for attr in attrs},
+            time.perf_counter() - began)
+
+
+def load_sources(club, sources):
+    """
+    Runs the 'gather' functions of <sources> (see ck_data_sources)
+    concurrently: each in its own thread or, if club.jobs > 1, its
+    own process; a source is started once those it needs have
+    been loaded.  Each works on a copy of <club> and the attributes
+    it populates are then assigned to <club>.
+    Returns a dict keyed by source name; values are dicts of those
+    attributes.  Timings are kept in club.load_timings (and are
+    reported unless club.quiet.)
+    """
+    ret = {}
+    club.load_timings = {}
+    names = {source['name'] for source in sources}
+    pending = list(sources)
+    running = {}  # future: source
+    # Processes only when they'd work on their own data: not if
+    # profiling (timings are kept in this process) or using a
+    # data base (its connection can't be passed on.)
+    processes = (getattr(club, 'jobs', 1) > 1
+                 and profiler.active is None
+                 and getattr(club, 'sqlite', None) is None)
+    if processes:
+        executor = concurrent.futures.ProcessPoolExecutor(
+                                                max(len(sources), 1))
+    else:
+        executor = concurrent.futures.ThreadPoolExecutor(
+                                                max(len(sources), 1))
+    with executor:
+        while pending or running:
+            for source in list(pending):
+                if (names - set(ret)).intersection(
+                                        source.get('needs', ())):
+                    continue
+                pending.remove(source)
+                if processes:
+                    copy = member.shard_club(club)
+                    copy.jobs = 1
+                else:
+                    copy = copy_module.copy(club)
+                future = executor.submit(load_source,
+                        source['gather'], copy, source['attrs'])
+                running[future] = source
+            finished, _ = concurrent.futures.wait(running,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                source = running.pop(future)
+                attrs, seconds = future.result()
+                for attr, value in attrs.items():
+                    setattr(club, attr, value)
+                for attr, attr_w_keys in source.get('keys',
+                                                    {}).items():
+                    setattr(club, attr,
+                            getattr(club, attr_w_keys).keys())
+                ret[source['name']] = attrs
+                club.load_timings[source['name']] = seconds
+                if profiler.active is not None:
+                    profiler.active.add_phase(
+                            'load ' + source['name'], seconds)
+    if not club.quiet:
+        for name, seconds in club.load_timings.items():
+            print("Loaded {} in {:.1f} ms."
+                  .format(name, seconds * 1e3))
+    return ret
+
+
+def run_check(check, club):
+    """
+    Runs <check> and returns what it contributes to the report
+    of ck_data (and to club.diffs: see reconcile.compare.)
+    """
+    club.ret = []
+    club.ok = []
+    club.varying_amounts = []
+    club.not_matching_notice = ''
+    club.diffs = []
+    check(club)
+    return dict(ret=club.ret, ok=club.ok,
+                varying_amounts=club.varying_amounts,
+                not_matching_notice=club.not_matching_notice,
+                diffs=club.diffs)
+
+
 def ck_data(club):
     """
     Check integrity/consistency of of the Club's data bases:
@@ -883,6 +1273,8 @@ def ck_data(club):
     is set to True) can be extended to include any discrepencies
     between what's billed each year vs what is still owed:
     useful after payments begin to come in.
+    The differences found are also kept (see reconcile.compare)
+    in club.diffs for those wanting them as json or csv.
 
     Consistency checks required:
     -memlist-    names emails stati&fees  which_fee&amt
@@ -894,30 +1286,86 @@ def ck_data(club):
     expired applicants.)
     """
 #   print("Entering data.ck_data")
+    # A snapshot of the previous run (see cache.get_snapshot) is
+    # kept: sources that haven't changed aren't read again and
+    # only checks using sources that have are run again.
+    # Those that have changed are read concurrently (load_sources)
+    # and the checks run once they've all been loaded.
+    snapshot = cache.get_snapshot(club.MEMBERSHIP_SPoT, 'ck_data')
+    if not snapshot or snapshot.get('version') != CK_DATA_VERSION:
+        snapshot = dict(version=CK_DATA_VERSION,
+                        hashes={}, sources={}, checks={})
+    sources = ck_data_sources(club)
+    hashes = file_hashes({name for source in sources
+                          for name in source['files']},
+                         snapshot['hashes'])
+    changed = set()
+    for source in sources:
+        saved = snapshot['sources'].get(source['name'])
+        source['hashes'] = {name: hashes[name][1]
+                            for name in source['files']}
+        if (saved is None or saved['hashes'] != source['hashes']
+                or changed.intersection(source.get('needs', ()))):
+            changed.add(source['name'])
+    checks = []  # Those which must be run (again.)
+    for check, uses in CK_DATA_CHECKS:
+        saved = snapshot['checks'].get(check.__name__)
+        if (saved is None or changed.intersection(uses)
+                or saved['fee_details'] != club.fee_details):
+            checks.append(check)
+    if not checks and 'report' in snapshot:  # Nothing has changed.
+        if hashes != snapshot['hashes']:  # (but some were touched)
+            snapshot['hashes'] = hashes
+            cache.save_snapshot(club.MEMBERSHIP_SPoT, 'ck_data',
+                                snapshot)
+        club.ret = list(snapshot['report'])
+        club.diffs = [diff for check, uses in CK_DATA_CHECKS
+                      for diff in snapshot['checks'][check.__name__]
+                                                        ['diffs']]
+        return club.ret
+    for source in sources:
+        if source['name'] not in changed:
+            saved = snapshot['sources'][source['name']]
+            for attr, value in pickle.loads(saved['attrs']).items():
+                setattr(club, attr, value)
+            for attr, attr_w_keys in source.get('keys', {}).items():
+                setattr(club, attr, getattr(club, attr_w_keys).keys())
+    # The rest are read (concurrently) by load_sources.
+    loaded = load_sources(club, [source for source in sources
+                                 if source['name'] in changed])
+    for source in sources:
+        if source['name'] in changed:
+            # Kept as pickled: the checks modify some of these.
+            snapshot['sources'][source['name']] = dict(
+                hashes=source['hashes'],
+                attrs=pickle.dumps(loaded[source['name']]))
+    snapshot['hashes'] = hashes
+
+    ## First check that google groups match club data:
+    # Deal with extra fees...
+    # ck_fee_paying_labels: google groups vs club data
+    # ck_fees_spots: mem list vs extra fees SPoT
+    # Keep in mind that after payment amounts won't match
+    # Can use '-d' options for details.
+    for check in checks:
+        saved = run_check(check, club)
+        saved['fee_details'] = club.fee_details
+        snapshot['checks'][check.__name__] = saved
     club.ret = []
     club.ok = []
     club.varying_amounts = []
     club.not_matching_notice = ''
+    club.diffs = []
     helpers.add_header2list("Report Regarding Data Integrity",
                 club.ret, underline_char='#', extra_line=True)
-    gather_membership_data(club)  # from main data base
-    gather_contacts_data(club)  # club gmail account contacts
-    gather_extra_fees_data(club)  # data comes from SPoTs
-    populate_sponsor_data(club)
-    populate_applicant_data(club)
-    club.applicants_by_status = get_applicants_by_status(club)
-
-
-    ## First check that google groups match club data:
-    # Deal with extra fees...
-    ck_malformed(club)
-    ck_fee_paying_labels(club)  # google groups vs club data
-    ck_fees_spots(club)  # mem list vs extra fees SPoT
-    # Keep in mind that after payment amounts won't match
-    # Can use '-d' options for details.
-
-    ck_gmail(club)
-
+    for check, uses in CK_DATA_CHECKS:
+        result = snapshot['checks'][check.__name__]
+        club.ret.extend(result['ret'])
+        club.diffs.extend(result['diffs'])
+        club.ok.extend(result['ok'])
+        club.varying_amounts.extend(result['varying_amounts'])
+        if result['not_matching_notice']:
+            club.not_matching_notice = result['not_matching_notice']
 
     ## do we compare gmail vs memlist emails anywhere????
     ## None of the following are populated!!!
@@ -943,8 +1391,6 @@ def ck_data(club):
         club.ok.append("No emails missing from gmail contacts.")
 '''
 
-    ck_applicants(club)
-
     if club.ok:
         helpers.add_sub_list(
             "No Problems with the Following", club.ok, club.ret)
@@ -958,6 +1404,8 @@ def ck_data(club):
             "Fee Disparities: probably some have paid",
             club.ret, underline_char='-', extra_line=True)
         club.ret.extend(club.varying_amounts)
+    snapshot['report'] = club.ret
+    cache.save_snapshot(club.MEMBERSHIP_SPoT, 'ck_data', snapshot)
     return club.ret
 
 
@@ -974,12 +1422,12 @@ def club_with_owing_credits_and_keys(infile=None, args=None):
     if infile: club.infile = infile
     club.owing_dict = {}
     club.credits_dict = {}
-    err_code = member.traverse_records(club.infile,
-                                       [
-                                       member.get_payables_dict,
-                                       member.get_member_keys_set,
-                                       ],
-                                       club)
+    if getattr(club, 'sqlite', None) is None:
+        money.payables_dict(money.get_columns(club.infile), club)
+        funcs = [member.get_member_keys_set, ]
+    else:
+        funcs = [member.get_payables_dict, member.get_member_keys_set, ]
+    err_code = member.traverse_records(club.infile, funcs, club)
     return club
 
 
@@ -995,9 +1443,12 @@ def club_with_payables_listing(args=None, asterixUSPS=False):
     club.still_owing = []
     club.advance_payments = []
     club.asterixUSPS = asterixUSPS
-    err_code = member.traverse_records(club.infile,
-                                       member.get_payables,
-                                       club)
+    if getattr(club, 'sqlite', None) is None:  # see money.py
+        money.payables(money.get_columns(club.infile), club)
+    else:
+        err_code = member.traverse_records(club.infile,
+                                           member.get_payables,
+                                           club)
     return club
 
 
@@ -1033,24 +1484,60 @@ def payables_report(club, tabulate=False, max_width=None):
 
 def restore_fees(club):
     """
-    Sets up and leaves a new list of records in club.new_db:
-    Dues and relevant fees are applied to each member's record.
+    Writes a new membership file (club.outfile) in which dues and
+    relevant fees are applied to each member's record (see
+    money.bill.)  Each row is written as it's billed (to a
+    temporary file renamed into place once complete) rather than
+    all being kept in memory.
     Also populates <club.name_set> & <club.errors>
     The <club.errors> includes names that are found in the
-    <fees_json_file> but not in the <membership_csv_file> and 
+    extra fees SPoTs but not in the <membership_csv_file> and 
     those still owing before new fees/dues are added.
     """
     print("Restore dues and fees to the data base...")
-    club.errors = []; club.new_db = [];
-    club.non0balance = {}; club.name_set = set();
-    populate_extra_fees(club)
-    club.extra_fee_names = set(
-                    [key for key in club.by_name.keys()])
-    err_code = member.traverse_records(club.infile, (
-        member.populate_non0balance_func,
-        member.populate_name_set_func,
-        member.add_dues_fees2new_db_func,
-        ), club)
+    club.errors = []
+    by_name = fee_index(club)['by_name']
+    club.extra_fee_names = set(by_name.keys())
+    table = cache.get_table(club.infile)
+    columns = money.get_columns(club.infile)
+    names = money.name_keys(columns)
+    club.name_set = set(names)
+    non0balance = {}  # Populated by money.bill (as it bills.)
+    billed = [(table['fieldnames'].index(key), amounts, charged)
+              for key, (amounts, charged) in money.bill(
+                    columns, club.YEARLY_DUES, by_name, names,
+                    non0balance).items()
+              if key in table['fieldnames']]
+    n_fields = len(table['fieldnames'])
+    temp = '{}.{}.tmp'.format(club.outfile, os.getpid())
+    try:
+        with open(temp, 'w', newline='') as stream:
+            writer = csv.writer(stream, dialect='unix',
+                                quoting=csv.QUOTE_MINIMAL)
+            writer.writerow(table['fieldnames'])
+            for i, row in enumerate(table['rows']):
+                row = list(row) + [''] * (n_fields - len(row))
+                for j, amounts, charged in billed:
+                    if not charged[i]:
+                        continue
+                    try:
+                        row[j] = str(int(row[j] or 0) + amounts[i])
+                    except ValueError:
+                        club.errors.append(
+                            "{}: {} of {!r} left as is (not a number.)"
+                            .format(names[i], table['fieldnames'][j],
+                                    row[j]))
+                writer.writerow(row)
+        os.replace(temp, club.outfile)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    first, last = columns['text']['first'], columns['text']['last']
+    club.non0balance = {
+        member.fstrings['last_first'].format(first=first[i],
+                                             last=last[i]): amounts
+        for i, amounts in non0balance.items()}
     if club.non0balance:
         warning = "Non zero balances..."
 #       print(warning)
@@ -1063,7 +1550,7 @@ def restore_fees(club):
         warning = "Non members listed as paying extra fees!"
 #       print(warning)
         club.errors.append(warning)
-        for name in names_not_members:
+        for name in sorted(names_not_members):
             club.errors.append(
                 f"\t{name}: non member listed as paying fee(s).")
 
@@ -12,9 +12,14 @@ of instances of rbc.Club so hence the extra (named) parameter set to
 """
 
 import os
-import csv
 import json
+import time
+import types
+import pickle
+import concurrent.futures
+import cache
 import helpers
+import profiler
 import sys_globals as glbs
 import data
 
@@ -67,7 +72,38 @@ NON_MEMBER_SET = APPLICANT_SET | {
         'i', 't', 'zae', 'zzz'}  # bitwise OR
 NON_FEE_PAYING_STATI = {"w", "t", "r", "h"}
 
+# Each status is assigned a bit (in STATUS_KEY_VALUES order) so the
+# stati of a record can be held, and tested, as a single integer.
+STATUS_BITS = {status: 1 << n
+               for n, status in enumerate(STATUS_KEY_VALUES)}
+UNKNOWN_STATUS_BIT = 1 << len(STATUS_BITS)  # Any status not above.
+
+
+def stati2mask(stati):
+    """
+    Returns the bitmask representing the collection <stati>.
+    """
+    mask = 0
+    for status in stati:
+        mask |= STATUS_BITS.get(status, UNKNOWN_STATUS_BIT)
+    return mask
+
+
+APPLICANT_MASK = stati2mask(APPLICANT_SET)
+EXEC_MASK = stati2mask(EXEC_SET)
+NON_MEMBER_MASK = stati2mask(NON_MEMBER_SET)
+NON_FEE_PAYING_MASK = stati2mask(NON_FEE_PAYING_STATI)
+NOT_PAYABLE_MASK = stati2mask({'h', 'm', 'r'})  # See get_payables.
+
 N_FIELDS = 14  # Only when unable to use len(dict_reader.fieldnames).
+MIN_ROWS_PER_JOB = 2000  # Fewer and a parallel traversal isn't
+                         # worth starting another process for.
+# Keys q_mailing adds to records; others a letter or email
+# template uses must be in the data or be supplied (see
+# 'supplies' in <collectors>) by the mailing's functions.
+MAILING_KEYS = ('subject', )
+BCC_BATCH = 50  # Most recipients of a broadcast (see batch_emails.)
+BROADCAST_SALUTATION = "Dear Club Member,"
 MONEY_KEYS = ("dues", "dock", "kayak", "mooring")
 MONEY_KEYS_CAPPED = [item.capitalize() for item in MONEY_KEYS]
 FEE_KEYS = MONEY_KEYS[1:]
@@ -171,23 +207,56 @@ def traverse_records(infile, custom_funcs, club):
     list of functions. These functions typically populate
     attributes of club, an instance of the rbc.Club class.
     Required club attributes are set up using the
-    setup_required_attributes function (see end of module.)
+    setup_required_attributes function and the functions are
+    combined by <fuse> (see end of module.)
     Also assigns club.fieldnames and club.n_fields which are
     sometimes useful.
+    If every one of <custom_funcs> declares the fields it reads
+    (see <collectors>) records are built with only those fields.
+    If club.sqlite is set (see sqldb.py) records come from the
+    data base instead of <infile>: only those meeting the
+    collectors' 'where' conditions.
     """
     if callable(custom_funcs):  # If only one function provided
         custom_funcs = [custom_funcs]  # place it into a list.
     setup_required_attributes(custom_funcs, club)
-    with open(infile, 'r', newline='') as file_object:
+    fused = fuse(custom_funcs)
+    fields = projection(custom_funcs)
+    database = getattr(club, 'sqlite', None)
+    if database is not None:  # --sqlite option (see sqldb.py)
         if not club.quiet:
-            print("DictReading {}...".format(file_object.name))
-        dict_reader = csv.DictReader(file_object)
-        # fieldnames is used by get_usps and restore_fees cmds.
-        club.fieldnames = dict_reader.fieldnames
-        club.n_fields = len(club.fieldnames)  # to check db integrity
-        for record in dict_reader:
-            for custom_func in custom_funcs:
-                custom_func(record, club)
+            print("Querying {}...".format(database.name))
+        with profiler.phase('query ' + os.path.basename(
+                                                database.name)):
+            table = database.select(fields, sql_filter(custom_funcs))
+        club.fieldnames = list(database.fieldnames)
+        club.n_fields = len(club.fieldnames)
+        for record in cache.table_records(table, MemberRecord):
+            fused(record, club)
+        return
+    if not club.quiet:
+        print("DictReading {}...".format(infile))
+    # Parsed only once: thereafter read from a cache (see cache.py.)
+    with profiler.phase('parse ' + os.path.basename(infile)):
+        table = cache.get_table(infile)
+    # fieldnames is used by get_usps and restore_fees cmds.
+    club.fieldnames = list(table['fieldnames'])
+    club.n_fields = len(club.fieldnames)  # to check db integrity
+    # club.jobs (--jobs option) > 1 => use that many processes
+    # provided there's enough work to make it worth while.
+    # (Not when profiling: functions are timed in this process.)
+    jobs = min(getattr(club, 'jobs', 1),
+               len(table['rows']) // MIN_ROWS_PER_JOB)
+    if (jobs > 1 and profiler.active is None
+            and can_run_in_parallel(custom_funcs)):
+        traverse_in_parallel(infile, table, custom_funcs, club, jobs)
+        return
+    if fields is None:
+        records = cache.table_records(table, MemberRecord)
+    else:
+        records = cache.projected_records(table, fields, MemberRecord)
+    for record in records:
+        fused(record, club)
 
 
 def report_error(report, club):
@@ -221,33 +290,192 @@ def get_status_set(record):
     return stati
 
 
+_status_masks = {}  # status field: bitmask; few distinct values.
+
+
+def status_mask(record):
+    """
+    Returns the bitmask of <record>'s stati; each different
+    status field is only ever split once.
+    """
+    status = record['status']
+    try:
+        return _status_masks[status]
+    except KeyError:
+        mask = _status_masks[status] = stati2mask(
+                                        get_status_set(record))
+        return mask
+
+
+def has_status(record, status):
+    return bool(status_mask(record) & STATUS_BITS[status])
+
+
+def parse_money(record):
+    """
+    Returns a dict keyed by MONEY_KEYS: values are the integer
+    amount in each field or None if blank (or not a number.)
+    """
+    ret = {}
+    for key in MONEY_KEYS:
+        try:
+            ret[key] = int(record[key])
+        except (ValueError, TypeError):
+            ret[key] = None
+    return ret
+
+
+derivations = {  # Values (other than fields) collectors often need.
+    'key': fstrings['key'].format_map,
+    'last_first': fstrings['last_first'].format_map,
+    'first_last': fstrings['first_last'].format_map,
+    'stati': get_status_set,  # Treat as read only!
+    'money': parse_money,     # ditto
+    }
+
+derivation_reads = {  # The fields each of the above depends on.
+    'key': ('first', 'last'),
+    'last_first': ('first', 'last'),
+    'first_last': ('first', 'last'),
+    'stati': ('status', ),
+    'money': MONEY_KEYS,
+    }
+
+
+class Derived(dict):
+    """
+    Values derived from a single record (see <derivations>);
+    each is computed the first time it's asked for and then kept
+    so that collectors sharing an instance don't repeat the work.
+    """
+    __slots__ = ('record', )
+
+    def __init__(self, record):
+        self.record = record
+
+    def __missing__(self, name):
+        record = self.record
+        if type(record) is MemberRecord:
+            value = self[name] = record.get_derived(name)
+        else:
+            value = self[name] = derivations[name](record)
+        return value
+
+
+class MemberRecord(dict):
+    """
+    The record type provided by traverse_records & modify_data.
+    A dict (so str.format(**record), csv.DictWriter, json etc
+    all work as before) which is also callable with a formatting
+    string (as is helpers.Rec) and which keeps the values derived
+    from it (name keys, stati, money fields: see <derivations>)
+    once they've been computed.  They're forgotten if the record
+    is changed.
+    Unlike helpers.Rec, creating one doesn't imply a copy: use
+    the copy method (or MemberRecord(record)) when the original
+    must be left unchanged.
+    """
+    __slots__ = ('_derived', )  # name: value (see <derivations>)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self._derived = None
+
+    def get_derived(self, name):
+        derived = self._derived
+        if derived is None:
+            derived = self._derived = {}
+        try:
+            return derived[name]
+        except KeyError:
+            value = derived[name] = derivations[name](self)
+            return value
+
+    @property
+    def key(self):
+        return self.get_derived('key')
+
+    @property
+    def last_first(self):
+        return self.get_derived('last_first')
+
+    @property
+    def first_last(self):
+        return self.get_derived('first_last')
+
+    def __call__(self, fstr):
+        return fstr.format_map(self)
+
+    def copy(self):
+        return MemberRecord(self)
+
+    def __reduce__(self):  # Derived values aren't pickled.
+        return (MemberRecord, (dict(self), ))
+
+    def __setitem__(self, key, value):
+        self._derived = None
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._derived = None
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        self._derived = None
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self._derived = None
+        return dict.setdefault(self, key, default)
+
+    def pop(self, *args):
+        self._derived = None
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._derived = None
+        return dict.popitem(self)
+
+    def clear(self):
+        self._derived = None
+        dict.clear(self)
+
+
+def as_member_record(record):
+    """
+    For collectors that keep records: a MemberRecord is kept as
+    is (traverse_records provides a new one for each row) while
+    any other dict is copied (as helpers.Rec used to be used.)
+    """
+    if isinstance(record, MemberRecord):
+        return record
+    return MemberRecord(record)
+
+
 def is_applicant(record):
     """
     Tests whether or not <record> is an applicant.
     """
-    stati = get_status_set(record)
-    if stati & APPLICANT_SET:
-        return True
-    return False
+    return bool(status_mask(record) & APPLICANT_MASK)
 
 
 def is_new_applicant(record):
     """
     Application received with payment and needs to be acknowledged.
     """
-    return 'a' in get_status_set(record)
+    return has_status(record, 'a')
 
 
 def is_inductee(record):
     '''
     '''
-    return 'ai' in get_status_set(record)
+    return has_status(record, 'ai')
 
 
 def vacancy_open(record):
     """
     """
-    return 'av' in get_status_set(record)
+    return has_status(record, 'av')
 
 
 def is_member(record):
@@ -255,11 +483,7 @@ def is_member(record):
     Tries to determine if record is that of a member (based on
     status field.)
     """
-    stati = get_status_set(record)
-    if not stati: return True
-    if stati.intersection(set(NON_MEMBER_SET)):
-        return False
-    return True
+    return not status_mask(record) & NON_MEMBER_MASK
 
 
 def is_angie(record):
@@ -278,14 +502,14 @@ def is_ralph(record):
 def is_non_fee_paying(record):
     """
     """
-    if NON_FEE_PAYING_STATI & get_status_set(record):
+    if status_mask(record) & NON_FEE_PAYING_MASK:
         return True
 
 
 def is_minutes_only(record):
     """
     """
-    return 'm' in get_status_set(record)
+    return has_status(record, 'm')
 
 
 def is_dues_paying(record):
@@ -293,8 +517,7 @@ def is_dues_paying(record):
         return False
     if is_member(record):
         return True
-    stati = get_status_set(record)
-    if 'ai' in stati or 'ad' in stati:
+    if status_mask(record) & (STATUS_BITS['ai'] | STATUS_BITS['ad']):
         return True
 
 
@@ -303,20 +526,20 @@ def is_new_member(record):
     a temporary status which triggers the
     welcome to full membership letter.
     """
-    return 'am' in get_status_set(record)
+    return has_status(record, 'am')
 
 
 def is_honorary_member(record):
     """
     """
-    return 'h' in get_status_set(record)
+    return has_status(record, 'h')
 
 
 def is_inactive_member(record):
     """
     minutes only
     """
-    return 'i' in get_status_set(record)
+    return has_status(record, 'i')
 
 
 def is_terminated(record):
@@ -324,7 +547,7 @@ def is_terminated(record):
     a temporary status assumed for non payment of dues
     should which trigger a regret letter  (not yet implemented.)
     """
-    return 't' in get_status_set(record)
+    return has_status(record, 't')
 
 
 def is_gmail_user(record):
@@ -362,13 +585,13 @@ def is_member_or_applicant(record, club=None):
 
 
 def has_valid_email(record, club=None):
-    if 'be' in get_status_set(record):
+    if has_status(record, 'be'):
         return False
     return record["email"]
 
 
 def letter_returned(record, club=None):
-    return 'ba' in get_status_set(record)
+    return has_status(record, 'ba')
 
 
 def get_usps(record, club):
@@ -380,17 +603,15 @@ def get_usps(record, club):
     postal_code.
     """
     if not record['email']:
-        rec = helpers.Rec(record)
-        club.usps_only.append(rec)
+        club.usps_only.append(as_member_record(record))
         club.n_no_email += 1
 
 
 def get_bad_emails(record, club):
-    if 'be' in get_status_set(record):
+    if has_status(record, 'be'):
         club.bad_emails.append(demographic_f.format(**record))
         if hasattr(club, 'usps_only') and club.be:
-            rec = helpers.Rec(record)
-            club.usps_only.append(rec)
+            club.usps_only.append(as_member_record(record))
 
 
 def get_secretary(record, club):
@@ -399,12 +620,11 @@ def get_secretary(record, club):
     assigns secretary's demographics to club.secretary
     z3_sec
     """
-    if 'z3_sec' in get_status_set(record):
+    if has_status(record, 'z3_sec'):
         club.secretary = club.format.format(**record)
         if (hasattr(club, 'usps_only')
         and hasattr(club, 'include_secretary')):
-            rec = helpers.Rec(record)
-            club.usps_only.append(rec)
+            club.usps_only.append(as_member_record(record))
 
 
 def ck_dues_field(record, club):
@@ -432,24 +652,25 @@ def ck_dues_field(record, club):
 
 # # Beginning of 'add2' functions:
 
-def add2email_by_m(record, club):
+def add2email_by_m(record, club, derived=None):
     """
     Populates dict- club.email_by_name.
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
     email = record['email']
     if email:
-        club.email_by_m[name] = email
+        if derived is None:
+            derived = Derived(record)
+        club.email_by_m[derived['last_first']] = email
 
 
-def add2ms_by_email(record, club):
+def add2ms_by_email(record, club, derived=None):
     """
     Populates club.ms_by_email, a dict keyed by emails one of which
     is NO_EMAIL_KEY to capture members without an email address.
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    if derived is None:
+        derived = Derived(record)
+    name = derived['last_first']
     email = record['email']
     if not email:
         email = NO_EMAIL_KEY
@@ -457,26 +678,27 @@ def add2ms_by_email(record, club):
     club.ms_by_email[email].append(name)
 
 
-def add2applicant_with_email_set(record, club):
+def add2applicant_with_email_set(record, club, derived=None):
     """
     Populates club.applicant_with_email_set
     """
     if not is_applicant(record):
         return
-    record = helpers.Rec(record)
-    name = record(fstrings['key'])
     if record['email']:
-        club.applicant_with_email_set.add(name)
+        if derived is None:
+            derived = Derived(record)
+        club.applicant_with_email_set.add(derived['key'])
 
 
-def add2stati_by_m(record, club):
+def add2stati_by_m(record, club, derived=None):
     if record["status"]:
-        record = helpers.Rec(record)
-        club.stati_by_m[record(fstrings['first_last'])] = (
-            get_status_set(record)  )
+        if derived is None:
+            derived = Derived(record)
+        club.stati_by_m[derived['first_last']] = (
+            set(derived['stati']))
 
 
-def add2ms_by_status(record, club):
+def add2ms_by_status(record, club, derived=None):
     """
     Appends a record to club.ms_by_status:
         Each key is a status
@@ -484,57 +706,58 @@ def add2ms_by_status(record, club):
         to club.format.)
     """
     if record['status']:
-        stati = get_status_set(record)
+        if derived is None:
+            derived = Derived(record)
+        stati = derived['stati']
         entry = format_record(record, club.format)
-        key = format_record(record, fstrings['key'])
+        key = derived['key']
         for status in stati:
             _ = club.ms_by_status.setdefault(status, [])
-            record = helpers.Rec(record)
-#           print("appending", record(club.format), status)
-            club.ms_by_status[status].append(
-                    record(fstrings['key']))
+#           print("appending", entry, status)
+            club.ms_by_status[status].append(key)
             club.entries_w_status[key] = entry
 
 def add2bad_demographics(record, club):  #?!unused
-    record = helpers.Rec(record)
-    stati = get_status_set(record)
-    if 'ba' in stati:
-        club.ba_stati[record(fstrings['last_first'])] = (
+    record = as_member_record(record)
+    if has_status(record, 'ba'):
+        club.ba_stati[record.last_first] = (
             record(fstrings['first_last_w_all_staggered']))
-    if 'be' in stati:
-        club.be_stati[record(fstrings['last_first'])] = (
+    if has_status(record, 'be'):
+        club.be_stati[record.last_first] = (
             record(fstrings['first_last_w_all_staggered']))
 
 
-def add2member_with_email_set(record, club):
+def add2member_with_email_set(record, club, derived=None):
     """
     Appends a record to club.member_with_email_set if record
     is that of a member and the member has an email address.
     ## Proposal: rename 'add2has_email_set' and store in 
                         'club.has_email_set'.
     """
-    record = helpers.Rec(record)
-    entry = record(fstrings['key'])
-#   entry = record(fstrings['last_first'])
+    if derived is None:
+        derived = Derived(record)
+    entry = derived['key']
+#   entry = derived['last_first']
     if record['email'] and is_member(record):
         club.member_with_email_set.add(entry)
     else:
         club.no_email_set.add(entry)
 
 
-def add2fee_data(record, club):   # Tested by Tests.xtra_fees.py
+def add2fee_data(record, club, derived=None):   # Tested by Tests.xtra_fees.py
     """
     Populates club attrs fee_category_by_m & ms_by_fee_category
     from main data base, _not_ from extra fees SPoTs.
     It includes data as to amount still owing.
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['key'])
+    if derived is None:
+        derived = Derived(record)
+    name = derived['key']
     # print(repr(FEE_KEYS))
+    money = derived['money']
     for f_key in FEE_KEYS:
-        try:
-            fee = int(record[f_key])
-        except ValueError:
+        fee = money[f_key]
+        if fee is None:
             continue
         _ = club.ms_by_fee_category.setdefault(f_key, {})
         club.ms_by_fee_category[f_key][name] = fee
@@ -542,7 +765,7 @@ def add2fee_data(record, club):   # Tested by Tests.xtra_fees.py
         club.fee_category_by_m[name][f_key] = fee
 
 
-def add2malformed(record, club=None):
+def add2malformed(record, club=None, derived=None):
     """
     Populates club.malformed (which must be set up by client.)
     Checks that that for each record:
@@ -553,8 +776,9 @@ def add2malformed(record, club=None):
     (... used for comparison re correct ordering.)
     Client must set up a club.malformed[] empty list to be populated.
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    if derived is None:
+        derived = Derived(record)
+    name = derived['last_first']
     if len(record) != N_FIELDS:
         club.malformed.append("{}: Wrong # of fields.".format(name))
     for key in MONEY_KEYS:
@@ -572,6 +796,15 @@ def add2malformed(record, club=None):
         club.malformed.append("Record out of order: {}".format(name))
     club.previous_name = name
 
+
+def seed_previous_name(previous_record, club):
+    """
+    When records are traversed in shards (see traverse_in_parallel)
+    each shard must begin knowing the name of the record that
+    precedes it so that add2malformed can check ordering.
+    """
+    club.previous_name = derivations['last_first'](previous_record)
+
 # End of 'add2...' functions
 
 
@@ -608,8 +841,8 @@ def thank_func(record, club):
     """
     Must assign "payment" and extra" to record.
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    record = MemberRecord(record)  # a copy
+    name = record.last_first
     if name in club.statement_data_keys:
         payment = club.statement_data[name]['total']
         statement_dict = get_statement_dict(record)
@@ -633,11 +866,8 @@ def db_credit_payment(record, club):
     credits payment(s).  In either case data is moved to new
     db specified by club.dict_writer.
     """
-    new_record = {}
-    for key in record.keys():
-        new_record[key] = record[key]
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    new_record = MemberRecord(record)
+    name = new_record.last_first
     if name in club.statement_data_keys:
         apply_credit2record(club.statement_data[name], new_record)
     club.dict_writer.writerow(new_record)
@@ -659,10 +889,8 @@ def rm_email_only_field(record, club):
     It was used to modify the data base to its present form and will
     never be used again- should be redacted.
     """
-    new_record = {}
-    for key in club.new_fieldnames:
-        new_record[key] = record[key]
-    return new_record
+    return MemberRecord((key, record[key])
+                        for key in club.new_fieldnames)
 
 
 def set_kayak_fee(record, club):
@@ -672,10 +900,9 @@ def set_kayak_fee(record, club):
         If record owner is not in this dict, her kayak field is set
         to blank, othewise it is set to the value.
     """
-    new_record = {}
-    for key in club.fieldnames:
-        new_record[key] = record[key]
-    name = format_record(record, 'last_first' )
+    new_record = MemberRecord((key, record[key])
+                              for key in club.fieldnames)
+    name = new_record.last_first
     if name in club.kayak_keys:
         new_record['kayak'] = club.kayak_fees[name]
     else:
@@ -688,8 +915,8 @@ def credit_payment_func(record, club):
     Returns the <record>, modified by crediting payment(s)
     specified in club.statement_data
     """
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    record = MemberRecord(record)  # a copy
+    name = record.last_first
     if name in club.statement_data.keys():
         apply_credit2record(club.statement_data[name], record)
     return record
@@ -706,13 +933,91 @@ def modify_data(csv_in_file_name, func, club=None):
     <club> is provided to be used as a parameter of <func> (if
     additional data is needed.)
     """
-    with open(csv_in_file_name, 'r', newline='') as file_obj:
-        reader = csv.DictReader(file_obj)
-        for rec in reader:
-            if func == None:
-                yield rec
-            else:
-                yield func(rec, club)
+    with profiler.phase('parse ' + os.path.basename(csv_in_file_name)):
+        table = cache.get_table(csv_in_file_name)
+    for rec in cache.table_records(table, MemberRecord):
+        if func == None:
+            yield rec
+        else:
+            yield func(rec, club)
+
+
+def build_status_index(table):
+    """
+    <table> is a parsed csv file (see cache.parse_csv.)
+    Returns a dict:
+        'bits': the stati in bit order (so changes can be detected,)
+        'masks': the status bitmask of each row and
+        'by_status': keyed by status; values are lists (in file
+            order) of the ids (indices) of rows having that status.
+    Stati not in STATUS_KEY_VALUES are not indexed.
+    """
+    by_bit = {bit: status for status, bit in STATUS_BITS.items()}
+    fieldnames = table['fieldnames']
+    column = fieldnames.index('status')
+    masks = []
+    by_status = {}
+    for row_id, row in enumerate(table['rows']):
+        if column < len(row):
+            mask = status_mask({'status': row[column]})
+        else:
+            mask = 0
+        masks.append(mask)
+        mask &= ~UNKNOWN_STATUS_BIT
+        while mask:
+            bit = mask & -mask  # lowest bit set
+            by_status.setdefault(by_bit[bit], []).append(row_id)
+            mask ^= bit
+    return dict(bits=tuple(STATUS_BITS), masks=masks,
+                by_status=by_status)
+
+
+def get_status_index(infile):
+    """
+    Returns the status index (see build_status_index) of <infile>
+    which, like the parsed file itself, is cached.
+    """
+    def build(text):
+        return build_status_index(cache.get_table(infile))
+    index = cache.load(infile, build, 'status')
+    if index['bits'] != tuple(STATUS_BITS):  # STATUS_KEY_VALUES
+        index = build(None)                  # has been changed.
+    return index
+
+
+def populate_ms_by_status(infile, club, stati2show=STATI):
+    """
+    Populates club.ms_by_status & club.entries_w_status as would
+    traversing <infile> with add2ms_by_status but only for the
+    stati in <stati2show> and without a scan of the whole file:
+    the status index (or, given club.sqlite, the data base)
+    provides the rows needed.
+    """
+    database = getattr(club, 'sqlite', None)
+    if database is None:
+        table = cache.get_table(infile)
+        index = get_status_index(infile)
+        fieldnames = table['fieldnames']
+        rows = table['rows']
+        rows_by_status = {
+            status: [rows[row_id] for row_id in row_ids]
+            for status, row_ids in index['by_status'].items()}
+    else:  # The data base keeps its own index (see sqldb.py.)
+        fieldnames = database.fieldnames
+        rows_by_status = database.rows_by_status(stati2show)
+    club.ms_by_status = {}
+    club.entries_w_status = {}
+    for status in sorted(set(stati2show)):
+        rows = rows_by_status.get(status)
+        if not rows:
+            continue
+        keys = club.ms_by_status[status] = []
+        for row in rows:
+            record = cache.row2record(fieldnames, row, MemberRecord)
+            key = record.key
+            keys.append(key)
+            club.entries_w_status[key] = format_record(
+                                            record, club.format)
 
 
 def show_by_status(by_status,  # dict: key: status, value: name_keys
@@ -736,7 +1041,7 @@ def show_by_status(by_status,  # dict: key: status, value: name_keys
             for name_key in by_status[status]:
                 entry = club.entries_w_status[name_key]
                 ret.append(entry)
-                if status in APPLICANT_STATI:
+                if status in APPLICANT_SET:
                     if hasattr(club, 'applicant_data'):
                         if name_key in club.applicant_data_keys:
                             # create a line of dates
@@ -800,15 +1105,14 @@ def get_statement_dict(record):
 
 
 def add2statement_data(record, club):
-    rec = helpers.Rec(record)
-    name = rec(fstrings['last_first'])
+    name = Derived(record)['last_first']
     club.statement_data_keys.append(name)
-    club.statement_data[name] = get_statement_dict(rec)
+    club.statement_data[name] = get_statement_dict(record)
 
 
 def add2modified2thank_dict(record, club):
-    rec = helpers.Rec(record)
-    name = rec(fstrings['last_first'])
+    rec = MemberRecord(record)  # a copy
+    name = rec.last_first
     rec['status'] = club.statement_data[name]["total"]
     club.modified2thank_dict[name] = rec
 
@@ -818,8 +1122,8 @@ def rec_w_total_in_status(record, club):
     Consults club.statement_data and returns a copy of the record
     with the appropriate total in its 'status' field.
     """
-    rec = helpers.Rec(record)
-    key = rec(fstrings['last_first'])
+    rec = MemberRecord(record)  # a copy
+    key = rec.last_first
     if key in club.statement_data_keys:
         rec['status'] = club.statement_data[key]['total']
     else:
@@ -867,12 +1171,13 @@ def assign_statement2extra_func(record, club=None):
     record['extra'] = '\n'.join(extra)
 
 
-def get_member_keys_set(record, club):
+def get_member_keys_set(record, club, derived=None):
     """
     Populate club.member_keys_set.
     """
-    name_key = format_record(record, fstrings['key'])
-    club.member_keys_set.add(name_key)
+    if derived is None:
+        derived = Derived(record)
+    club.member_keys_set.add(derived['key'])
 
 
 def get_payables_dict(record, club):
@@ -883,7 +1188,7 @@ def get_payables_dict(record, club):
     positives are added to club.owing_dict,
     negatives to club.credits_dict.
     """
-    if get_status_set(record).intersection({'h', 'm', 'r'}):
+    if status_mask(record) & NOT_PAYABLE_MASK:
         return
     name_key = format_record(record, fstrings['key'])
     val = {}
@@ -909,7 +1214,7 @@ def get_payables(record, club):
     positives are added to club.still_owing,
     negatives to club.advance_payments.
     """
-    if get_status_set(record).intersection({'h', 'm', 'r'}):
+    if status_mask(record) & NOT_PAYABLE_MASK:
         return
     if record['email']:
         no_email = False
@@ -995,7 +1300,6 @@ def add2lists(record, club):
         pass
     if is_applicant(record):
         club.applicants[key] = line
-        stati = get_status_set(record)
         status = stati & APPLICANT_SET
         assert len(status) == 1
         club.napplicants += 1
@@ -1007,56 +1311,27 @@ def add2lists(record, club):
         # output.
 
 
-def populate_non0balance_func(record, club):
+def populate_non0balance_func(record, club, derived=None):
     """
     Reads the MONEY_KEYS fields and, if any are not zero,
     populates the club.non0balance dict keyed by member name
     with values keyed by MONEY_KEYS.
     """
     total = 0
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
+    if derived is None:
+        derived = Derived(record)
+    name = derived['last_first']
     for key in MONEY_KEYS:
-        try:
-            money = int(record[key])
-        except ValueError:
-            money = 0
+        money = derived['money'][key]
         if money:
             _ = club.non0balance.setdefault(name, {})
             club.non0balance[name][key] = money
 
 
-def populate_name_set_func(record, club):
-    record = helpers.Rec(record)
-    name = record(fstrings['last_first'])
-    club.name_set.add(name)
-
-
-def add_dues_fees2new_db_func(record, club):
-    """
-    Prerequisites: 
-        club.extra_fee_names: a dict-
-            key: sting- "last, first" name
-            value: list of tuples- (category, amount)
-        club.extra_fee_names: set of keys of above dict.
-        club.new_db: list of records, created by traverse_records
-    Each record processed is duplicated, dues/fees added (if provided)
-    and then added to club.new_db.
-    """
-    new_record = {}
-    for key in record.keys():
-        new_record[key] = record[key]
-    if is_dues_paying(record):
-        new_record['dues'] = helpers.str_add(
-            club.YEARLY_DUES,
-            new_record['dues'])
-        name = fstrings['last_first'].format(**record)
-        if name in club.extra_fee_names:
-            for (category, amount) in club.by_name[name].items():
-                category = category.lower()
-                new_record[category] = helpers.str_add(
-                    amount, new_record[category])
-    club.new_db.append(new_record)
+def populate_name_set_func(record, club, derived=None):
+    if derived is None:
+        derived = Derived(record)
+    club.name_set.add(derived['last_first'])
 
 
 # #### Next group of methods deal with sending out mailings. #######
@@ -1071,7 +1346,7 @@ def append_email(record, club):
     of content.content_types
     Appends an email to club.json_data
     """
-    body = club.email.format(**record)
+    body = club.email.render(record)
     sender = club.which['from']['email']
     email = {
         'From': sender,    # Mandatory field.
@@ -1086,8 +1361,7 @@ def append_email(record, club):
     }
     sponsor_email_addresses = []
     if club.cc_sponsors:
-        record = helpers.Rec(record)
-        name_key = record(fstrings['key'])
+        name_key = Derived(record)['key']
         if name_key in club.applicant_set:
             sponsors = club.sponsors_by_applicant[name_key]
             for sponsor in club.sponsors_by_applicant[name_key]:
@@ -1104,7 +1378,7 @@ def append_email(record, club):
 
 
 def file_letter(record, club):
-    entry = club.letter.format(**record)
+    entry = club.letter.render(record)
     path2write = os.path.join(club.MAILING_DIR,
                               "_".join((record["last"],
                                         record["first"]))
@@ -1139,13 +1413,76 @@ def q_mailing(record, club):
                 .format(fstrings['first_last'].format(**record)))
 
 
+def batch_emails(emails, k=BCC_BATCH,
+                 salutation=BROADCAST_SALUTATION):
+    """
+    Returns <emails> (dicts: see append_email) with those that are
+    the same but for who they're to and their first (salutation)
+    line collapsed into emails each sent (Bcc) to up to <k> of
+    them (and 'To' the sender) with <salutation> as first line.
+    If <k> < 2 <emails> are returned as they are.
+    Only for content types marked 'broadcast' (see prepare_mailing):
+    bodies being the same is no proof that they're not personal.
+    """
+    if k < 2:
+        return emails
+    groups = {}  # what's the same => list of emails
+    for email in emails:
+        rest = email['body'].partition('\n')[2]
+        same = json.dumps(dict(email, To=None, body=rest),
+                          sort_keys=True, default=sorted)
+        groups.setdefault(same, []).append(email)
+    ret = []
+    for group in groups.values():
+        if len(group) == 1:
+            ret.extend(group)
+            continue
+        first = group[0]
+        body = '\n'.join((salutation,
+                          first['body'].partition('\n')[2]))
+        for start in range(0, len(group), k):
+            bcc = [first['Bcc']] if first.get('Bcc') else []
+            for email in group[start:start + k]:
+                bcc.append(email['To'] if isinstance(email['To'], str)
+                           else ','.join(email['To']))
+            ret.append(dict(first, To=first['From'],
+                            Bcc=','.join(bcc), body=body))
+    return ret
+
+
+def check_templates(club):
+    """
+    Raises KeyError if club.email or club.letter (if either is
+    a content.Renderer) needs fields the records won't have: those
+    of the data, MAILING_KEYS and what the functions of club.which
+    supply.
+    """
+    database = getattr(club, 'sqlite', None)
+    if database is not None:
+        fieldnames = database.fieldnames
+    else:
+        fieldnames = cache.get_table(club.infile)['fieldnames']
+    keys = set(fieldnames).union(MAILING_KEYS,
+                                 supplied(club.which['funcs']))
+    for attr in ('email', 'letter'):
+        template = getattr(club, attr, None)
+        if hasattr(template, 'check'):
+            template.check(keys, "The {} template".format(attr))
+
+
 def prepare_mailing(club):
     """
     Clients of this method: utils.prepare_mailing_cmd
                             utils.thank_cmd
     Both use utils.prepare4mailing to assign attributes to <club>
     (See Notes/call_flow.)
+    If the content type is marked 'broadcast', emails that differ
+    only in who they're to (and the salutation) are sent as Bcc
+    batches: see batch_emails.
+    Fields the templates need (club.email & club.letter: see
+    content.Renderer) are checked for before any are rendered.
     """
+    check_templates(club)
     traverse_records(club.infile,
                      club.which["funcs"],
                      club)  # 'which' comes from content
@@ -1153,6 +1490,14 @@ def prepare_mailing(club):
 #   print("Functions run by traverse_records: {}".format(listing))
     # No point in creating a json file if no emails:
     if hasattr(club, 'json_data') and club.json_data:
+        n_emails = len(club.json_data)
+        if club.which.get('broadcast'):
+            club.json_data = batch_emails(
+                club.json_data, getattr(club, 'bcc_batch', BCC_BATCH),
+                club.which.get('salutation', BROADCAST_SALUTATION))
+        if len(club.json_data) < n_emails:
+            print("{} emails collapsed into {} (Bcc batches)."
+                  .format(n_emails, len(club.json_data)))
         with open(club.json_file, 'w') as file_obj:
             print('Dumping emails (JSON) to "{}".'
                     .format(file_obj.name))
@@ -1253,107 +1598,241 @@ def send_attachment(record, club):
                        )
 
 
-prerequisites = {   # collectors needed by the
-                    # various traversing functions
-    ck_number_of_fields: [
-        "club.errors = []",
-        ],
-    increment_nmembers: [
-        "club.nmembers = 0",
-        ],
-    increment_napplicants: [
-        "club.napplicants = 0",
-        ],
-    increment_nminutes_only: [
-        "club.nminutes_only = 0",
-        ],
-    get_usps: [
-        'club.usps_only = []',
-        'club.usps_csv = []',
-        'club.n_no_email = 0',
-        ],
-    ck_dues_field: [
-        'club.nulls = []',
-        'club.zeros = []',
-        'club.dues_owing = []',
-        'club.errors = []',
-        ],
-    add2email_by_m: [
-        'club.email_by_m = {}',
-        ],
-    add2ms_by_email: [
-        'club.ms_by_email = {}',
-        ],
-    add2stati_by_m: [
-        'club.stati_by_m = {}',
-        ],
-    add2ms_by_status: [
-        'club.ms_by_status = {}',
-        'club.entries_w_status = {}',
-        ],
+NAME = ('first', 'last')
+
+def merge_values(first, second):
+    """
+    Combines partial results from consecutive shards (see
+    traverse_in_parallel): lists are concatenated, sets united
+    and dicts merged key by key (recursively); for anything
+    else the later value wins.
+    """
+    if isinstance(first, list) and isinstance(second, list):
+        first.extend(second)
+        return first
+    if isinstance(first, set) and isinstance(second, set):
+        first |= second
+        return first
+    if isinstance(first, dict) and isinstance(second, dict):
+        for key, value in second.items():
+            if key in first:
+                first[key] = merge_values(first[key], value)
+            else:
+                first[key] = value
+        return first
+    return second
+
+
+def merge_by_update(first, second):
+    """
+    For dicts whose values are replaced rather than accumulated.
+    """
+    first.update(second)
+    return first
+
+
+def merge_counts(first, second):
+    return first + second
+
+
+def take_last(first, second):
+    return second
+
+
+def take_last_non_empty(first, second):
+    if second:
+        return second
+    return first
+
+
+mergers = {  # Default merge function by attribute initializer.
+    list: merge_values,
+    set: merge_values,
+    dict: merge_values,
+    int: merge_counts,
+    str: take_last_non_empty,
+    }
+
+
+def sql_status_in(stati):
+    """
+    Returns an SQL condition (see sqldb.py) true of membership
+    rows having any of <stati>.
+    """
+    return ("EXISTS (SELECT 1 FROM member_stati s WHERE "
+            "s.row = members.row AND s.status IN ({}))".format(
+                ', '.join("'{}'".format(status)
+                          for status in sorted(stati))))
+
+
+SQL_HAS_EMAIL = "coalesce(email, '') != ''"
+SQL_HAS_STATUS = "coalesce(status, '') != ''"
+
+
+collectors = {  # What each of the traversing functions needs:
+    # 'attrs': club attributes it populates (name: initializer),
+    # 'reads': fields it looks at (None => needs the whole record),
+    # 'derived': keys of <derivations> it uses; (collectors that
+    #        declare any accept a Derived instance as 3rd param.)
+    # 'supplies': keys it adds to records (so that templates using
+    #        them can be checked: see check_templates),
+    # 'where': SQL condition true of every row the collector might
+    #        make use of; rows not meeting it are never fetched
+    #        when reading from an SQLite data base (see sqldb.py.)
+    # When traversing in parallel (see traverse_in_parallel):
+    # 'merge': merge functions for attrs that need other than
+    #        the default (see <mergers>),
+    # 'seed': function(previous_record, club) to prepare a shard,
+    # 'state': club attributes whose final value comes from the
+    #        last shard,
+    # 'parallel': False if the collector can't be run in shards.
+    ck_number_of_fields: dict(
+        attrs={'errors': list},
+        reads=None,
+        ),
+    increment_nmembers: dict(
+        attrs={'nmembers': int},
+        reads=('status', ),
+        where='NOT ' + sql_status_in(NON_MEMBER_SET),
+        ),
+    increment_napplicants: dict(
+        attrs={'napplicants': int},
+        reads=('status', ),
+        where=sql_status_in(APPLICANT_SET),
+        ),
+    increment_nminutes_only: dict(
+        attrs={'nminutes_only': int},
+        reads=('status', ),
+        where=sql_status_in({'m'}),
+        ),
+    get_usps: dict(
+        attrs={'usps_only': list,
+               'usps_csv': list,
+               'n_no_email': int},
+        reads=None,
+        where='NOT ' + SQL_HAS_EMAIL,
+        ),
+    ck_dues_field: dict(
+        attrs={'nulls': list,
+               'zeros': list,
+               'dues_owing': list,
+               'errors': list},
+        reads=NAME + ('dues', 'status'),
+        ),
+    add2email_by_m: dict(
+        attrs={'email_by_m': dict},
+        reads=NAME + ('email', ),
+        derived=('last_first', ),
+        where=SQL_HAS_EMAIL,
+        ),
+    add2ms_by_email: dict(
+        attrs={'ms_by_email': dict},
+        reads=NAME + ('email', ),
+        derived=('last_first', ),
+        ),
+    add2stati_by_m: dict(
+        attrs={'stati_by_m': dict},
+        reads=NAME + ('status', ),
+        derived=('first_last', 'stati'),
+        merge={'stati_by_m': merge_by_update},
+        where=SQL_HAS_STATUS,
+        ),
+    add2ms_by_status: dict(
+        attrs={'ms_by_status': dict,
+               'entries_w_status': dict},
+        reads=None,  # club.format may use any field.
+        derived=('key', 'stati'),
+        where=SQL_HAS_STATUS,
+        ),
     #   add2status_data: [
     #       'club.ms_by_status = {}',
     #       'club.napplicants = 0',
     #       'club.stati_by_m = {}',
     #       ],
-    add2member_with_email_set: [
-        'club.member_with_email_set = set()',
-        'club.no_email_set = set()',
-        ],
-    add2applicant_with_email_set: [
-        'club.applicant_with_email_set = set()',
-        ],
+    add2member_with_email_set: dict(
+        attrs={'member_with_email_set': set,
+               'no_email_set': set},
+        reads=NAME + ('email', 'status'),
+        derived=('key', ),
+        ),
+    add2applicant_with_email_set: dict(
+        attrs={'applicant_with_email_set': set},
+        reads=NAME + ('email', 'status'),
+        derived=('key', ),
+        where=sql_status_in(APPLICANT_SET),
+        ),
 #   add2demographics: [
 #       'club.demographics = {}',
 #       ],
-    add2bad_demographics: [  #?!unused
-        'club.ba_stati = {}',
-        'club.be_stati = {}',
-        ],
-    add2fee_data: [
-        'club.fee_category_by_m = {}',
-        'club.ms_by_fee_category = {}',
-        ],
-    add2malformed: [
-        'club.malformed = []',
-        ],
-    add2lists: [
+    add2bad_demographics: dict(  #?!unused
+        attrs={'ba_stati': dict,
+               'be_stati': dict},
+        reads=None,
+        ),
+    add2fee_data: dict(
+        attrs={'fee_category_by_m': dict,
+               'ms_by_fee_category': dict},
+        reads=NAME + FEE_KEYS,
+        derived=('key', 'money'),
+        ),
+    add2malformed: dict(
+        attrs={'malformed': list},
+        reads=None,  # Counts the fields.
+        derived=('last_first', ),
+        seed=seed_previous_name,
+        state=('previous_name', ),
+        ),
+    add2lists: dict(
         # ACTION REQUIRED
-        # 1st is redundant (duplicates club.format vs pattern;
-        # the latter is assigned by utils.show_cmd().)
-#       """club.pattern = ("{first} {last}  [{phone}]  {address}, " +
-#                   "{town}, {state} {postal_code} [{email}]")""",
-        'club.members = []',
-        'club.nmembers = 0',
-        'club.honorary = []',
-        'club.nhonorary = 0',
-        'club.inactive = []',
-        'club.ninactive = 0',
-        'club.applicants = {}',
-        'club.by_applicant_status = {}',
-        'club.napplicants = 0',
-        'club.stati = {}',
-        'club.errors = []',
-        'club.entries_w_status = {}',
-        ],
-    get_payables: [
-        'club.still_owing = []',
-        'club.advance_payments = []',
-        'club.n_no_email = 0',
-        ],
-    get_payables_dict: [
-        'club.owing_dict = {}',
-        'club.credits_dict = {}',
-        ],
-    get_member_keys_set: [
-        'club.member_keys_set = set()',
-        ],
-    get_secretary: [
-        'club.secretary = ""',
-        ],
-    get_bad_emails: [
-        'club.bad_emails = []',
-        ],
+        # club.pattern (assigned by utils.show_cmd()) is redundant:
+        # it duplicates club.format.
+        attrs={'members': list,
+               'nmembers': int,
+               'honorary': list,
+               'nhonorary': int,
+               'inactive': list,
+               'ninactive': int,
+               'applicants': dict,
+               'by_applicant_status': dict,
+               'napplicants': int,
+               'stati': dict,
+               'errors': list,
+               'entries_w_status': dict},
+        reads=None,
+        parallel=False,  # club.first_letter depends on order.
+        ),
+    get_payables: dict(
+        attrs={'still_owing': list,
+               'advance_payments': list,
+               'n_no_email': int},
+        reads=NAME + ('email', 'status') + MONEY_KEYS,
+        where='NOT ' + sql_status_in({'h', 'm', 'r'}),
+        ),
+    get_payables_dict: dict(
+        attrs={'owing_dict': dict,
+               'credits_dict': dict},
+        reads=NAME + ('status', ) + MONEY_KEYS,
+        merge={'owing_dict': merge_by_update,
+               'credits_dict': merge_by_update},
+        where='NOT ' + sql_status_in({'h', 'm', 'r'}),
+        ),
+    get_member_keys_set: dict(
+        attrs={'member_keys_set': set},
+        reads=NAME,
+        derived=('key', ),
+        ),
+    get_secretary: dict(
+        attrs={'secretary': str},
+        reads=None,
+        parallel=False,  # May append to club.usps_only.
+        where=sql_status_in({'z3_sec'}),
+        ),
+    get_bad_emails: dict(
+        attrs={'bad_emails': list},
+        reads=None,
+        parallel=False,  # May append to club.usps_only.
+        where=sql_status_in({'be'}),
+        ),
     #   dues_and_fees: [
     #       'club.null_dues = []',
     #       'club.members_owing = []',
@@ -1364,45 +1843,290 @@ prerequisites = {   # collectors needed by the
     #       'club.applicants = []',
     #       'club.errors = []',
     #       ],
-    populate_non0balance_func: [
-        "club.errors = []",
-        "club.non0balance = {}",
-        ],
-    populate_name_set_func: [
-        "club.name_set = set()",
-        ],
-    std_mailing_func: [
-        "club.json_data = []",
-        ],
+    populate_non0balance_func: dict(
+        attrs={'errors': list,
+               'non0balance': dict},
+        reads=NAME + MONEY_KEYS,
+        derived=('last_first', 'money'),
+        ),
+    populate_name_set_func: dict(
+        attrs={'name_set': set},
+        reads=NAME,
+        derived=('last_first', ),
+        ),
+    std_mailing_func: dict(
+        attrs={'json_data': list},
+        reads=None,
+        supplies=('subject', ),
+        parallel=False,  # Writes letters to club.mail_dir.
+        ),
+    assign_statement2extra_func: dict(
+        attrs={},
+        reads=None,
+        supplies=('owing', 'extra'),
+        ),
+    thank_func: dict(
+        attrs={},
+        reads=None,
+        supplies=('extra', 'payment', 'subject'),
+        parallel=False,
+        ),
+    bad_address_mailing_func: dict(
+        attrs={},
+        reads=None,
+        supplies=('subject', 'extra'),
+        parallel=False,
+        ),
+    testing_func: dict(
+        attrs={},
+        reads=None,
+        supplies=('subject', 'extra'),
+        parallel=False,
+        ),
+    inductee_payment_f: dict(
+        attrs={},
+        reads=None,
+        supplies=('current_dues', 'subject'),
+        parallel=False,
+        ),
 #   db_apply_charges: [
 #       "club.new_db = {}",
 #       ],
-    add2statement_data: [
-        'club.statement_data = {}',
-        'club.statement_data_keys = []',
-        ],
-    add2modified2thank_dict: [
-        'club.modified2thank_dict = {}',
-        ],
-    add_dues_fees2new_db_func: [
-        'club.new_db = []',
-        ]
+    add2statement_data: dict(
+        attrs={'statement_data': dict,
+               'statement_data_keys': list},
+        reads=None,
+        merge={'statement_data': merge_by_update},
+        ),
+    add2modified2thank_dict: dict(
+        attrs={'modified2thank_dict': dict},
+        reads=None,
+        merge={'modified2thank_dict': merge_by_update},
+        ),
     }
 
 
-
 def setup_required_attributes(custom_funcs, club):
     """
     Ensures that club has necessary attributes
     required by all the custom_funcs to be called.
-    Relies on the above prerequisites dict.
+    Relies on the above <collectors> dict.
+    """
+    for func in custom_funcs:
+        if func in collectors:
+            for attr, initializer in collectors[func]['attrs'].items():
+                setattr(club, attr, initializer())
+
+
+def projection(custom_funcs):
+    """
+    Returns a tuple of the fields needed by <custom_funcs> (those
+    they read and those the derivations they use depend on) or
+    None if any of them needs the whole record.
+    """
+    fields = []
+    for func in custom_funcs:
+        entry = collectors.get(func)
+        if entry is None or entry['reads'] is None:
+            return None
+        needs = list(entry['reads'])
+        for name in entry.get('derived', ()):
+            needs.extend(derivation_reads.get(name, ()))
+        for field in needs:
+            if field not in fields:
+                fields.append(field)
+    return tuple(fields)
+
+
+def supplied(custom_funcs):
     """
-    set_of_funcs = set(prerequisites.keys())
+    Returns a set of the keys <custom_funcs> add to records (see
+    'supplies' in <collectors>.)
+    """
+    ret = set()
+    for func in custom_funcs:
+        ret.update(collectors.get(func, {}).get('supplies', ()))
+    return ret
+
+
+def sql_filter(custom_funcs):
+    """
+    Returns an SQL condition met by every row any of
+    <custom_funcs> might use (see 'where' in <collectors>) or
+    None if some of them need every row.
+    """
+    wheres = []
+    for func in custom_funcs:
+        where = collectors.get(func, {}).get('where')
+        if where is None:
+            return None
+        wheres.append('({})'.format(where))
+    return ' OR '.join(wheres) or None
+
+
+def fuse(custom_funcs):
+    """
+    Compiles <custom_funcs> into a single function to be applied
+    to each record.  Values in <derivations> are computed (at most)
+    once per record and shared by all the collectors that declare
+    them; functions not in <collectors> are called as is.
+    """
+    calls = []
+    for func in custom_funcs:
+        needs = collectors.get(func, {}).get('derived', ())
+        for name in needs:
+            if name not in derivations:
+                raise ValueError("{} needs unknown derivation '{}'"
+                                 .format(func.__name__, name))
+        calls.append((func, bool(needs)))
+    if profiler.active is not None:
+        return fuse_profiled(calls, profiler.active)
+    if not any(takes_derived for func, takes_derived in calls):
+        def fused(record, club):
+            for func, _ in calls:
+                func(record, club)
+        return fused
+
+    def fused(record, club):
+        derived = Derived(record)
+        for func, takes_derived in calls:
+            if takes_derived:
+                func(record, club, derived)
+            else:
+                func(record, club)
+    return fused
+
+
+def fuse_profiled(calls, profile):
+    """
+    Same as the function <fuse> returns but with each call timed
+    (see profiler.py.)  Times are taken without the profile's lock
+    which is then held only to add them in, once per record.
+    """
+    timings = [profile.func_timing(func) for func, _ in calls]
+    clock = time.perf_counter
+    lock = profile.lock
+
+    def fused(record, club):
+        derived = Derived(record)
+        spent = []
+        for func, takes_derived in calls:
+            began = clock()
+            if takes_derived:
+                func(record, club, derived)
+            else:
+                func(record, club)
+            spent.append(clock() - began)
+        with lock:
+            profile.n_records += 1
+            for timing, seconds in zip(timings, spent):
+                timing[0] += 1
+                timing[1] += seconds
+    return fused
+
+
+def can_run_in_parallel(custom_funcs):
+    """
+    True only if every one of <custom_funcs> is a registered
+    collector that can have its results merged.
+    """
+    return all(func in collectors
+               and collectors[func].get('parallel', True)
+               for func in custom_funcs)
+
+
+def shard_club(club):
+    """
+    Returns a copy (which can be sent to another process) of the
+    data attributes of <club> which the collectors might consult.
+    Anything that can't be pickled is left behind.
+    """
+    ret = types.SimpleNamespace()
+    for attr in dir(club):
+        if attr.startswith('__'):
+            continue
+        value = getattr(club, attr)
+        if callable(value):
+            continue
+        try:
+            pickle.dumps(value)
+        except Exception:
+            continue
+        setattr(ret, attr, value)
+    return ret
+
+
+def shard_attrs(custom_funcs):
+    """
+    Returns a dict keyed by the names of the club attributes
+    populated by <custom_funcs>; values are merge functions.
+    """
+    ret = {}
     for func in custom_funcs:
-        if func in set_of_funcs:
-            for code in prerequisites[func]:
-                exec(code)
+        entry = collectors[func]
+        merge = entry.get('merge', {})
+        for attr, initializer in entry['attrs'].items():
+            ret[attr] = merge.get(attr, mergers[initializer])
+        for attr in entry.get('state', ()):
+            ret[attr] = take_last
+    return ret
+
 
+def traverse_shard(infile, custom_funcs, club, start, stop):
+    """
+    Runs (in a worker process) <custom_funcs> over rows
+    [start:stop] of <infile> and returns the resulting
+    values of the attributes they populate.
+    """
+    table = cache.get_table(infile)
+    fused = fuse(custom_funcs)
+    fields = projection(custom_funcs)
+    if fields is None:
+        records = cache.table_records(table, MemberRecord,
+                                      start, stop)
+    else:
+        records = cache.projected_records(table, fields,
+                                          MemberRecord, start, stop)
+    for record in records:
+        fused(record, club)
+    return {attr: getattr(club, attr)
+            for attr in shard_attrs(custom_funcs)}
+
+
+def traverse_in_parallel(infile, table, custom_funcs, club, jobs):
+    """
+    Map-reduce version of the loop in traverse_records:
+    The rows of <table> are split into <jobs> consecutive ranges
+    each of which is traversed in its own process (by
+    traverse_shard) after which the partial results are merged,
+    in order, into attributes of <club>.
+    Collectors with order dependent checks provide a 'seed'
+    function (see <collectors>) which is given the record
+    preceding each range.
+    """
+    rows = table['rows']
+    fieldnames = table['fieldnames']
+    bounds = [len(rows) * n // jobs for n in range(jobs + 1)]
+    shards = []
+    for start, stop in zip(bounds, bounds[1:]):
+        shard = shard_club(club)
+        if start:
+            previous = cache.row2record(fieldnames, rows[start - 1])
+            for func in custom_funcs:
+                seed = collectors[func].get('seed')
+                if seed:
+                    seed(previous, shard)
+        shards.append((start, stop, shard))
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        futures = [executor.submit(traverse_shard, infile,
+                                   custom_funcs, shard, start, stop)
+                   for start, stop, shard in shards]
+        results = [future.result() for future in futures]
+    for attr, merge in shard_attrs(custom_funcs).items():
+        value = results[0][attr]
+        for result in results[1:]:
+            value = merge(value, result[attr])
+        setattr(club, attr, value)
 
 
 func_dict = {}
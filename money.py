@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+
+# File: money.py
+
+"""
+The money fields (member.MONEY_KEYS) of the membership SPoT kept
+as columns: for each an array of (64 bit) integers and a 'null'
+mask (set where the field is blank or not a number) along with
+the few text fields (TEXT_FIELDS) the money reports also need.
+The columns are built once per version of the file (and kept by
+the parse cache) so the reports below work a column at a time
+rather than parsing each record's money fields again.
+(array & bytearray rather than NumPy: no extra dependency.)
+Typical usage:
+    columns = money.get_columns(club.infile)
+    money.payables(columns, club)
+"""
+
+import array
+import cache
+import member
+
+TEXT_FIELDS = ('first', 'last', 'email', 'status', 'dues')
+
+
+def column(table, field):
+    """
+    Returns a list of <table>'s values of <field>: None for rows
+    too short to have it (or for all if <field> isn't in the
+    header.)
+    """
+    rows = table['rows']
+    try:
+        i = table['fieldnames'].index(field)
+    except ValueError:
+        return [None] * len(rows)
+    return [row[i] if i < len(row) else None for row in rows]
+
+
+def table2columns(table):
+    """
+    Returns a dict with keys:
+        n: the number of rows (members) of <table>
+        values: MONEY_KEYS => array of int amounts (0 if null)
+        nulls: MONEY_KEYS => bytearray (1 if blank/not a number)
+        text: TEXT_FIELDS => list of (string) values
+    """
+    n = len(table['rows'])
+    ret = dict(n=n, values={}, nulls={}, text={})
+    for field in TEXT_FIELDS:
+        ret['text'][field] = column(table, field)
+    amounts = {}  # Few distinct strings: each converted only once.
+    for key in member.MONEY_KEYS:
+        values = array.array('q', bytes(8 * n))
+        nulls = bytearray(n)
+        for i, text in enumerate(column(table, key)):
+            try:
+                amount = amounts[text]
+            except KeyError:
+                try:
+                    amount = int(text)
+                except (ValueError, TypeError):
+                    amount = None
+                amounts[text] = amount
+            if amount is None:
+                nulls[i] = 1
+            else:
+                values[i] = amount
+        ret['values'][key] = values
+        ret['nulls'][key] = nulls
+    return ret
+
+
+def parse_columns(text):
+    """
+    The <parse> (see cache.load) of get_columns.
+    """
+    return table2columns(cache.parse_csv(text))
+
+
+def get_columns(infile):
+    """
+    Returns the money columns (see table2columns) of <infile>:
+    built again only if it's changed.
+    """
+    return cache.load(infile, parse_columns, 'money')
+
+
+def masks(columns):
+    """
+    Returns a list of the status bitmask (see member.status_mask)
+    of each row.
+    """
+    by_status = {}
+    ret = []
+    for status in columns['text']['status']:
+        try:
+            ret.append(by_status[status])
+        except KeyError:
+            mask = by_status[status] = member.status_mask(
+                                            dict(status=status or ''))
+            ret.append(mask)
+    return ret
+
+
+def name_keys(columns):
+    """
+    Returns a list of each row's name key ('last,first'.)
+    """
+    return [member.fstrings['key'].format(last=last, first=first)
+            for first, last in zip(columns['text']['first'],
+                                   columns['text']['last'])]
+
+
+def dues_paying(columns):
+    """
+    Returns a bytearray: 1 for each row that's dues paying (see
+    member.is_dues_paying.)
+    """
+    by_status = {}
+    ret = bytearray(columns['n'])
+    for i, status in enumerate(columns['text']['status']):
+        try:
+            paying = by_status[status]
+        except KeyError:
+            paying = by_status[status] = bool(member.is_dues_paying(
+                                            dict(status=status or '')))
+        if paying:
+            ret[i] = 1
+    return ret
+
+
+def bill(columns, yearly_dues, fees_by_name, names=None,
+         non_zero=None):
+    """
+    Returns what's to be charged to each row: a dict keyed by
+    MONEY_KEYS, values are (amounts, charged) pairs- an array of
+    the amount to be added to each row's field and a bytearray
+    (1 if the field is charged at all.)  Those dues paying are
+    charged <yearly_dues> along with the fees listed for them in
+    <fees_by_name> (name key => dict of category => amount: see
+    data.fee_index.)  <names> (see name_keys) can be provided if
+    already at hand.
+    If a dict is provided as <non_zero> it's populated (in the
+    same pass) with the balances before billing: keyed by row
+    (only those with any non zero money field), values are dicts
+    of the non zero amounts keyed by MONEY_KEYS.
+    """
+    n = columns['n']
+    paying = dues_paying(columns)
+    ret = {key: (array.array('q', bytes(8 * n)), bytearray(n))
+           for key in member.MONEY_KEYS}
+    dues, dues_charged = ret['dues']
+    if names is None:
+        names = name_keys(columns)
+    values = [(key, columns['values'][key]) for key in member.MONEY_KEYS]
+    for i, name in enumerate(names):
+        if non_zero is not None:
+            balance = {key: column[i] for key, column in values
+                       if column[i]}
+            if balance:
+                non_zero[i] = balance
+        if not paying[i]:
+            continue
+        dues[i] = yearly_dues
+        dues_charged[i] = 1
+        fees = fees_by_name.get(name)
+        if fees:
+            for category, amount in fees.items():
+                amounts, charged = ret[category.lower()]
+                amounts[i] += amount
+                charged[i] = 1
+    return ret
+
+
+def totals(columns):
+    """
+    Returns a dict keyed by MONEY_KEYS: values are the sum of
+    each column (nulls count as 0.)
+    """
+    return {key: sum(values)
+            for key, values in columns['values'].items()}
+
+
+def row_totals(columns):
+    """
+    Returns an array: the sum of each row's money fields.
+    """
+    ret = array.array('q', bytes(8 * columns['n']))
+    for values in columns['values'].values():
+        for i, value in enumerate(values):
+            if value:
+                ret[i] += value
+    return ret
+
+
+def payables(columns, club):
+    """
+    Column equivalent of member.get_payables: populates
+    club.still_owing, club.advance_payments & club.n_no_email.
+    """
+    club.still_owing = []
+    club.advance_payments = []
+    club.n_no_email = 0
+    payable = [not mask & member.NOT_PAYABLE_MASK
+               for mask in masks(columns)]
+    owing = {}   # row: list of what's owed
+    credit = {}  # row: list of what's been paid in advance
+    for key in member.MONEY_KEYS:
+        shown = {}  # Few distinct amounts: each formatted once.
+        for i, value in enumerate(columns['values'][key]):
+            if value and payable[i]:
+                try:
+                    item = shown[value]
+                except KeyError:
+                    item = shown[value] = "{:<5}{:>4d}".format(key, value)
+                (owing if value > 0 else credit).setdefault(
+                        i, []).append(item)
+    text = columns['text']
+    first, last, email = text['first'], text['last'], text['email']
+
+    def name(i):
+        if not email[i] and getattr(club, 'asterixUSPS', False):
+            return "{}, {}*: ".format(last[i], first[i])
+        return "{}, {}: ".format(last[i], first[i])
+
+    for i in sorted(owing):
+        club.still_owing.append("{:<30}".format(name(i))
+                                + ', '.join(owing[i]))
+        if not email[i]:
+            club.n_no_email += 1
+    for i in sorted(credit):
+        club.advance_payments.append("{:<30}".format(name(i))
+                                     + ', '.join(credit[i]))
+
+
+def payables_dict(columns, club):
+    """
+    Column equivalent of member.get_payables_dict: populates
+    club.owing_dict & club.credits_dict.
+    """
+    club.owing_dict = {}
+    club.credits_dict = {}
+    status_masks = masks(columns)
+    first, last = columns['text']['first'], columns['text']['last']
+    keyed = [(key, columns['values'][key], columns['nulls'][key])
+             for key in member.MONEY_KEYS]
+    for i, total in enumerate(row_totals(columns)):
+        if not total or status_masks[i] & member.NOT_PAYABLE_MASK:
+            continue
+        val = {key: values[i] for key, values, nulls in keyed
+               if not nulls[i]}
+        val['total'] = total
+        name_key = member.fstrings['key'].format(last=last[i],
+                                                 first=first[i])
+        if total > 0:
+            club.owing_dict[name_key] = val
+        else:
+            club.credits_dict[name_key] = val
+
+
+def dues_field(columns, club):
+    """
+    Column equivalent of member.ck_dues_field: populates
+    club.nulls, club.zeros, club.dues_owing & club.errors.
+    """
+    club.nulls = []
+    club.zeros = []
+    club.dues_owing = []
+    club.errors = []
+    status_masks = masks(columns)
+    text = columns['text']
+    first, last, dues = text['first'], text['last'], text['dues']
+    values = columns['values']['dues']
+    for i, null in enumerate(columns['nulls']['dues']):
+        if null:
+            if not status_masks[i] & member.NON_MEMBER_MASK:
+                club.errors.append("{}, {}".format(last[i], first[i]))
+            club.nulls.append("{}, {}: {}".format(
+                                            last[i], first[i], dues[i]))
+        elif values[i] == 0:
+            club.zeros.append("{}, {}: nothing owed".format(
+                                                    last[i], first[i]))
+        else:
+            club.dues_owing.append("{}, {}: {}".format(
+                                            last[i], first[i], dues[i]))
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+# File: profiler.py
+
+"""
+Optional timing of a run of utils.py (see its --profile and
+--profile_json options):
+    each of the functions applied by member.traverse_records
+    (call count, total & mean time and time per record,)
+    parsing of the csv files and
+    output
+are each timed separately.
+Nothing is timed (and nothing costs anything) unless <start> has
+been called: member.fuse checks <active> once per traversal.
+"""
+
+import time
+import json
+import threading
+import contextlib
+import helpers
+
+active = None  # The Profile in use (if any.)
+
+
+class Profile(object):
+    """
+    Accumulates timings for a single run.
+    """
+
+    def __init__(self):
+        self.funcs = {}   # function name: [calls, total seconds]
+        self.phases = {}  # phase name: [count, total seconds]
+        self.n_records = 0  # Records traversed (by all traversals.)
+        self.lock = threading.Lock()
+        self.began = time.perf_counter()
+
+    def func_timing(self, func):
+        """
+        Returns the (mutable) [calls, total] list for <func>
+        which the instrumented traversal updates directly
+        (holding <lock>: traversals may run in several threads.)
+        """
+        with self.lock:
+            return self.funcs.setdefault(func.__name__, [0, 0.0])
+
+    def add_phase(self, name, seconds):
+        with self.lock:  # Phases may be timed in several threads.
+            timing = self.phases.setdefault(name, [0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+
+    def as_dict(self):
+        elapsed = time.perf_counter() - self.began
+        with self.lock:
+            n_records = self.n_records
+            funcs = {name: tuple(timing)
+                     for name, timing in self.funcs.items()}
+            phases = {name: tuple(timing)
+                      for name, timing in self.phases.items()}
+        return dict(
+            elapsed=elapsed,
+            n_records=n_records,
+            funcs={name: dict(
+                    calls=calls,
+                    total=total,
+                    mean=total / calls if calls else 0.0,
+                    per_record=total / n_records if n_records else 0.0,
+                    )
+                   for name, (calls, total) in funcs.items()},
+            phases={name: dict(count=count, total=total)
+                    for name, (count, total) in phases.items()},
+            )
+
+    def report(self):
+        """
+        Returns a list of lines: functions (slowest first) and
+        then the other phases of the run.
+        """
+        profile = self.as_dict()
+        ret = ["Profile: {:.3f} sec elapsed, {} records traversed."
+               .format(profile['elapsed'], profile['n_records']),
+               ]
+        cells = ['function', 'calls', 'total ms',
+                 'mean us', 'us/record']
+        funcs = sorted(profile['funcs'].items(),
+                       key=lambda item: item[1]['total'], reverse=True)
+        for name, timing in funcs:
+            cells.extend((
+                name,
+                str(timing['calls']),
+                '{:.3f}'.format(timing['total'] * 1e3),
+                '{:.3f}'.format(timing['mean'] * 1e6),
+                '{:.3f}'.format(timing['per_record'] * 1e6),
+                ))
+        if funcs:
+            ret.extend(helpers.tabulate(cells,
+                    down=False, max_columns=5, max_width=1000))
+        cells = ['phase', 'count', 'total ms']
+        phases = sorted(profile['phases'].items(),
+                        key=lambda item: item[1]['total'], reverse=True)
+        for name, timing in phases:
+            cells.extend((
+                name,
+                str(timing['count']),
+                '{:.3f}'.format(timing['total'] * 1e3),
+                ))
+        if phases:
+            ret.append('')
+            ret.extend(helpers.tabulate(cells,
+                    down=False, max_columns=3, max_width=1000))
+        return ret
+
+    def dump(self, json_file):
+        with open(json_file, 'w') as stream:
+            json.dump(self.as_dict(), stream, indent=2)
+
+
+def start():
+    """
+    Turns profiling on (and returns the new Profile.)
+    """
+    global active
+    active = Profile()
+    return active
+
+
+def stop():
+    """
+    Turns profiling off; returns the Profile that was in use.
+    """
+    global active
+    profile, active = active, None
+    return profile
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Times the enclosed block (if profiling) as phase <name>.
+    """
+    if active is None:
+        yield
+        return
+    profile = active
+    began = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_phase(name, time.perf_counter() - began)
+
+
+if __name__ == "__main__":
+    print("profiler.py compiles OK.")
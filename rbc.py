@@ -22,7 +22,9 @@ import sys
 import csv
 import shutil
 import helpers
+import receipts
 import data
+import sqldb
 
 # these initial declarations provide a SPoT[1]
 # mainly for use by archive.py via the Club class.
@@ -62,6 +64,11 @@ class Club(object):
     INCLUDE_FEES = False
     QUIET = False
     QUIET = True
+    JOBS = 1  # Number of processes used to traverse records.
+    SQLITE = None  # SQLite data base used in place of SPoTs.
+    SPOOL_DIR = None  # Emails also rendered (see Pymail/spool.py.)
+    BCC_BATCH = 50  # See member.batch_emails.
+    MTA = 'easy'
     DATA_DIR = os.path.join(root_dir, data_dir)
     CHANGING_DATA = [os.path.join(root_dir, entry)
                         for entry in changing_data]
@@ -177,6 +184,8 @@ class Club(object):
         self.include_bad_emails = Club.INCLUDE_BAD_EMAILS
         self.include_fees = Club.INCLUDE_FEES
         self.quiet = Club.QUIET
+        self.jobs = Club.JOBS
+        self.sqlite = Club.SQLITE  # sqldb.Database if used.
         self.infile = Club.MEMBERSHIP_SPoT
         self.applicant_spot = Club.APPLICANT_SPoT
         self.applicant_csv = Club.APPLICANT_CSV
@@ -188,6 +197,9 @@ class Club(object):
         self.json_file = Club.EMAIL_JSON
         self.receipts_file = Club.RECEIPTS_FILE 
         self.mail_dir = self.MAILING_DIR
+        self.spool_dir = Club.SPOOL_DIR
+        self.bcc_batch = Club.BCC_BATCH
+        self.mta = Club.MTA
         self.thank_file = Club.THANK_FILE
         self.thank_archive = Club.THANK_ARCHIVE
         self.outfile = Club.STDOUT
@@ -201,6 +213,18 @@ class Club(object):
             self.include_bad_emails = args['--be']
             self.include_fees = args['-f']
             self.quiet = args['-q']
+            if args['--jobs']: self.jobs = int(args['--jobs'])
+            if args['--sqlite']:
+                try:
+                    self.sqlite = sqldb.Database(args['--sqlite'])
+                except sqldb.Stale as error:
+                    sys.exit(str(error))
+                for option in ('-i', '-X'):
+                    if args[option]:
+                        print("Warning: {} {} ignored: data comes from"
+                              " {} (see sqldb.py.)".format(
+                                  option, args[option], args['--sqlite']),
+                              file=sys.stderr)
             self.fee_details = args['-d']
             if args['-i']: self.infile = args['-i']
             if args['-A']: self.applicant_spot = args['-A']
@@ -215,6 +239,9 @@ class Club(object):
                 self.json_file = args['-j']
                 self.email_json_file = args['-j']
             if args["--dir"]: self.mail_dir = args["--dir"]
+            if args["--spool"]: self.spool_dir = args["--spool"]
+            if args["--batch"]: self.bcc_batch = int(args["--batch"])
+            if args["--mta"]: self.mta = args["--mta"]
             if args['-t']: self.thank_file = args['-t']
             if args['--thanked']:
                 self.thank_archive = args['--thanked']
@@ -256,49 +283,28 @@ class Club(object):
         return ','.join(ret)
 
 
-    def fee_totals(self):
+    def fee_totals(self, infile=None):
         """
         Returns a list of strings: subtotals and grand total.
         Sets up and populates self.invalid_lines ....
         (... the only reason it's a class method
         rather than a function or a static method.)
+        <infile> defaults to self.receipts_file.
         NOTE: Money taken in (or refunded) must appear
         within line[28:33]! i.e. maximum 5 digits (munus sign
         and only 4 digits if negative).
+        Only lines added since the last time are parsed: see
+        receipts.get_ledger.
         """
         print("Running Club.fee_totals()")
-        res = ["Fees taken in to date:"]
-        self.invalid_lines = []
-
-        total = 0
-        subtotal = 0
-
-        with open(self.receipts_file, "r") as file_obj:
-            print('Reading from file "{}".'.format(file_obj.name))
-            for line in file_obj:
-                line = line.rstrip()  # get rid of trailing '\n'
-                if line.startswith("Date:") or not line.strip():
-                    continue  # Ignore date headers and blank lines
-                if (line[29:32] == "---") and subtotal:
-                    res.append(
-                        "    SubTotal                 --- {:>10}"
-                       .format(helpers.format_dollar_value(subtotal)))
-                    subtotal = 0
-                try:
-                    amount = int(line[28:33])
-                except (ValueError, IndexError):
-                    self.invalid_lines.append(line)
-                    continue
-                total += amount
-                subtotal += amount
-        if subtotal:
-            res.append("         SubTotal            --- {:>10}"
-                       .format(helpers.format_dollar_value(subtotal)))
-        res.append("\nGrand Total to Date:         --- ---- {:>10}"
-                   .format(helpers.format_dollar_value(total)))
+        if infile is None:
+            infile = self.receipts_file
+        print('Reading from file "{}".'.format(infile))
+        ledger = receipts.get_ledger(infile)
         ## Find 'error' lines (those without expected data)
         ## in club.invalid_lines
-        return res
+        self.invalid_lines = list(ledger['invalid_lines'])
+        return receipts.totals_report(ledger)
 # ##
 # ###  End of Club class declaration.
 
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# File: receipts.py
+
+"""
+An index (the 'ledger') of a receipts file (Data/receipts-YYYY.txt)
+kept (see cache.get_snapshot) in the cache.  The ledger records
+how far into the file it has got (a byte offset) along with the
+running total, the subtotals of each section and who paid what
+when.  Since receipts are only ever appended, only lines added
+since are parsed; if the file has been edited (rather than added
+to) it's parsed again from the start.
+Format of the receipts file (as expected by rbc.Club.fee_totals):
+    'Date: ...' lines head each day's receipts;
+    amounts (at most 5 characters) must be within line[28:33];
+    a line with '---' at line[29:32] closes a section (subtotal.)
+Typical usage:
+    ledger = receipts.get_ledger(club.receipts_file)
+    report = receipts.totals_report(ledger)
+"""
+
+import copy
+import hashlib
+import cache
+import helpers
+
+LEDGER_VERSION = 2  # Bump whenever the format of a ledger changes.
+
+
+def new_ledger():
+    """
+    Returns an empty ledger: a dict with keys:
+        offset: bytes of the file accounted for (complete lines)
+        anchor: sha256 of the bytes before <offset>
+        signature: see cache.file_signature
+        date: that of the current section ('Date:' line)
+        total: of all amounts
+        subtotal: of the current (still open) section
+        subtotals: of each section closed by a '---' line
+        by_name: 'last,first' => list of (date, amount)
+        by_date: date => list of ('last,first', amount)
+        invalid_lines: lines without an amount
+    """
+    return dict(version=LEDGER_VERSION, offset=0, anchor='',
+                signature=None, date='', total=0, subtotal=0,
+                subtotals=[], by_name={}, by_date={},
+                invalid_lines=[])
+
+
+def name_key(line):
+    """
+    Returns the 'last,first' key of whoever a receipt <line> is
+    for (or just what's there if it's not 'first last'.)
+    """
+    names = line[:28].split()
+    if len(names) >= 2:
+        return '{},{}'.format(names[1], names[0])
+    return ' '.join(names)
+
+
+def add_lines(ledger, lines):
+    """
+    Updates <ledger> with <lines> (of text): the same parsing as
+    rbc.Club.fee_totals always did.
+    """
+    for line in lines:
+        line = line.rstrip()  # get rid of trailing '\n'
+        if line.startswith("Date:"):
+            ledger['date'] = line[len("Date:"):].strip()
+            continue  # Ignore date headers
+        if not line.strip():
+            continue  # ... and blank lines
+        if (line[29:32] == "---") and ledger['subtotal']:
+            ledger['subtotals'].append(ledger['subtotal'])
+            ledger['subtotal'] = 0
+        try:
+            amount = int(line[28:33])
+        except (ValueError, IndexError):
+            ledger['invalid_lines'].append(line)
+            continue
+        ledger['total'] += amount
+        ledger['subtotal'] += amount
+        name = name_key(line)
+        ledger['by_name'].setdefault(name, []).append(
+                                            (ledger['date'], amount))
+        ledger['by_date'].setdefault(ledger['date'], []).append(
+                                            (name, amount))
+
+
+def anchor(stream, offset):
+    """
+    Returns the sha256 of the bytes of <stream> before <offset>:
+    all of what's been accounted for, so an edit anywhere in it is
+    noticed.  (Receipts files are small.)
+    """
+    stream.seek(0)
+    return hashlib.sha256(stream.read(offset)).hexdigest()
+
+
+def get_ledger(receipts_file):
+    """
+    Returns the ledger (see new_ledger) of <receipts_file>: only
+    what's been added since it was last looked at is parsed.
+    (A final line without its '\n' is included but not saved:
+    it may not be complete.)
+    """
+    signature = cache.file_signature(receipts_file)
+    ledger = cache.get_snapshot(receipts_file, 'ledger')
+    if not ledger or ledger.get('version') != LEDGER_VERSION:
+        ledger = new_ledger()
+    with open(receipts_file, 'rb') as stream:
+        if ledger['signature'] != signature:
+            if (signature[2] < ledger['offset']
+                    or anchor(stream, ledger['offset'])
+                    != ledger['anchor']):
+                ledger = new_ledger()  # Edited: start again.
+            stream.seek(ledger['offset'])
+            added = stream.read()
+            complete = added.rfind(b'\n') + 1
+            add_lines(ledger, added[:complete].decode(
+                                    cache.ENCODING).split('\n'))
+            ledger['offset'] += complete
+            ledger['anchor'] = anchor(stream, ledger['offset'])
+            ledger['signature'] = signature
+            cache.save_snapshot(receipts_file, 'ledger', ledger)
+            partial = added[complete:]
+        else:
+            stream.seek(ledger['offset'])
+            partial = stream.read()
+    if partial:
+        ledger = copy.deepcopy(ledger)
+        add_lines(ledger, [partial.decode(cache.ENCODING)])
+    return ledger
+
+
+def totals_report(ledger):
+    """
+    Returns a list of strings: subtotals and grand total (as
+    rbc.Club.fee_totals always has.)
+    """
+    res = ["Fees taken in to date:"]
+    for subtotal in ledger['subtotals']:
+        res.append(
+            "    SubTotal                 --- {:>10}"
+            .format(helpers.format_dollar_value(subtotal)))
+    if ledger['subtotal']:
+        res.append("         SubTotal            --- {:>10}"
+                   .format(helpers.format_dollar_value(
+                                                ledger['subtotal'])))
+    res.append("\nGrand Total to Date:         --- ---- {:>10}"
+               .format(helpers.format_dollar_value(ledger['total'])))
+    return res
+
+
+def received_from(name, ledgers):
+    """
+    Returns a list of (date, amount) of what <name> ('last,first')
+    has paid according to any of <ledgers>.
+    """
+    ret = []
+    for ledger in ledgers:
+        ret.extend(ledger['by_name'].get(name, ()))
+    return ret
+
+
+def received_on(date, ledgers):
+    """
+    Returns a list of ('last,first', amount) of what was received
+    on <date> (as it appears after 'Date:') according to any of
+    <ledgers>.
+    """
+    ret = []
+    for ledger in ledgers:
+        ret.extend(ledger['by_date'].get(date, ()))
+    return ret
+
+
+def totals_by_file(receipts_files):
+    """
+    Returns a dict keyed by each of <receipts_files> (e.g. one for
+    each year) with its total as value; also under the key None,
+    the total of them all.
+    """
+    ret = {}
+    for receipts_file in receipts_files:
+        ret[receipts_file] = get_ledger(receipts_file)['total']
+    ret[None] = sum(ret.values())
+    return ret
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+# File: reconcile.py
+
+"""
+Reconciles two indexed sources: either mappings (key => value)
+or sets of keys.  A single pass over each yields a (structured)
+result: the keys only in the left, only in the right and those
+in both but with different values.  Used by data.ck_data; results
+can be rendered as the text of its report or dumped (for use by
+other programs) as json or csv.
+Typical usage:
+    result = reconcile.compare('dues', from_memlist, from_ledger,
+                               'memlist', 'ledger')
+    if reconcile.differs(result):
+        ...
+"""
+
+import csv
+import json
+import operator
+import helpers
+
+CSV_FIELDS = ('check', 'left', 'right', 'kind', 'key',
+              'left_value', 'right_value')
+
+
+def compare(check, left, right, left_name='left', right_name='right'):
+    """
+    Returns a dict describing the differences between <left> and
+    <right> (each a mapping or a set- anything supporting 'in'
+    efficiently.)  Keys:
+        check: <check>, the name of what's being reconciled
+        left, right: <left_name>, <right_name>
+        only_left: sorted list of keys in <left> but not in <right>
+        only_right: sorted list of keys in <right> but not in <left>
+        mismatched: sorted list of (key, left value, right value)
+            for keys in both whose values differ (only if both
+            are mappings.)
+    """
+    mapped = hasattr(left, 'items') and hasattr(right, 'items')
+    only_left = []
+    mismatched = []
+    for key in left:
+        if key not in right:
+            only_left.append(key)
+        elif mapped:
+            left_value = left[key]
+            right_value = right[key]
+            if left_value != right_value:
+                mismatched.append((key, left_value, right_value))
+    only_right = [key for key in right if key not in left]
+    only_left.sort()
+    only_right.sort()
+    mismatched.sort(key=operator.itemgetter(0))
+    return dict(check=check, left=left_name, right=right_name,
+                only_left=only_left, only_right=only_right,
+                mismatched=mismatched)
+
+
+def differs(result):
+    """
+    Returns True if <result> (of compare) found any differences.
+    """
+    return bool(result['only_left'] or result['only_right']
+                or result['mismatched'])
+
+
+def keys_differ(result):
+    """
+    Returns True if <result> (of compare) found keys that are in
+    only one of the sources.
+    """
+    return bool(result['only_left'] or result['only_right'])
+
+
+def listing(result, header_only_left, header_only_right):
+    """
+    Returns a list of lines (as did helpers.check_sets) with the
+    keys only in each source, each under its header.
+    """
+    ret = []
+    if result['only_left']:
+        helpers.add_header2list(header_only_left, ret,
+                                underline_char='-')
+        ret.extend(result['only_left'])
+    if result['only_right']:
+        helpers.add_header2list(header_only_right, ret,
+                                underline_char='-')
+        ret.extend(result['only_right'])
+    return ret
+
+
+def joined(value):
+    """
+    Returns a collection of strings (as a sorted, comma separated
+    string.)
+    """
+    return ', '.join(sorted(value))
+
+
+def by_key(result, show=joined):
+    """
+    Returns a string (as did helpers.compare_dicts) with the keys
+    (and their values) only in each source and, for the keys whose
+    values differ, the two values.  Values are shown by <show>.
+    """
+    ret = []
+    if result['only_left']:
+        ret.append("Only in {}:".format(result['left']))
+        ret.extend("\t{}: {}".format(key, show(value))
+                   for key, value in result['only_left_values'])
+    if result['only_right']:
+        ret.append("Only in {}:".format(result['right']))
+        ret.extend("\t{}: {}".format(key, show(value))
+                   for key, value in result['only_right_values'])
+    if result['mismatched']:
+        ret.append("Different in {} and {}:".format(result['left'],
+                                                   result['right']))
+        ret.extend("\t{}: {} != {}".format(key, show(left), show(right))
+                   for key, left, right in result['mismatched'])
+    return '\n'.join(ret)
+
+
+def with_values(result, left, right):
+    """
+    Adds to <result> (of compare) the values (from the mappings
+    <left> and <right>) of the keys found only in one of them:
+    lists of (key, value) under 'only_left_values' and
+    'only_right_values'.  Returns <result>.
+    """
+    result['only_left_values'] = [(key, left[key])
+                                  for key in result['only_left']]
+    result['only_right_values'] = [(key, right[key])
+                                   for key in result['only_right']]
+    return result
+
+
+def jsonable(value):
+    """
+    Used (as json's <default>) for values json can't represent.
+    """
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return repr(value)
+
+
+def rows(results):
+    """
+    Yields a dict (with keys CSV_FIELDS) for each difference found
+    in <results> (an iterable of what compare returns.)  Values
+    (if known: see with_values) are json encoded.
+    """
+    def encoded(value):
+        return json.dumps(value, sort_keys=True, default=jsonable)
+
+    for result in results:
+        names = dict(check=result['check'], left=result['left'],
+                     right=result['right'])
+        left_values = dict(result.get('only_left_values', ()))
+        right_values = dict(result.get('only_right_values', ()))
+        for key in result['only_left']:
+            yield dict(names, kind='only_left', key=key,
+                       left_value=(encoded(left_values[key])
+                                   if key in left_values else ''),
+                       right_value='')
+        for key in result['only_right']:
+            yield dict(names, kind='only_right', key=key,
+                       left_value='',
+                       right_value=(encoded(right_values[key])
+                                    if key in right_values else ''))
+        for key, left, right in result['mismatched']:
+            yield dict(names, kind='mismatched', key=key,
+                       left_value=encoded(left),
+                       right_value=encoded(right))
+
+
+def dump_json(results, json_file):
+    """
+    Writes <results> (a list of what compare returns) to
+    <json_file>.
+    """
+    with open(json_file, 'w') as stream:
+        json.dump(results, stream, indent=2, sort_keys=True,
+                  default=jsonable)
+
+
+def dump_csv(results, csv_file):
+    """
+    Writes <results> (a list of what compare returns) to
+    <csv_file>: one row per difference (see rows.)
+    """
+    with open(csv_file, 'w', newline='') as stream:
+        writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS,
+                                dialect='unix',
+                                quoting=csv.QUOTE_MINIMAL)
+        writer.writeheader()
+        writer.writerows(rows(results))
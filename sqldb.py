@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+
+# File: sqldb.py
+
+"""
+An optional SQLite version of the club's SPoT files:
+    memlist.csv, applicants.txt, sponsors.txt,
+    dock.txt, kayak.txt, mooring.txt and receipts-YYYY.txt
+Each is imported into its own (indexed) table; all of them can be
+exported back into files identical (byte for byte) to those
+imported.
+Membership records are kept one column per field (with indices on
+name key, email and status) so that utils.py commands given the
+--sqlite option have their collectors' filters (see 'where' in
+member.collectors) and field lists applied by the query rather
+than by a scan of every record.
+Every SPoT is also kept line for line (comments, quoting and
+all) which is what is exported; the other tables (members,
+applicants, sponsors and fees) are for querying.  (Receipts files
+are only kept line for line: see receipts.py for their totals.)
+The data base is only used while it's up to date: if any SPoT
+has changed (or been added) since it was imported, opening it
+(see Database) raises Stale.
+
+Usage:
+    ./sqldb.py import <db> [<data_dir>]
+    ./sqldb.py export <db> <dest_dir>
+
+Arguments:
+    <db>  The SQLite data base file (created if necessary.)
+    <data_dir>  Directory containing the SPoT files.
+                Defaults to the club's Data directory.
+    <dest_dir>  Directory into which to write the SPoT files
+                (which it must not already contain.)
+"""
+
+import os
+import glob
+import json
+import sqlite3
+from docopt import docopt
+import cache
+import helpers
+import member
+import data
+import rbc
+
+SCHEMA = """
+CREATE TABLE spots (        -- the files imported
+    name TEXT PRIMARY KEY,  -- base name (eg: memlist.csv)
+    kind TEXT,              -- members, applicants, sponsors,
+                            -- fees or receipts
+    hash TEXT,              -- sha256 of the content
+    path TEXT,              -- where it was imported from
+    mtime INTEGER,          -- } of the file when last found
+    size INTEGER            -- } to be unchanged (see changed)
+    );
+CREATE TABLE lines (        -- SPoTs line by line
+    spot TEXT,
+    line_no INTEGER,
+    text TEXT,
+    PRIMARY KEY (spot, line_no)
+    );
+CREATE TABLE fieldnames (position INTEGER PRIMARY KEY, name TEXT);
+CREATE TABLE member_stati (row INTEGER, status TEXT);
+CREATE INDEX member_stati_status ON member_stati (status, row);
+CREATE TABLE applicants (
+    key TEXT, first TEXT, last TEXT, status TEXT,
+    app_rcvd TEXT, fee_rcvd TEXT, "1st" TEXT, "2nd" TEXT,
+    "3rd" TEXT, inducted TEXT, dues_paid TEXT
+    );
+CREATE INDEX applicants_key ON applicants (key);
+CREATE INDEX applicants_status ON applicants (status);
+CREATE TABLE sponsors (
+    applicant TEXT,         -- name key of the applicant
+    position INTEGER,       -- 1st or 2nd sponsor
+    sponsor TEXT            -- as written ('first last')
+    );
+CREATE INDEX sponsors_applicant ON sponsors (applicant);
+CREATE TABLE fees (key TEXT, category TEXT, amount INTEGER);
+CREATE INDEX fees_category ON fees (category, key);
+CREATE INDEX fees_key ON fees (key);
+"""
+# The members table is created once its fieldnames are known:
+#   members (row INTEGER PRIMARY KEY, key TEXT,
+#            n_values INTEGER, extra TEXT, <a column per field>)
+
+FEE_SPOTS = ('dock.txt', 'kayak.txt', 'mooring.txt')
+
+
+class Stale(Exception):
+    """
+    Raised (by Database) if the SPoT files have changed since the
+    data base was imported from them.
+    """
+
+
+def quoted(name):
+    """
+    Returns <name> quoted as an SQL identifier.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def spot_files(data_dir):
+    """
+    Returns a list of (kind, file name) tuples: the SPoT files
+    found in <data_dir>.
+    """
+    ret = [('members', os.path.join(data_dir, 'memlist.csv')),
+           ('applicants', os.path.join(data_dir, 'applicants.txt')),
+           ('sponsors', os.path.join(data_dir, 'sponsors.txt')),
+           ]
+    ret.extend(('fees', os.path.join(data_dir, name))
+               for name in FEE_SPOTS)
+    ret.extend(('receipts', name) for name in sorted(glob.glob(
+               os.path.join(data_dir, 'receipts-*.txt'))))
+    return [(kind, name) for kind, name in ret
+            if os.path.isfile(name)]
+
+
+def import_members(db, spot, text):
+    table = cache.parse_csv(text)
+    fieldnames = table['fieldnames']
+    n_fields = len(fieldnames)
+    columns = ', '.join('{} TEXT'.format(quoted(name))
+                        for name in fieldnames)
+    db.execute("CREATE TABLE members (row INTEGER PRIMARY KEY, "
+               "key TEXT, n_values INTEGER, extra TEXT, {})"
+               .format(columns))
+    db.execute("CREATE INDEX members_key ON members (key)")
+    if 'email' in fieldnames:
+        db.execute("CREATE INDEX members_email ON members (email)")
+    db.executemany("INSERT INTO fieldnames VALUES (?, ?)",
+                   enumerate(fieldnames))
+    insert = "INSERT INTO members VALUES (?, ?, ?, ?{})".format(
+                                                ', ?' * n_fields)
+    stati = []
+    for row_id, row in enumerate(table['rows']):
+        record = cache.row2record(fieldnames, row)
+        extra = record.pop(None, None)
+        if extra is not None:
+            extra = json.dumps(extra)
+        key = member.fstrings['key'].format(**record)
+        db.execute(insert, (row_id, key, len(row), extra,
+                            *(record[name] for name in fieldnames)))
+        if record.get('status'):
+            stati.extend((row_id, status) for status
+                         in sorted(member.get_status_set(record)))
+    db.executemany("INSERT INTO member_stati VALUES (?, ?)", stati)
+
+
+def import_applicants(db, spot, lines):
+    """
+    Same parsing as data.parse_applicants: returns a list of
+    ParseErrors (of lines skipped.)
+    """
+    errors = []
+    fields = rbc.Club.APPLICANT_DATA_FIELD_NAMES[:10]
+    for record in data.iter_applicants(lines, errors):
+        db.execute("INSERT INTO applicants VALUES (?{})".format(
+                   ', ?' * len(fields)),
+                   (member.fstrings['key'].format(**record),
+                    *(record[name] for name in fields)))
+    return errors
+
+
+def import_sponsors(db, spot, lines):
+    """
+    Returns a list of ParseErrors (of lines skipped.)
+    """
+    errors = []
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            applicant, sponsors = data.parse_sponsor_data_line(line)
+        except data.ParseError as error:
+            errors.append(data.ParseError(error.reason, line, line_no))
+            continue
+        db.executemany("INSERT INTO sponsors VALUES (?, ?, ?)",
+                       [(applicant, position, sponsor) for
+                        position, sponsor in enumerate(sponsors, 1)])
+    return errors
+
+
+def import_fees(db, spot, lines):
+    """
+    Same parsing as data.get_dict (which stops at a bad line): so
+    returns no ParseErrors.
+    """
+    category = spot.split('.')[0]
+    for line in helpers.useful_lines(lines, comment='#'):
+        name, amount = line.split(':', maxsplit=1)
+        names = name.split()
+        db.execute("INSERT INTO fees VALUES (?, ?, ?)",
+                   ('{},{}'.format(names[1], names[0]),
+                    category, int(amount)))
+    return []
+
+
+importers = {
+    'applicants': import_applicants,
+    'sponsors': import_sponsors,
+    'fees': import_fees,
+    }  # (Receipts files are kept line for line only.)
+
+
+def import_spots(db_file, data_dir):
+    """
+    Creates <db_file> (replacing any data base already there) from
+    the SPoT files in <data_dir>.  Lines that can't be parsed are
+    reported (see data.report_parse_errors) and skipped.  Returns
+    the files imported.
+    """
+    files = spot_files(data_dir)
+    if os.path.exists(db_file):
+        os.remove(db_file)
+    db = sqlite3.connect(db_file)
+    with db:
+        db.executescript(SCHEMA)
+        for kind, name in files:
+            path, mtime, size = cache.file_signature(name)
+            with open(name, 'rb') as stream:
+                content = stream.read()
+            spot = os.path.basename(name)
+            db.execute("INSERT INTO spots VALUES (?, ?, ?, ?, ?, ?)",
+                       (spot, kind, cache.file_hash(content=content),
+                        path, mtime, size))
+            text = content.decode(cache.ENCODING)
+            lines = text.splitlines(keepends=True)
+            db.executemany("INSERT INTO lines VALUES (?, ?, ?)",
+                           [(spot, line_no, line) for
+                            line_no, line in enumerate(lines)])
+            if kind == 'members':
+                import_members(db, spot, text)
+            elif kind in importers:
+                data.report_parse_errors(
+                        importers[kind](db, spot, lines), name)
+    db.close()
+    return [name for kind, name in files]
+
+
+def export_spots(db_file, dest_dir):
+    """
+    Writes each of the SPoT files kept in <db_file> into
+    <dest_dir>.  Returns the files written.
+    """
+    database = Database(db_file, check=False)
+    spots = [name for (name, ) in database.db.execute(
+             "SELECT name FROM spots")]
+    os.makedirs(dest_dir, exist_ok=True)
+    ret = []
+    for name in spots:
+        out_file = os.path.join(dest_dir, name)
+        if os.path.exists(out_file):
+            raise FileExistsError(out_file)
+        with open(out_file, 'wb') as stream:
+            for (text, ) in database.db.execute(
+                    "SELECT text FROM lines WHERE spot = ? "
+                    "ORDER BY line_no", (name, )):
+                stream.write(text.encode(cache.ENCODING))
+        ret.append(out_file)
+    database.close()
+    return ret
+
+
+class Database(object):
+    """
+    An imported data base (see import_spots) opened for use in
+    place of the SPoT files: utils.py's --sqlite option assigns
+    an instance to club.sqlite which member.traverse_records (and
+    populate_ms_by_status & data.gather_extra_fees_data) then use.
+    Unless <check> is False, raises Stale if it's out of date (see
+    changed.)
+    """
+
+    def __init__(self, db_file, check=True):
+        self.name = db_file
+        if not os.path.isfile(db_file):
+            raise FileNotFoundError(db_file)
+        # Read only and so may be shared by threads (see
+        # data.load_sources.)
+        self.db = sqlite3.connect(db_file, check_same_thread=False)
+        self.fieldnames = tuple(name for (name, ) in self.db.execute(
+                "SELECT name FROM fieldnames ORDER BY position"))
+        if check:
+            changed = self.changed()
+            if changed:
+                self.close()
+                raise Stale("SPoT file(s) changed since {} was "
+                            "imported: {}\n(Run ./sqldb.py import "
+                            "again.)".format(db_file,
+                                             ', '.join(changed)))
+
+    def close(self):
+        self.db.close()
+
+    def spots(self):
+        """
+        Returns a dict: each imported SPoT's path => (its hash,
+        mtime, size.)
+        """
+        try:
+            return {path: values for path, *values in self.db.execute(
+                    "SELECT path, hash, mtime, size FROM spots")}
+        except sqlite3.OperationalError:  # Imported by an old version.
+            return None
+
+    def changed(self):
+        """
+        Returns a list of the SPoT files (paths) which have been
+        changed, removed or added since the data base was imported
+        (all of them if it's not known where they came from.)
+        A file is only hashed if its mtime or size is not as was
+        recorded (which, if its content is the same, is updated.)
+        """
+        spots = self.spots()
+        if not spots:
+            return ['(all)']
+        ret = []
+        for path, (digest, mtime, size) in spots.items():
+            try:
+                signature = cache.file_signature(path)
+            except OSError:
+                ret.append(path)
+                continue
+            if signature[1:] == (mtime, size):
+                continue
+            if cache.file_hash(path) != digest:
+                ret.append(path)
+                continue
+            with self.db:  # Touched but not changed.
+                self.db.execute(
+                    "UPDATE spots SET mtime = ?, size = ? "
+                    "WHERE path = ?", (signature[1], signature[2], path))
+        data_dirs = {os.path.dirname(path) for path in spots}
+        for data_dir in sorted(data_dirs):
+            ret.extend(os.path.abspath(name) for kind, name
+                       in spot_files(data_dir)
+                       if os.path.abspath(name) not in spots)
+        return ret
+
+    def select(self, fields=None, where=None):
+        """
+        Returns membership rows (in memlist.csv order) in the same
+        form as cache.get_table: a dict with 'fieldnames' and
+        'rows' keys.
+        If <fields> is provided rows contain only those fields
+        (None if a short row lacks one) otherwise each row is
+        exactly as it was in memlist.csv.
+        <where>: an SQL condition (on the members table) that
+        rows must meet.
+        """
+        if fields is None:
+            columns = self.fieldnames
+        else:
+            columns = [field for field in fields
+                       if field in self.fieldnames]
+        query = "SELECT n_values, extra{} FROM members".format(
+                ''.join(', ' + quoted(column) for column in columns))
+        if where:
+            query += " WHERE " + where
+        query += " ORDER BY row"
+        rows = []
+        for n_values, extra, *values in self.db.execute(query):
+            if fields is None:
+                values = values[:n_values]
+                if extra is not None:
+                    values.extend(json.loads(extra))
+            rows.append(tuple(values))
+        return dict(fieldnames=tuple(columns), rows=rows)
+
+    def rows_by_status(self, stati):
+        """
+        Returns a dict keyed by each of <stati> (which any row has);
+        values are lists of (full) rows, in memlist.csv order.
+        """
+        ret = {}
+        stati = sorted(set(stati))
+        query = ("SELECT s.status, m.n_values{} FROM member_stati s "
+                 "JOIN members m ON m.row = s.row "
+                 "WHERE s.status IN ({}) ORDER BY s.status, m.row"
+                 .format(''.join(', m.' + quoted(name)
+                                 for name in self.fieldnames),
+                         ', '.join('?' * len(stati))))
+        for status, n_values, *values in self.db.execute(query, stati):
+            ret.setdefault(status, []).append(tuple(values[:n_values]))
+        return ret
+
+    def emails(self, keys):
+        """
+        Returns a dict: the email of each member whose name key
+        is one of <keys> (as data.populate_sponsor_data finds
+        from memlist.csv.)
+        """
+        keys = sorted(set(keys))
+        if not keys or 'email' not in self.fieldnames:
+            return {}
+        return dict(self.db.execute(
+                "SELECT key, email FROM members WHERE key IN ({}) "
+                "ORDER BY row".format(', '.join('?' * len(keys))), keys))
+
+    def fees(self, category):
+        """
+        Returns what data.get_dict returns for the <category>
+        (dock, kayak or mooring) SPoT: a dict keyed by name key;
+        values are the fee (as a string.)
+        """
+        return {key: str(amount) for key, amount in self.db.execute(
+                "SELECT key, amount FROM fees WHERE category = ? "
+                "ORDER BY rowid", (category, ))}
+
+
+def main():
+    args = docopt(__doc__)
+    if args['import']:
+        data_dir = args['<data_dir>'] or rbc.Club.DATA_DIR
+        for name in import_spots(args['<db>'], data_dir):
+            print("Imported {}".format(name))
+    elif args['export']:
+        for name in export_spots(args['<db>'], args['<dest_dir>']):
+            print("Exported {}".format(name))
+
+
+if __name__ == "__main__":
+    main()
@@ -15,21 +15,21 @@ Consult the README file for further info.
 
 Usage:
   ./utils.py [-O -w <width> -r <rows> ] [ -? | --help | --version]
-  ./utils.py ck_data [-O -d -i <infile> -A <app_spot> -S <sponsors_spot> -X <fees_spots> -C <contacts_spot> -o <outfile>]
-  ./utils.py show [-O --exec -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile> ]
-  ./utils.py report [-O -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile> ]
+  ./utils.py ck_data [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -d -i <infile> -A <app_spot> -S <sponsors_spot> -X <fees_spots> -C <contacts_spot> -o <outfile> -j <json> --csv <csv_file>]
+  ./utils.py show [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> --exec -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile> ]
+  ./utils.py report [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile> ]
   ./utils.py extra_fees_report (-o <outfile>|-j <json>|--csv <csv_file>) [-O -q -f -H --by_fee_category]
-  ./utils.py stati [-O -D -M -B -m -s <stati> -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile>]
+  ./utils.py stati [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -D -M -B -m -s <stati> -i <infile> -A <applicant_spot> -S <sponsors_spot> -o <outfile>]
   ./utils.py create_applicant_csv [-O -i <infile> -A <applicant_spot> -S <sponsors_spot> --all_applicants -o <outfile>]
-  ./utils.py zeros [-O -i <infile> -o <outfile]
-  ./utils.py usps [-O -i <infile> -q --be --sec -H -j <json> -o <outfile> --csv csv_file]
-  ./utils.py payables [-O -T -w <width> -i <infile> -o <outfile>]
+  ./utils.py zeros [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -i <infile> -o <outfile]
+  ./utils.py usps [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -i <infile> -q --be --sec -H -j <json> -o <outfile> --csv csv_file]
+  ./utils.py payables [-O --jobs <jobs> --sqlite <db> --profile --profile_json <profile_json> -T -w <width> -i <infile> -o <outfile>]
   ./utils.py show_mailing_categories [-O -T -w <width> -o <outfile>]
-  ./utils.py prepare_mailing --which <letter> [-O --oo -p <printer> -i <infile> -j <json_file> --dir <mail_dir> --mta <mta> --cc <cc> --bcc <bcc> ATTACHMENTS...]
-  ./utils.py thank [-t <2thank> -O -p <printer> -j <json_file> --dir <mail_dir> -o <temp_membership_file> -e <error_file>]
+  ./utils.py prepare_mailing --which <letter> [-O --jobs <jobs> --profile --profile_json <profile_json> --oo -p <printer> -i <infile> -j <json_file> --dir <mail_dir> --spool <spool_dir> --batch <k> --mta <mta> --cc <cc> --bcc <bcc> ATTACHMENTS...]
+  ./utils.py thank [-t <2thank> -O --profile --profile_json <profile_json> -p <printer> -j <json_file> --dir <mail_dir> -o <temp_membership_file> -e <error_file>]
   ./utils.py archive_thanks [-t <2thank> -O --thanked <thank_archive> -e <error_file>]
   ./utils.py display_emails [-O] -j <json_file> [-o <txt_file>]
-  ./utils.py send_emails [-O --mta <mta> --emailer <emailer>] -j <json_file>
+  ./utils.py send_emails [-O --mta <mta> --emailer <emailer> --jobs <jobs> --journal <journal>] (-j <json_file> | --spool <spool_dir>)
   ./utils.py emailing [-O -i <infile> -F <muttrc>] --subject <subject> -c <content> [ATTACHMENTS...]
   ./utils.py restore_fees [-O -i <membership_file> -X <fees_spots> -o <temp_membership_file> -e <error_file>]
   ./utils.py fee_intake_totals [-O -i <infile> -o <outfile> --receipts <receipts_file>  -e <error_file>]
@@ -47,6 +47,11 @@ Options:
   --by_fee_category  extra_fee_report command defaults to reporting
         by name; this makes report keyed by fee category
   --be   Include those with an email deemed 'bad'/not working
+  --batch <k>   prepare_mailing: for content types marked
+        'broadcast' (see content.py) emails the same (but for the
+        salutation) are sent Bcc to up to <k> members each (see
+        member.batch_emails); 0 for one email per member.
+        [default: 50]
   --bcc <bcc>   Comma separated listing of blind copy recipients
   --cc <cc>   Comma separated listing of cc recipients
         If a single string "sponsors" is specified, then one assumes
@@ -61,8 +66,11 @@ Options:
                      containing letters for batch printing.
   -e <error_file>   Specify name of a file to which an
             error report can be written.
-  --emailer <emailer>  Use bash (via smtp or mutt) or python
-                    to send emails.  [default: python]
+  --emailer <emailer>  Use bash (via smtp or mutt), python or
+                    async (python using asyncio: see
+                    Pymail/asend.py; STARTTLS needs Python
+                    3.11 or later) to send emails.
+                    [default: python]
   --exec  Within 'show' cmnd: include listing of executive commitee.
   -f  Include fee charged. (extra_fees_report)
   -F <function>  Name of function to apply. (new_db command)
@@ -83,6 +91,15 @@ Options:
   -j <json>  Specify a json formated file
               Used mainly but not exclusively for emails.
               (whether for input or output depends on context.)
+  --jobs <jobs>  Number of processes to use when traversing the
+            membership file (or, with --spool, rendering emails.)
+            Only worth while (and only used) if it's very large.
+            send_emails (--emailer bash): number of mutt
+            processes run at once.  [default: 1]
+  --journal <journal>  Record (send_emails) of which emails have
+        been sent so that if run again only those not yet sent
+        are sent. Defaults to the json file name + ".journal"
+        (or, with --spool, "journal" in the spool directory.)
   -l  Long format for demographics (phone & email as well as address)
   -m  Maximum data  Same as including -DMB. See also -I
   --mta <mta>  Specify mail transfer agent to use. Choices are:
@@ -100,6 +117,11 @@ Options:
             Sets 'owing_only' attribute of instance of Club.
             Not in use: rely on content.content_type.test.
             When implemented, use to over-ride the above.
+  --profile  Time each of the functions applied to the records as
+            well as csv parsing and output; a table of the timings
+            is printed when the command completes.
+  --profile_json <profile_json>  As for --profile but the timings
+            are also written (as json) to <profile_json>.
   -P <params>  This option will probably be redacted
             since old methods of mailing are no longer used.
             Defaults are A5160 for labels & E000 for envelopes.
@@ -121,6 +143,15 @@ Options:
         to prevent shell from treating each one as a pipe!!
   -S <sponsor_SPoL>  Specify file from which to retrieve sponsors.
   --sec   Include the secretary. (see usps command)
+  --spool <spool_dir>  prepare_mailing: also render each email
+        (as it will be sent) into <spool_dir> so send_emails
+        (given --spool rather than -j) has only to send them.
+        (See Pymail/spool.py.)
+  --sqlite <db>  Read membership data (and extra fees) from the
+            SQLite data base <db> (created by sqldb.py) rather
+            than from the SPoT files (so -i and -X are ignored.)
+            Refused if the SPoT files have changed since <db>
+            was imported.
   --subject <subject>  The subject line of an email.
   -t <2thank>   Input for thank_cmd. It must be a csv file in same
         format as memlist.csv showing recent payments.
@@ -144,6 +175,8 @@ Commands:
         contacts list. Options:
         | -d  Include fee inconsistencies (which are expected
         when some have paid.)
+        | -j <json>  Also write the differences found (as json)
+        | --csv <csv_file>  Also write them as csv: one row each.
     show: Returns membership demographics a copy of which can then
         be sent to the web master for display on the web site.
     report: Prepares a 'Membership Report".
@@ -270,7 +303,14 @@ import content
 import data
 import helpers
 import member
+import money
+import profiler
+import reconcile
+import Pymail.config
 import Pymail.send
+import Pymail.asend
+import Pymail.journal
+import Pymail.spool
 import Bashmail.send
 from rbc import Club
 
@@ -357,6 +397,11 @@ def output(data, destination=Club.STDOUT, announce_write=True):
     defaults to stdout.)
     Reports file manipulations to stdout.
     """
+    with profiler.phase('output'):
+        _output(data, destination, announce_write)
+
+
+def _output(data, destination, announce_write):
     if destination == 'stdout':
         print(data)
     elif destination == 'printer':
@@ -496,6 +541,12 @@ def ck_data_cmd(args=args):
         confirm_file_present_and_up2date(club.CONTACTS_SPoT)
     output("\n".join(data.ck_data(club)),
            club.outfile)
+    if args['-j']:
+        reconcile.dump_json(club.diffs, args['-j'])
+        print("Differences (json) sent to '{}'.".format(args['-j']))
+    if args['--csv']:
+        reconcile.dump_csv(club.diffs, args['--csv'])
+        print("Differences (csv) sent to '{}'.".format(args['--csv']))
 
 
 def show_cmd(args=args):
@@ -788,10 +839,8 @@ def stati_cmd(args=args):
     print("Preparing 'Stati' Report ...")
     club = Club(args)
     setup4stati(club)
-    err_code = member.traverse_records(
-            club.infile,
-            [member.add2ms_by_status,],
-            club) 
+    # Only the records with the stati wanted are visited:
+    member.populate_ms_by_status(club.infile, club, club.stati2show)
     listing = member.show_by_status(
                     club.ms_by_status,
                     stati2show=club.stati2show,
@@ -839,8 +888,11 @@ def zeros_cmd(args=args):
     not being charged while zero indicates nothing owing.
     """
     club = Club(args)
-    err_code = member.traverse_records(
-        club.infile, [member.ck_dues_field, ], club)
+    if getattr(club, 'sqlite', None) is None:
+        money.dues_field(money.get_columns(club.infile), club)
+    else:
+        err_code = member.traverse_records(
+            club.infile, [member.ck_dues_field, ], club)
     res = ["Nulls:",
            "======", ]
     res.extend(club.nulls)
@@ -966,6 +1018,11 @@ def prepare4mailing(club):
     """
     # give user opportunity to abort if files are still present:
     helpers.check_before_deletion((club.json_file, club.mail_dir))
+    if club.spool_dir:
+        helpers.check_before_deletion(club.spool_dir)
+    # A journal (see send_emails_cmd) belongs to the previous mailing:
+    helpers.check_before_deletion(club.json_file + '.journal',
+                                  delete=True)
     if os.path.exists(club.mail_dir): shutil.rmtree(club.mail_dir)
     os.mkdir(club.mail_dir)
     if not args['--which']:
@@ -1002,6 +1059,12 @@ def prepare_mailing_cmd(args=args):
     # ***** Done with configuration & checks ...
     member.prepare_mailing(club)  # Populates club.mail_dir
     #                               and moves json_data to file.
+    if club.spool_dir and club.json_data:
+        print('Rendering emails into spool "{}".'
+              .format(club.spool_dir))
+        Pymail.spool.write(club.json_data, club.spool_dir,
+                           Pymail.send.config.config[club.mta]['from'],
+                           jobs=club.jobs)
     # Check if any letters are filed and if not, delete mailing dir:
     if os.path.isdir(club.mail_dir) and not len(
             os.listdir(club.mail_dir)):
@@ -1153,6 +1216,9 @@ def send_emails_cmd(args=args):
     if emailer == "python":
         send_func = Pymail.send.send
         print("Using Python modules to dispatch emails.")
+    elif emailer == "async":
+        send_func = Pymail.asend.send
+        print("Using Python (asyncio) to dispatch emails.")
     elif emailer == "bash":  # will probably redact this
         send_func = Bashmail.send.send
         print("Using Bash to dispatch emails.")
@@ -1162,8 +1228,35 @@ def send_emails_cmd(args=args):
         sys.exit(1)
     wait = mta.endswith('g')
     message = None
-    data = helpers.get_json(args['-j'], report=True)
-    send_func(data, mta, include_wait=wait)
+    spool_dir = args['--spool']
+    if spool_dir:
+        if emailer == "bash":
+            print('"--spool" requires "--emailer python" (or async).')
+            sys.exit(1)
+        print('Sending emails spooled in "{}".'.format(spool_dir))
+        data = Pymail.spool.entries(spool_dir)
+        try:  # The sender is in the spooled messages' headers.
+            Pymail.send.check_spooled(data,
+                                      Pymail.config.config[mta]['from'])
+        except ValueError as error:
+            print(error)
+            sys.exit(1)
+        journal_file = os.path.join(spool_dir, 'journal')
+    else:
+        data = helpers.get_json(args['-j'], report=True)
+        journal_file = args['-j'] + '.journal'
+    journal = Pymail.journal.Journal(args['--journal'] or journal_file)
+    try:
+        if emailer == "bash":
+            send_func(data, mta, include_wait=wait,
+                      jobs=int(args['--jobs']), journal=journal)
+        else:
+            send_func(data, mta, include_wait=wait, journal=journal,
+                      spool_dir=spool_dir)
+    finally:
+        journal.close()
+    for entry in journal.given_up():
+        print("Gave up sending to {to}: {error}".format(**entry))
 
 
 def emailing_cmd(args=args):
@@ -1201,9 +1294,9 @@ def restore_fees_cmd(args=args):
     club = Club(args)
     setup4new_db(club)  # over rides output file name
                         # & collects field names => club.fieldnames
-    data.restore_fees(club)  # Populates club.new_db & club.errors
-    helpers.save_db(club.new_db, club.outfile, club.fieldnames,
-                 report="New membership DB")
+    data.restore_fees(club)  # Writes club.outfile; > club.errors
+    print("Data (New membership DB) sent to file '{}'."
+          .format(club.outfile))
     if club.errors:
         output('\n'.join(
                    ['Note the following irregularities:',
@@ -1342,6 +1435,8 @@ if __name__ == "__main__":
         helpers.print_usage_and_options(__doc__)
         sys.exit()
 
+    if args['--profile'] or args['--profile_json']:
+        profiler.start()
     if args["ck_data"]:
         ck_data_cmd()
     elif args["show"]:
@@ -1414,6 +1509,13 @@ if __name__ == "__main__":
         print("Try ./utils.py ?           # brief!  or ...")
         print("    ./utils.py -h          # for more detail  or ...")
         print("    ./utils.py -h | pager  # to catch it all.")
+    profile = profiler.stop()
+    if profile:
+        print('\n'.join(profile.report()))
+        if args['--profile_json']:
+            profile.dump(args['--profile_json'])
+            print('Profile written to "{}".'
+                  .format(args['--profile_json']))
 
 else:  # Using curses interface.
     using_curses = True